@@ -40,6 +40,7 @@ DEBUG_MODE = False
 RECORD_VIDEO = False
 RECORD_VIDEO_FPS = 12.0
 CONTINUOUS_SCAN_INTERVAL = 0.08
+INFERENCE_CPU_BUDGET = 0.5 #share of the scanner's time the blooms model may take, the scheduler runs it less often beyond that
 CONTINUOUS_MIN_REPLAN_DISTANCE = 0.08
 TARGET_LOCK_LOST_TIMEOUT = 0.9
 TARGET_LOCK_SWITCH_SCORE_MULTIPLIER = 2.25
@@ -120,9 +121,17 @@ USE_SPRINKLER_MODEL_FOR_DRIFT_COMPENSATION = agc.coerce_bool(
     False,
 )
 CAPTURE_BACKEND = agc.coerce_text(globals().get("pattern_capture_backend"), "auto").lower()
+INFERENCE_OPTIONS = {
+    "backend": agc.coerce_text(globals().get("pattern_inference_backend"), "auto").lower(),
+    "intra_op_threads": agc.coerce_int(globals().get("pattern_inference_intra_op_threads"), 0),
+    "inter_op_threads": agc.coerce_int(globals().get("pattern_inference_inter_op_threads"), 0),
+    "optimization_level": agc.coerce_text(globals().get("pattern_inference_optimization_level"), "all").lower(),
+    "quantized": agc.coerce_bool(globals().get("pattern_inference_quantized"), False),
+}
 DEBUG_MODE = agc.coerce_bool(globals().get("pattern_debug_mode"), DEBUG_MODE)
 RECORD_VIDEO = agc.coerce_bool(globals().get("pattern_record_video"), RECORD_VIDEO)
 RECORD_VIDEO_FPS = agc.coerce_float(globals().get("pattern_record_video_fps"), RECORD_VIDEO_FPS)
+INFERENCE_CPU_BUDGET = agc.coerce_float(globals().get("pattern_inference_cpu_budget"), INFERENCE_CPU_BUDGET)
 BLOOM_MODEL_SELECTION = agc.coerce_text(
     globals().get("pattern_blooms_ai_model"),
     "Standard",
@@ -357,42 +366,47 @@ def _annotate_recording_frame(runtime, frame):
 
 def _scan_tokens_once(runtime):
     movement_revision = int(runtime.get("movement_revision", 0))
+    scheduler = _inference_scheduler(runtime)
+    # Idle sprinkler patrol keeps walking while watching for blooms, so allow
+    # bloom publishes during that movement so the square can abort instantly.
+    idle_patrol = bool(runtime.get("idle_patrol_active"))
+    if runtime.get("movement_active") and not idle_patrol:
+        # a scan during any other walk is thrown away, poll for the walk to end instead of running the model
+        _clear_stale_scan(runtime)
+        scheduler.plan(urgent=True)
+        return runtime.get("latest_detections", []), runtime.get("latest_target")
+
     detection_start = time.time()
     screenshot_start = time.time()
     after_id = int(runtime.get("token_last_frame_id", 0))
-    frame, frame_id, _ = agc.wait_for_latest_frame(
+    frame, frame_id, frame_time = agc.wait_for_latest_frame(
         runtime,
         after_id=after_id,
         timeout=max(CONTINUOUS_SCAN_INTERVAL, 0.02),
-        copy=True,
+        copy=False,
     )
     if frame is None:
         frame = agc.grab_frame(runtime)
-        frame_id = after_id
+        frame_id = None
+        frame_time = time.time()
     else:
         runtime["token_last_frame_id"] = frame_id
     screenshot_elapsed = time.time() - screenshot_start
     preprocess_start = time.time()
-    if runtime.get("combined_model_kind") == "opencv_onnx":
-        image, transform = agc.preprocess_petal_onnx_image(
-            frame,
-            runtime["combined_input_width"],
-            runtime["combined_input_height"],
-        )
-    else:
-        image, transform = agc.preprocess_petal_image(
-            frame,
-            runtime["combined_input_width"],
-            runtime["combined_input_height"],
-        )
+    image, transform = agc.preprocess_frame(
+        runtime,
+        "combined",
+        frame,
+        frame_id,
+        runtime["combined_input_width"],
+        runtime["combined_input_height"],
+        agc.preprocess_layout(runtime.get("combined_model_kind"), letterbox=True),
+    )
     preprocess_elapsed = time.time() - preprocess_start
     inference_start = time.time()
     output = agc.run_model(runtime, "combined", image)
     inference_elapsed = time.time() - inference_start
     postprocess_start = time.time()
-    # Idle sprinkler patrol keeps walking while watching for blooms, so allow
-    # bloom publishes during that movement so the square can abort instantly.
-    idle_patrol = bool(runtime.get("idle_patrol_active"))
     scan_stale = (not idle_patrol) and (
         runtime.get("movement_active")
         or int(runtime.get("movement_revision", 0)) != movement_revision
@@ -405,6 +419,7 @@ def _scan_tokens_once(runtime):
         publish_petals=not scan_stale,
     )
     postprocess_elapsed = time.time() - postprocess_start
+    scheduler.record_inference(preprocess_elapsed + inference_elapsed + postprocess_elapsed)
     scoring_start = time.time()
     target = _find_best_token(runtime, detections)
     if (
@@ -436,13 +451,14 @@ def _scan_tokens_once(runtime):
         min_interval=1.0,
         key="timing",
     )
+    _debug_log(f"stages {agc.stage_timing_summary(runtime)}", min_interval=5.0, key="stage_timing")
+    _debug_log(f"scheduler {scheduler.summary()}", min_interval=5.0, key="scheduler")
     agc.update_detection_fps(runtime, total_elapsed)
     _record_debug_frame(runtime, frame, detections, target)
 
     if scan_stale:
-        runtime["latest_bloom_candidates"] = []
-        runtime["latest_petal_detections"] = []
-        runtime["latest_petal_detection_time"] = 0.0
+        _clear_stale_scan(runtime)
+        scheduler.plan(urgent=True)
         return runtime.get("latest_detections", []), runtime.get("latest_target")
 
     now = time.time()
@@ -455,10 +471,25 @@ def _scan_tokens_once(runtime):
         runtime["latest_target"] = target
         runtime["latest_scan_time"] = now
         runtime["movement_requires_fresh_scan"] = False
+    scheduler.record_decision(frame_time, now)
+    scheduler.plan(
+        moving=idle_patrol or runtime.get("bloom_mode") in ("work", "orbit"),
+        targets=len(runtime.get("latest_bloom_candidates", [])),
+    )
 
     return detections, target
 
 
+def _clear_stale_scan(runtime):
+    runtime["latest_bloom_candidates"] = []
+    runtime["latest_petal_detections"] = []
+    runtime["latest_petal_detection_time"] = 0.0
+
+
+def _inference_scheduler(runtime):
+    return agc.inference_scheduler(runtime, CONTINUOUS_SCAN_INTERVAL, INFERENCE_CPU_BUDGET)
+
+
 def _token_metrics():
     max_leash = 4.0 + (0.45 * max(width - 1, 0)) + (0.35 * size)
     max_bloom_distance = max(BLOOM_MAX_DISTANCE, max_leash + 1.0)
@@ -1014,37 +1045,34 @@ def _execute_planned_movement(runtime):
 
 
 def _process_combined_detections(runtime, output, transform, inference_ms, publish_petals=True):
-    detections = agc.decode_detections(
+    detections = agc.decode_detection_array(
         runtime,
         "combined",
         output,
         min(BLOOM_MIN_CONFIDENCE, PETAL_CONFIDENCE_THRESHOLD),
     )
-    bloom_detections = []
-    petal_overlays = []
     scale = float(transform["scale"])
     pad_x = float(transform["pad_x"])
     pad_y = float(transform["pad_y"])
     capture_width = float(runtime["capture"]["width"])
     capture_height = float(runtime["capture"]["height"])
 
-    for (x1, y1, x2, y2), class_id, confidence in detections:
-        capture_box = (
-            max(0.0, min(capture_width, (x1 - pad_x) / scale)),
-            max(0.0, min(capture_height, (y1 - pad_y) / scale)),
-            max(0.0, min(capture_width, (x2 - pad_x) / scale)),
-            max(0.0, min(capture_height, (y2 - pad_y) / scale)),
-        )
-        if class_id == 0 and confidence >= BLOOM_MIN_CONFIDENCE:
-            bloom_detections.append((agc.capture_box_to_model(runtime, capture_box), 5, confidence))
-            continue
-        if class_id != 1 or confidence < PETAL_CONFIDENCE_THRESHOLD:
-            continue
+    # undo the letterbox for every box at once
+    capture_boxes = (detections["box"].astype(np.float64) - (pad_x, pad_y, pad_x, pad_y)) / scale
+    np.clip(capture_boxes, 0.0, (capture_width, capture_height, capture_width, capture_height), out=capture_boxes)
+    class_ids = detections["class_id"]
+    confidences = detections["confidence"]
+    blooms = (class_ids == 0) & (confidences >= BLOOM_MIN_CONFIDENCE)
+    petals = (class_ids == 1) & (confidences >= PETAL_CONFIDENCE_THRESHOLD)
 
-        petal_overlays.append({
-            "box": capture_box,
-            "confidence": float(confidence),
-        })
+    bloom_detections = [
+        (agc.capture_box_to_model(runtime, tuple(capture_box)), 5, confidence)
+        for capture_box, confidence in zip(capture_boxes[blooms].tolist(), confidences[blooms].tolist())
+    ]
+    petal_overlays = [
+        {"box": tuple(capture_box), "confidence": confidence}
+        for capture_box, confidence in zip(capture_boxes[petals].tolist(), confidences[petals].tolist())
+    ]
 
     now = time.time()
     if not publish_petals:
@@ -1160,7 +1188,7 @@ def _initialise_runtime():
         raise RuntimeError("Could not compute BloomsAI homography.")
 
     if combined_model_kind == "opencv_onnx":
-        combined_session, combined_input, combined_output = agc.load_onnx_model(combined_path)
+        combined_session, combined_input, combined_output = agc.load_onnx_model(combined_path, **INFERENCE_OPTIONS)
         agc.delete_model_path(MODEL_DIR / model_coreml, _debug_log)
     else:
         combined_session, combined_input, combined_output = agc.load_coreml_model(
@@ -1173,6 +1201,7 @@ def _initialise_runtime():
         sprinkler_path,
         sprinkler_model_kind,
         _debug_log,
+        INFERENCE_OPTIONS,
     )
 
     return {
@@ -1273,7 +1302,7 @@ else:
         agc.ensure_scanner_thread(
             runtime,
             _scan_tokens_once,
-            CONTINUOUS_SCAN_INTERVAL,
+            lambda: _inference_scheduler(runtime).interval,
             debug_log_fn=_debug_log,
             on_error=lambda _exc: agc.release_video_writer(runtime, debug_log_fn=_debug_log),
         )
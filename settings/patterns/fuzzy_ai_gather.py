@@ -45,6 +45,8 @@ DEBUG_MODE = False
 RECORD_VIDEO = False
 RECORD_VIDEO_FPS = 12.0
 CONTINUOUS_SCAN_INTERVAL = 0.08
+TRACKER_DETECT_INTERVAL = 0.16 #scans in between use the token tracker's predictions, 0 runs the model every scan
+INFERENCE_CPU_BUDGET = 0.5 #share of the scanner's time the token model may take, the scheduler runs it less often beyond that
 CONTINUOUS_MIN_REPLAN_DISTANCE = 0.08
 TARGET_LOCK_REACHED_DISTANCE = 0.18
 TARGET_LOCK_LOST_TIMEOUT = 0.9
@@ -183,9 +185,18 @@ USE_SPRINKLER_MODEL_FOR_DRIFT_COMPENSATION = agc.coerce_bool(
     False,
 )
 CAPTURE_BACKEND = agc.coerce_text(globals().get("pattern_capture_backend"), "auto").lower()
+INFERENCE_OPTIONS = {
+    "backend": agc.coerce_text(globals().get("pattern_inference_backend"), "auto").lower(),
+    "intra_op_threads": agc.coerce_int(globals().get("pattern_inference_intra_op_threads"), 0),
+    "inter_op_threads": agc.coerce_int(globals().get("pattern_inference_inter_op_threads"), 0),
+    "optimization_level": agc.coerce_text(globals().get("pattern_inference_optimization_level"), "all").lower(),
+    "quantized": agc.coerce_bool(globals().get("pattern_inference_quantized"), False),
+}
 DEBUG_MODE = agc.coerce_bool(globals().get("pattern_debug_mode"), DEBUG_MODE)
 RECORD_VIDEO = agc.coerce_bool(globals().get("pattern_record_video"), RECORD_VIDEO)
 RECORD_VIDEO_FPS = agc.coerce_float(globals().get("pattern_record_video_fps"), RECORD_VIDEO_FPS)
+TRACKER_DETECT_INTERVAL = agc.coerce_float(globals().get("pattern_tracker_detect_interval"), TRACKER_DETECT_INTERVAL)
+INFERENCE_CPU_BUDGET = agc.coerce_float(globals().get("pattern_inference_cpu_budget"), INFERENCE_CPU_BUDGET)
 PREFERRED_TOKENS = agc.preferred_token_weights(globals().get("pattern_preferred_tokens"), PREFERRED_TOKENS)
 PREFERRED_TOKEN_RANKS = {name: index for index, name in enumerate(PREFERRED_TOKENS.keys())}
 IGNORED_TOKENS = agc.ignored_token_names(globals().get("pattern_ignored_tokens"), IGNORED_TOKENS)
@@ -247,33 +258,6 @@ def onGatherEnd():
     agc.release_video_writer(runtime, debug_log_fn=_debug_log)
 
 
-def _preprocess_token_frame(frame, runtime, already_cropped=False):
-    if already_cropped or runtime.get("token_frame_is_crop"):
-        cropped = frame
-    else:
-        left, top, width_px, height_px = runtime["token_crop"]
-        cropped = frame[top:top + height_px, left:left + width_px]
-
-    input_width = int(runtime.get("token_input_width", INPUT_WIDTH))
-    input_height = int(runtime.get("token_input_height", INPUT_HEIGHT))
-    if cropped.shape[1] != input_width or cropped.shape[0] != input_height:
-        cropped = cv2.resize(cropped, (input_width, input_height), interpolation=cv2.INTER_LINEAR)
-
-    if cropped.ndim == 3 and cropped.shape[2] == 4:
-        rgb = cv2.cvtColor(cropped, cv2.COLOR_BGRA2RGB)
-    else:
-        rgb = cv2.cvtColor(cropped, cv2.COLOR_BGR2RGB)
-
-    if runtime.get("token_model_kind") == "opencv_onnx":
-        normalized = rgb.astype(np.float32) / 255.0
-        chw = np.transpose(normalized, (2, 0, 1))
-        return np.expand_dims(chw, axis=0)
-
-    if Image is None:
-        raise RuntimeError("Pillow is required for CoreML token inference.")
-    return Image.fromarray(rgb)
-
-
 def _record_debug_frame(runtime, frame, detections, target):
     if runtime.get("video_writer") is None:
         mailbox_frame, _, _ = agc.get_latest_frame(runtime, copy=True)
@@ -415,37 +399,63 @@ def _scan_tokens_once(runtime):
     detection_start = time.time()
     screenshot_start = time.time()
     after_id = int(runtime.get("token_last_frame_id", 0))
-    full_frame, frame_id, _ = agc.wait_for_latest_frame(
+    full_frame, frame_id, frame_time = agc.wait_for_latest_frame(
         runtime,
         after_id=after_id,
         timeout=max(CONTINUOUS_SCAN_INTERVAL, 0.02),
-        copy=True,
+        copy=False,
     )
     if full_frame is None:
         full_frame = agc.grab_frame(runtime)
-        frame_id = after_id
+        frame_id = None
+        frame_time = time.time()
     else:
         runtime["token_last_frame_id"] = frame_id
-    token_frame = agc.crop_rect(full_frame, runtime["token_crop"])
     screenshot_elapsed = time.time() - screenshot_start
-    preprocess_start = time.time()
-    image = _preprocess_token_frame(token_frame, runtime, already_cropped=True)
-    preprocess_elapsed = time.time() - preprocess_start
-    inference_start = time.time()
-    output = agc.run_model(runtime, "token", image)
-    inference_elapsed = time.time() - inference_start
-    postprocess_start = time.time()
-    detections = agc.decode_detections(runtime, "token", output, CONFIDENCE_THRESHOLD)
-    input_width = float(runtime.get("token_input_width", INPUT_WIDTH))
-    input_height = float(runtime.get("token_input_height", INPUT_HEIGHT))
-    if input_width != INPUT_WIDTH or input_height != INPUT_HEIGHT:
-        scale_x = INPUT_WIDTH / input_width
-        scale_y = INPUT_HEIGHT / input_height
-        detections = [
-            ((box[0] * scale_x, box[1] * scale_y, box[2] * scale_x, box[3] * scale_y), class_id, confidence)
-            for box, class_id, confidence in detections
-        ]
-    postprocess_elapsed = time.time() - postprocess_start
+    preprocess_elapsed = inference_elapsed = postprocess_elapsed = 0.0
+    # the camera moves with the player, tokens keep a steady velocity on screen until a walk starts or ends
+    motion_state = (bool(runtime.get("movement_active")), runtime.get("movement_count", 0))
+    scan_time = time.time()
+    scheduler = _inference_scheduler(runtime)
+    detect_interval = scheduler.plan(moving=motion_state[0], targets=runtime.get("last_candidate_count", 0))
+    detector_ran = agc.detector_due(
+        runtime,
+        "token",
+        detect_interval if TRACKER_DETECT_INTERVAL > 0 else 0.0,
+        motion_state,
+        scan_time,
+    )
+    if detector_ran:
+        preprocess_start = time.time()
+        image, _ = agc.preprocess_frame(
+            runtime,
+            "token",
+            full_frame,
+            frame_id,
+            runtime.get("token_input_width", INPUT_WIDTH),
+            runtime.get("token_input_height", INPUT_HEIGHT),
+            agc.preprocess_layout(runtime.get("token_model_kind")),
+            crop=runtime["token_crop"],
+        )
+        preprocess_elapsed = time.time() - preprocess_start
+        inference_start = time.time()
+        output = agc.run_model(runtime, "token", image)
+        inference_elapsed = time.time() - inference_start
+        postprocess_start = time.time()
+        detections = agc.decode_detection_array(runtime, "token", output, CONFIDENCE_THRESHOLD)
+        input_width = float(runtime.get("token_input_width", INPUT_WIDTH))
+        input_height = float(runtime.get("token_input_height", INPUT_HEIGHT))
+        if input_width != INPUT_WIDTH or input_height != INPUT_HEIGHT:
+            scale_x = INPUT_WIDTH / input_width
+            scale_y = INPUT_HEIGHT / input_height
+            detections["box"] *= np.array((scale_x, scale_y, scale_x, scale_y), dtype=np.float32)
+        detections = agc.track_detections(runtime, "token", detections, motion_state, scan_time)
+        postprocess_elapsed = time.time() - postprocess_start
+        scheduler.record_inference(preprocess_elapsed + inference_elapsed + postprocess_elapsed)
+    else:
+        postprocess_start = time.time()
+        detections = agc.predict_detections(runtime, "token", scan_time)
+        postprocess_elapsed = time.time() - postprocess_start
     scoring_start = time.time()
     target = _find_best_token(runtime, detections)
     if (
@@ -455,6 +465,7 @@ def _scan_tokens_once(runtime):
         and agc.refresh_sprinkler_anchor(runtime, force=True, **_anchor_kwargs())
     ):
         target = _find_best_token(runtime, detections)
+    detections = agc.detections_to_list(detections)
     scoring_elapsed = time.time() - scoring_start
     total_elapsed = time.time() - detection_start
 
@@ -468,6 +479,7 @@ def _scan_tokens_once(runtime):
     }
     _debug_log(
         "timing "
+        f"detector={'run' if detector_ran else 'tracked'} "
         f"screenshot={runtime['last_timing_ms']['screenshot']:.1f}ms "
         f"preprocess={runtime['last_timing_ms']['preprocess']:.1f}ms "
         f"inference={runtime['last_timing_ms']['inference']:.1f}ms "
@@ -477,7 +489,10 @@ def _scan_tokens_once(runtime):
         min_interval=1.0,
         key="timing",
     )
-    agc.update_detection_fps(runtime, total_elapsed)
+    _debug_log(f"stages {agc.stage_timing_summary(runtime)}", min_interval=5.0, key="stage_timing")
+    _debug_log(f"scheduler {scheduler.summary()}", min_interval=5.0, key="scheduler")
+    if detector_ran:
+        agc.update_detection_fps(runtime, total_elapsed)
     _record_debug_frame(runtime, full_frame, detections, target)
 
     now = time.time()
@@ -489,10 +504,27 @@ def _scan_tokens_once(runtime):
         runtime["latest_detections"] = detections
         runtime["latest_target"] = target
         runtime["latest_scan_time"] = now
+    scheduler.record_decision(frame_time if detector_ran else None, now)
 
     return detections, target
 
 
+def _inference_scheduler(runtime):
+    base_interval = TRACKER_DETECT_INTERVAL if TRACKER_DETECT_INTERVAL > 0 else CONTINUOUS_SCAN_INTERVAL
+    return agc.inference_scheduler(runtime, base_interval, INFERENCE_CPU_BUDGET)
+
+
+def _scan_interval(runtime):
+    '''
+    With the tracker the scanner keeps predicting every CONTINUOUS_SCAN_INTERVAL and
+    the scheduler paces the detector runs, without it the scheduler paces the scans.
+    '''
+    scheduler_interval = _inference_scheduler(runtime).interval
+    if TRACKER_DETECT_INTERVAL > 0:
+        return min(CONTINUOUS_SCAN_INTERVAL, scheduler_interval)
+    return scheduler_interval
+
+
 def _get_importance(token_name):
     return PREFERRED_TOKENS.get(token_name, 1)
 
@@ -525,14 +557,34 @@ def _token_metrics():
 
 
 def _find_best_token(runtime, detections):
+    """Score a structured detection array (agc.decode_detection_array or tracker predictions) and pick the target."""
     metrics = _token_metrics()
     current_x = runtime["current_x"]
     current_y = runtime["current_y"]
     current_dist = math.hypot(current_x, current_y)
 
+    # every token's ground offset from one perspective transform
+    boxes = detections["box"]
+    center_x, center_y = agc.model_point_to_capture(
+        runtime,
+        (boxes[:, 0] + boxes[:, 2]) / 2.0,
+        (boxes[:, 1] + boxes[:, 3]) / 2.0,
+    )
+    offsets_x, offsets_y = agc.relative_distances(center_x, center_y, runtime["homography"])
+
+    track_ids = detections["track_id"].tolist() if "track_id" in detections.dtype.names else [None] * len(detections)
+
     candidates = []
     rejected = []
-    for box, class_id, confidence in detections:
+    for box, class_id, confidence, tx, ty, track_id in zip(
+        boxes.tolist(),
+        detections["class_id"].tolist(),
+        detections["confidence"].tolist(),
+        offsets_x.tolist(),
+        offsets_y.tolist(),
+        track_ids,
+    ):
+        box = tuple(box)
         token_name = runtime.get("token_labels", LABELS_TOKENS).get(class_id)
         if not token_name:
             rejected.append({"class_id": class_id, "reason": "unknown", "confidence": confidence})
@@ -541,9 +593,6 @@ def _find_best_token(runtime, detections):
             rejected.append({"name": token_name, "reason": "ignored", "confidence": confidence})
             continue
 
-        x1, y1, x2, y2 = box
-        center_x, center_y = agc.model_point_to_capture(runtime, (x1 + x2) / 2.0, (y1 + y2) / 2.0)
-        tx, ty = agc.relative_distance(center_x, center_y, runtime["homography"])
         distance = math.hypot(tx, ty)
 
         if distance > metrics["max_consider"]:
@@ -588,6 +637,7 @@ def _find_best_token(runtime, detections):
                 "score": score,
                 "priority_rank": _get_priority_rank(token_name),
                 "confidence": confidence,
+                "track_id": track_id,
             }
         )
 
@@ -1023,7 +1073,7 @@ def _initialise_runtime():
     for candidate_path, candidate_kind, candidate_labels, candidate_label, candidate_width, candidate_height in token_candidates:
         try:
             if candidate_kind == "opencv_onnx":
-                token_session, token_input, token_output = agc.load_onnx_model(candidate_path)
+                token_session, token_input, token_output = agc.load_onnx_model(candidate_path, **INFERENCE_OPTIONS)
             else:
                 token_session, token_input, token_output = agc.load_coreml_model(candidate_path)
             if candidate_label != requested_label:
@@ -1054,6 +1104,7 @@ def _initialise_runtime():
         sprinkler_path,
         sprinkler_model_kind,
         _debug_log,
+        INFERENCE_OPTIONS,
     )
 
     return {
@@ -1142,7 +1193,7 @@ else:
         agc.ensure_scanner_thread(
             runtime,
             _scan_tokens_once,
-            CONTINUOUS_SCAN_INTERVAL,
+            lambda: _scan_interval(runtime),
             debug_log_fn=_debug_log,
             on_error=lambda _exc: agc.release_video_writer(runtime, debug_log_fn=_debug_log),
         )
@@ -1260,6 +1260,10 @@ def getAutoUpdateCheckDisabled():
 def log(time = "", msg = "", color = ""):
     eel.log(time, msg, color)
 
+def logBatch(entries):
+    #entries: [(time, msg, color)], added in one call
+    eel.logBatch([list(entry) for entry in entries])
+
 eel.expose(settingsManager.loadFields)
 eel.expose(settingsManager.saveField) 
 eel.expose(settingsManager.getDefaultFuzzyAIGatherPatternPreset)
@@ -1355,9 +1359,8 @@ def getRecentLogs():
 @eel.expose
 def clearRecentLogs():
     global _recent_logs
-    # Clear the shared list
+    # Clear the ring buffer (which also clears the bot's snapshot)
     try:
-        # If it's a multiprocessing.Manager.list, we use del or clear()
         if hasattr(_recent_logs, 'clear'):
             _recent_logs.clear()
         else:
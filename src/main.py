@@ -31,6 +31,7 @@ import traceback
 import modules.misc.settingsManager as settingsManager
 import modules.macro as macroModule
 import modules.controls.mouse as mouse
+from modules.controls.controlBlock import ControlBlock
 import json
 from modules.misc.modelManager import ensure_missing_supported_models
 from modules.controls.sleep import (
@@ -67,6 +68,7 @@ except ModuleNotFoundError:
         pass
     quit()
 from modules.submacros.hourlyReport import HourlyReport
+from modules.submacros.autoPlanters import AutoPlanterPlanner, nectarNames
 from modules.submacros.tadAltSync import TadAltSync
 mw, mh = pag.size()
 
@@ -1763,6 +1765,7 @@ def macro(status, logQueue, updateGUI, run, skipTask, presence=None, discordMess
                     
                     if not planterDataRaw.strip():
                         planterData = emptyManualPlanterData()
+                        macro.prefetchPlantersInInventory([macro.setdat[f"cycle1_{i+1}_planter"] for i in range(3) if macro.setdat[f"cycle1_{i+1}_field"] != "none"])
                         for i in range(3):
                             if macro.setdat[f"cycle1_{i+1}_planter"] == "none" or macro.setdat[f"cycle1_{i+1}_field"] == "none":
                                 continue
@@ -1792,6 +1795,20 @@ def macro(status, logQueue, updateGUI, run, skipTask, presence=None, discordMess
                                     planterData = saveManualPlanterData(planterData)
                                     updateGUI.value = 1
                         
+                        #prefetch only the planters the loop below will place, with the same slot checks
+                        plannedPlanters = list(planterData["planters"])
+                        plannedFields = list(planterData["fields"])
+                        for i in range(3):
+                            nextCycle = None if plannedPlanters[i] else goToNextCycle(planterData["cycles"][i], i)
+                            if not nextCycle:
+                                continue
+                            planterToPlace = macro.setdat[f"cycle{nextCycle}_{i+1}_planter"]
+                            fieldToPlace = macro.setdat[f"cycle{nextCycle}_{i+1}_field"]
+                            if planterToPlace in plannedPlanters[:i] + plannedPlanters[i+1:] or fieldToPlace in plannedFields[:i] + plannedFields[i+1:]:
+                                continue
+                            plannedPlanters[i] = planterToPlace
+                            plannedFields[i] = fieldToPlace
+                        macro.prefetchPlantersInInventory([plannedPlanters[i] for i in range(3) if not planterData["planters"][i] and plannedPlanters[i]])
                         for i in range(3):
                             cycle = planterData["cycles"][i]
                             if planterData["planters"][i]:
@@ -1830,213 +1847,18 @@ def macro(status, logQueue, updateGUI, run, skipTask, presence=None, discordMess
                     except Exception:
                         data = {}
 
-                    fieldToNectar = {}
-                    for nectarName, nectarFields in macroModule.nectarFields.items():
-                        for fieldName in nectarFields:
-                            fieldToNectar[fieldName] = nectarName
-
-                    planterData = data.get("planters", [])
-                    nectarLastFields = data.get("nectar_last_field", {})
-                    gatherFlag = data.get("gather", False)
-                    fieldDegradation = data.get("field_degradation", {})
-
-                    priorityMap = {}
-                    for i in range(5):
-                        nectar = macro.setdat[f"auto_priority_{i}_nectar"]
-                        if nectar == "none":
-                            continue
-                        priorityMap[nectar] = {
-                            "min": float(macro.setdat[f"auto_priority_{i}_min"]),
-                            "index": i,
-                            "weight": max(0.5, 1.35 - (i * 0.12))
-                        }
-
-                    def emptyAutoPlanterSlot():
-                        return {
-                            "planter": "",
-                            "nectar": "",
-                            "field": "",
-                            "harvest_time": 0,
-                            "nectar_est_percent": 0,
-                            "placed_time": 0,
-                            "grow_duration": 0,
-                            "natural_grow_duration": 0
-                        }
-
-                    def emptyFieldDegradationState():
-                        return {
-                            fieldName: {
-                                "hours": 0.0,
-                                "updated_at": 0.0
-                            }
-                            for fieldName in fieldToNectar
-                        }
-
-                    def getDecayedDegradationEntry(fieldName, defaultNow=None):
-                        now = time.time() if defaultNow is None else defaultNow
-                        rawEntry = fieldDegradation.get(fieldName, {})
-
-                        if isinstance(rawEntry, dict):
-                            hours = float(rawEntry.get("hours", rawEntry.get("value", 0) or 0))
-                            updatedAt = float(rawEntry.get("updated_at", now) or now)
-                        else:
-                            hours = float(rawEntry or 0)
-                            updatedAt = now
-
-                        elapsedHours = max(0.0, (now - updatedAt) / 3600.0)
-                        remainingHours = max(0.0, min(48.0, hours - elapsedHours))
-                        return {
-                            "hours": remainingHours,
-                            "updated_at": now
-                        }
-
-                    def normalizeFieldDegradation():
-                        nonlocal fieldDegradation
-                        now = time.time()
-                        normalized = emptyFieldDegradationState()
-                        for fieldName in normalized:
-                            normalized[fieldName] = getDecayedDegradationEntry(fieldName, defaultNow=now)
-                        fieldDegradation = normalized
+                    planner = AutoPlanterPlanner(macro.setdat, data, macro.buffDetector.getNectar)
 
                     def saveAutoPlanterData():
-                        data = {
-                            "planters": planterData,
-                            "nectar_last_field": nectarLastFields,
-                            "gather": gatherFlag,
-                            "field_degradation": fieldDegradation
-                        }
                         with open(settingsManager.ensureUserFile("auto_planters.json"), "w") as f:
-                            json.dump(data, f, indent=3)
+                            json.dump(planner.toDict(), f, indent=3)
                         f.close()
                         updateGUI.value = 1
 
-                    def getPlanterRanking(field, planterName):
-                        for planterObj in macroModule.autoPlanterRankings.get(field, []):
-                            if planterObj["name"] == planterName:
-                                return planterObj
-                        return None
-
-                    def estimateNectarGain(planterObj, growTimeSeconds):
-                        growTimeSeconds = max(0, growTimeSeconds)
-                        return min(100.0, round((growTimeSeconds * planterObj["nectar_bonus"] * planterObj["grow_bonus"] / 864), 1))
-
-                    def getEffectiveNaturalGrowTimeSeconds(fieldName, planterObj):
-                        return max(0.0, (planterObj["grow_time"] + getFieldDegradationHours(fieldName)) * 60 * 60)
-
-                    def normalizeAutoPlanterSlot(slot):
-                        normalized = emptyAutoPlanterSlot()
-                        if isinstance(slot, dict):
-                            for key in normalized:
-                                normalized[key] = slot.get(key, normalized[key])
-
-                        if normalized["field"]:
-                            normalized["field"] = normalized["field"].replace("_", " ")
-                        if normalized["planter"] and not normalized["nectar"]:
-                            normalized["nectar"] = fieldToNectar.get(normalized["field"], "")
-
-                        ranking = None
-                        if normalized["planter"] and normalized["field"]:
-                            ranking = getPlanterRanking(normalized["field"], normalized["planter"])
-
-                        if normalized["planter"] and ranking:
-                            if normalized["grow_duration"] <= 0:
-                                normalized["grow_duration"] = ranking["grow_time"] * 60 * 60
-                            if normalized["natural_grow_duration"] <= 0:
-                                normalized["natural_grow_duration"] = ranking["grow_time"] * 60 * 60
-                            if normalized["placed_time"] <= 0 and normalized["harvest_time"] > 0:
-                                normalized["placed_time"] = max(0, normalized["harvest_time"] - normalized["grow_duration"])
-                            if normalized["nectar_est_percent"] <= 0:
-                                normalized["nectar_est_percent"] = estimateNectarGain(ranking, normalized["grow_duration"])
-
-                        return normalized
-
-                    normalizeFieldDegradation()
-                    planterData = [normalizeAutoPlanterSlot(slot) for slot in planterData[:3]]
-                    while len(planterData) < 3:
-                        planterData.append(emptyAutoPlanterSlot())
-                    for nectarName in macroModule.nectarNames:
-                        nectarLastFields.setdefault(nectarName, "")
-
-                    currentNectarCache = {}
-
-                    def getCurrentNectarPercent(nectar):
-                        if nectar not in currentNectarCache:
-                            try:
-                                currentNectarCache[nectar] = macro.buffDetector.getNectar(nectar)
-                            except Exception:
-                                currentNectarCache[nectar] = 0.0
-                            print(f"Current {nectar} Nectar: {currentNectarCache[nectar]}%")
-                        return currentNectarCache[nectar]
-
-                    def getPriorityInfo(nectar):
-                        return priorityMap.get(nectar, {"min": 100.0, "index": len(priorityMap), "weight": 0.35})
-
-                    def getEstimateNectarPercent(nectar):
-                        return sum(
-                            max(0, planter.get("nectar_est_percent", 0))
-                            for planter in planterData
-                            if planter["planter"] and planter.get("nectar") == nectar
-                        )
-
-                    def getTotalNectarPercent(nectar):
-                        return getCurrentNectarPercent(nectar) + getEstimateNectarPercent(nectar)
-
-                    def calculatePlacementPlan(fieldName, planterObj, nectar, projectedNectarPercent):
-                        now = time.time()
-                        projectedNectarPercent = max(0.0, projectedNectarPercent)
-                        minPercent = max(getPriorityInfo(nectar)["min"], projectedNectarPercent)
-                        naturalGrowTimeSeconds = getEffectiveNaturalGrowTimeSeconds(fieldName, planterObj)
-                        naturalGrowTimeHours = naturalGrowTimeSeconds / 3600.0
-
-                        if macro.setdat["auto_planters_collect_auto"]:
-                            nectarBonus = max(planterObj["nectar_bonus"], 0.1)
-                            growBonus = max(planterObj["grow_bonus"], 0.1)
-                            totalBonus = max(nectarBonus * growBonus, 0.1)
-                            timeToCap = max(0.25, ((max(0, 100 - projectedNectarPercent) / nectarBonus) * 0.24) / growBonus)
-
-                            if totalBonus < 1.2:
-                                growTimeHours = min(timeToCap, 0.5)
-                            elif minPercent > projectedNectarPercent and projectedNectarPercent <= 90:
-                                if projectedNectarPercent > 20:
-                                    bonusTime = (100 / projectedNectarPercent) * totalBonus
-                                    growTimeHours = (((minPercent - projectedNectarPercent + bonusTime) / nectarBonus) * 0.24) / growBonus
-                                elif projectedNectarPercent > 10:
-                                    growTimeHours = min(naturalGrowTimeHours, 4)
-                                else:
-                                    growTimeHours = min(naturalGrowTimeHours, 2)
-                            else:
-                                growTimeHours = timeToCap
-
-                            finalGrowTime = min(
-                                naturalGrowTimeHours,
-                                (growTimeHours + growTimeHours / totalBonus),
-                                (timeToCap + timeToCap / totalBonus)
-                            ) * 60 * 60
-                            planterHarvestTime = now + finalGrowTime
-                        elif macro.setdat["auto_planters_collect_full"]:
-                            finalGrowTime = naturalGrowTimeSeconds
-                            planterHarvestTime = now + finalGrowTime
-                        else:
-                            finalGrowTime = min(naturalGrowTimeHours, macro.setdat["auto_planters_collect_every"]) * 60 * 60
-                            planterHarvestTime = now + finalGrowTime
-                            for activePlanter in planterData:
-                                harvestTime = activePlanter["harvest_time"]
-                                if harvestTime > now and planterHarvestTime > harvestTime:
-                                    planterHarvestTime = harvestTime
-                            finalGrowTime = max(0, planterHarvestTime - now)
-
-                        return {
-                            "grow_duration": finalGrowTime,
-                            "harvest_time": planterHarvestTime,
-                            "placed_time": now,
-                            "nectar_est_percent": estimateNectarGain(planterObj, finalGrowTime),
-                            "natural_grow_duration": naturalGrowTimeSeconds
-                        }
-
                     def sendNectarPercentageWebhook():
                         try:
                             nectarPercentages = []
-                            for nectarName in macroModule.nectarNames:
+                            for nectarName in nectarNames:
                                 try:
                                     totalPercent = macro.buffDetector.getNectar(nectarName)
                                 except Exception:
@@ -2077,262 +1899,28 @@ def macro(status, logQueue, updateGUI, run, skipTask, presence=None, discordMess
                             pass
 
                     def savePlacedPlanter(slot, field, planterObj, nectar, placementPlan):
-                        nonlocal planterData, nectarLastFields
-                        planterData[slot] = {
-                            "planter": planterObj["name"],
-                            "nectar": nectar,
-                            "field": field,
-                            "harvest_time": placementPlan["harvest_time"],
-                            "nectar_est_percent": placementPlan["nectar_est_percent"],
-                            "placed_time": placementPlan["placed_time"],
-                            "grow_duration": placementPlan["grow_duration"],
-                            "natural_grow_duration": placementPlan["natural_grow_duration"]
-                        }
+                        planner.savePlacedPlanter(slot, field, planterObj, nectar, placementPlan)
                         planterReady = time.strftime("%H:%M:%S", time.gmtime(placementPlan["grow_duration"]))
                         macro.logger.webhook("", f"Planter will be ready in: {planterReady}", "light blue")
-                        nectarLastFields[nectar] = field
                         saveAutoPlanterData()
                         sendNectarPercentageWebhook()
 
-                    def getFieldDegradationHours(fieldName):
-                        entry = getDecayedDegradationEntry(fieldName)
-                        fieldDegradation[fieldName] = entry
-                        return entry["hours"]
-
-                    def getNaturalPlanterProgress(planter):
-                        if not planter["planter"]:
-                            return 0.0
-                        naturalGrowDuration = planter.get("natural_grow_duration", 0)
-                        placedTime = planter.get("placed_time", 0)
-                        if naturalGrowDuration > 0 and placedTime > 0:
-                            return max(0.0, min(1.0, (time.time() - placedTime) / naturalGrowDuration))
-                        if planter["harvest_time"] <= time.time():
-                            return 1.0
-                        return 0.0
-
-                    def getPlanterProgress(planter):
-                        return getNaturalPlanterProgress(planter)
-
-                    def recordFieldDegradation(planter):
-                        fieldName = planter.get("field")
-                        planterName = planter.get("planter")
-                        if not fieldName or not planterName:
-                            return
-
-                        ranking = getPlanterRanking(fieldName, planterName)
-                        if not ranking:
-                            return
-
-                        naturalGrowHours = max(
-                            ranking["grow_time"],
-                            (planter.get("natural_grow_duration", 0) or 0) / 3600.0
-                        )
-                        progress = getNaturalPlanterProgress(planter)
-                        degradationToAdd = 1.0 + (naturalGrowHours * max(0.0, progress))
-                        currentHours = getFieldDegradationHours(fieldName)
-                        fieldDegradation[fieldName] = {
-                            "hours": min(48.0, currentHours + degradationToAdd),
-                            "updated_at": time.time()
-                        }
-
-                    planterSlotsToHarvest = []
-                    if macro.setdat["auto_planters_collect_auto"]:
-                        for nectarName in macroModule.nectarNames:
-                            matchingPlanters = []
-                            currentNectarPercent = getCurrentNectarPercent(nectarName)
-                            projectedNectarPercent = getTotalNectarPercent(nectarName)
-
-                            if currentNectarPercent >= 99:
-                                requiredProgress = 0.0
-                            elif projectedNectarPercent >= 120:
-                                requiredProgress = 0.55
-                            elif currentNectarPercent >= 90 and projectedNectarPercent >= 110:
-                                requiredProgress = 0.75
-                            else:
-                                continue
-
-                            for slot, planter in enumerate(planterData):
-                                if planter["planter"] and planter.get("nectar") == nectarName:
-                                    matchingPlanters.append((slot, planter, getNaturalPlanterProgress(planter)))
-
-                            matchingPlanters.sort(key=lambda item: (-item[2], item[1]["harvest_time"]))
-                            remainingProjected = projectedNectarPercent
-                            targetProjected = max(getPriorityInfo(nectarName)["min"] + 5, 100)
-
-                            for slot, planter, progress in matchingPlanters:
-                                timeRemaining = max(0, planter["harvest_time"] - time.time())
-                                if currentNectarPercent < 99 and progress < requiredProgress and timeRemaining > 45 * 60:
-                                    continue
-                                planterSlotsToHarvest.append(slot)
-                                remainingProjected -= max(0, planter.get("nectar_est_percent", 0))
-                                if remainingProjected <= targetProjected:
-                                    break
-
-                    for slot, planter in enumerate(planterData):
-                        if planter["planter"] and time.time() > planter["harvest_time"]:
-                            planterSlotsToHarvest.append(slot)
-
-                    planterSlotsToHarvest = sorted(set(planterSlotsToHarvest))
-                    for slot in planterSlotsToHarvest:
-                        planter = planterData[slot]
+                    for slot in planner.getPlanterSlotsToHarvest():
+                        planter = planner.planterData[slot]
                         if not planter["planter"]:
                             continue
                         if runTask(macro.collectPlanter, args=(planter["planter"], planter["field"])):
-                            recordFieldDegradation(planter)
-                            planterData[slot] = emptyAutoPlanterSlot()
-                            currentNectarCache.clear()
+                            planner.harvested(slot)
                             saveAutoPlanterData()
 
-                    maxAllowedPlanters = 0
-                    for planterName in macroModule.allPlanters:
-                        settingName = planterName.replace(" ", "_")
-                        if macro.setdat.get(f"auto_planter_{settingName}", False):
-                            maxAllowedPlanters += 1
-                    maxAllowedPlanters = min(maxAllowedPlanters, macro.setdat["auto_max_planters"])
-
-                    blockedPlacements = set()
-                    blockedPlanters = set()
-
-                    def getAvailableFields(occupiedFields):
-                        return [
-                            field for field in fieldToNectar
-                            if macro.setdat.get(f"auto_field_{field.replace(' ', '_')}", False) and field not in occupiedFields
-                        ]
-
-                    def buildPlacementCandidates(occupiedFields, occupiedPlanters):
-                        candidates = []
-                        for field in getAvailableFields(occupiedFields):
-                            addedForField = 0
-                            for planterObj in macroModule.autoPlanterRankings.get(field, []):
-                                planterName = planterObj["name"]
-                                if planterName in occupiedPlanters or planterName in blockedPlanters or (planterName, field) in blockedPlacements:
-                                    continue
-
-                                settingPlanter = planterName.replace(" ", "_")
-                                if not macro.setdat.get(f"auto_planter_{settingPlanter}", False):
-                                    continue
-                                if not macro.setdat.get(f"auto_planter_{settingPlanter}_field_{field.replace(' ', '_')}", True):
-                                    continue
-
-                                candidates.append({
-                                    "field": field,
-                                    "nectar": fieldToNectar[field],
-                                    "planter": planterName,
-                                    "planter_obj": planterObj
-                                })
-                                addedForField += 1
-                                if addedForField >= 4:
-                                    break
-                        return candidates
-
-                    def evaluateCandidate(candidate, projectedNectarPercentages, availableFieldCounts):
-                        nectar = candidate["nectar"]
-                        priorityInfo = getPriorityInfo(nectar)
-                        projectedPercent = projectedNectarPercentages[nectar]
-                        if projectedPercent >= max(priorityInfo["min"] + 20, 110):
-                            return None
-
-                        placementPlan = calculatePlacementPlan(candidate["field"], candidate["planter_obj"], nectar, projectedPercent)
-                        if placementPlan["nectar_est_percent"] <= 0:
-                            return None
-
-                        deficitToMin = max(0.0, priorityInfo["min"] - projectedPercent)
-                        if deficitToMin > 0:
-                            needWeight = 1.0 + (deficitToMin / 18.0)
-                        elif projectedPercent < 100:
-                            needWeight = 0.45 + ((100 - projectedPercent) / 160.0)
-                        else:
-                            needWeight = max(0.05, 0.18 - ((projectedPercent - 100) / 120.0))
-
-                        score = candidate["planter_obj"]["nectar_bonus"] * candidate["planter_obj"]["grow_bonus"]
-                        score *= priorityInfo["weight"] * needWeight
-
-                        if availableFieldCounts.get(nectar, 0) > 1 and nectarLastFields.get(nectar) == candidate["field"]:
-                            score *= 0.97
-
-                        degradationHours = getFieldDegradationHours(candidate["field"])
-                        degradationPenalty = 1 / (1 + (degradationHours / 12.0))
-                        score *= degradationPenalty
-                        score *= max(0.1, candidate["planter_obj"]["grow_time"] / max(0.1, placementPlan["natural_grow_duration"] / 3600.0))
-
-                        return {
-                            "score": score,
-                            "plan": placementPlan
-                        }
-
-                    def findBestPlacements(slotsRemaining, occupiedFields, occupiedPlanters, projectedNectarPercentages):
-                        if slotsRemaining <= 0:
-                            return 0.0, []
-
-                        candidates = buildPlacementCandidates(occupiedFields, occupiedPlanters)
-                        if not candidates:
-                            return 0.0, []
-
-                        availableFieldCounts = {}
-                        for candidate in candidates:
-                            nectar = candidate["nectar"]
-                            availableFieldCounts[nectar] = availableFieldCounts.get(nectar, 0) + 1
-
-                        scoredCandidates = []
-                        for candidate in candidates:
-                            evaluation = evaluateCandidate(candidate, projectedNectarPercentages, availableFieldCounts)
-                            if evaluation and evaluation["score"] > 0:
-                                scoredCandidates.append((evaluation["score"], candidate, evaluation["plan"]))
-
-                        if not scoredCandidates:
-                            return 0.0, []
-
-                        scoredCandidates.sort(key=lambda item: item[0], reverse=True)
-                        scoredCandidates = scoredCandidates[:36]
-
-                        bestScore = 0.0
-                        bestPlacements = []
-
-                        for score, candidate, placementPlan in scoredCandidates:
-                            updatedProjected = projectedNectarPercentages.copy()
-                            updatedProjected[candidate["nectar"]] += placementPlan["nectar_est_percent"]
-
-                            futureScore, futurePlacements = findBestPlacements(
-                                slotsRemaining - 1,
-                                occupiedFields | {candidate["field"]},
-                                occupiedPlanters | {candidate["planter"]},
-                                updatedProjected
-                            )
-
-                            totalScore = score + futureScore
-                            if totalScore > bestScore:
-                                bestScore = totalScore
-                                bestPlacements = [(candidate, placementPlan)] + futurePlacements
-
-                        return bestScore, bestPlacements
+                    maxAllowedPlanters = planner.getMaxAllowedPlanters()
 
                     while True:
-                        plantersPlaced = sum(bool(planter["planter"]) for planter in planterData)
-                        if plantersPlaced >= maxAllowedPlanters:
-                            break
-
-                        openSlots = [idx for idx, planter in enumerate(planterData) if not planter["planter"]]
-                        if not openSlots:
-                            break
-
-                        projectedNectarPercentages = {
-                            nectarName: getTotalNectarPercent(nectarName)
-                            for nectarName in macroModule.nectarNames
-                        }
-                        occupiedFields = {planter["field"] for planter in planterData if planter["field"]}
-                        occupiedPlanters = {planter["planter"] for planter in planterData if planter["planter"]}
-                        _, plannedPlacements = findBestPlacements(
-                            min(len(openSlots), maxAllowedPlanters - plantersPlaced),
-                            occupiedFields,
-                            occupiedPlanters,
-                            projectedNectarPercentages
-                        )
-
-                        if not plannedPlacements:
+                        placement = planner.getNextPlacement(maxAllowedPlanters)
+                        if placement is None:
                             break
 
-                        slot = openSlots[0]
-                        candidate, placementPlan = plannedPlacements[0]
+                        slot, candidate, placementPlan = placement
                         macro.logger.webhook(
                             "",
                             f"Auto-planter chose {candidate['planter'].title()} in {candidate['field'].title()} for {candidate['nectar'].title()}",
@@ -2346,13 +1934,11 @@ def macro(status, logQueue, updateGUI, run, skipTask, presence=None, discordMess
                             allowAFB=False
                         ):
                             savePlacedPlanter(slot, candidate["field"], candidate["planter_obj"], candidate["nectar"], placementPlan)
-                            if gatherFlag:
+                            if planner.gatherFlag:
                                 runTask(macro.gather, args=(candidate["field"],), resetAfter=False)
                         else:
-                            if getattr(macro, "lastPlanterPlacementFailure", None) == "missing_inventory":
-                                blockedPlanters.add(candidate["planter"])
-                            else:
-                                blockedPlacements.add((candidate["planter"], candidate["field"]))
+                            planner.placementFailed(candidate, getattr(macro, "lastPlanterPlacementFailure", None) == "missing_inventory")
+
                     
                     executedTasks.add(taskId)
                     return True
@@ -3155,6 +2741,7 @@ if __name__ == "__main__":
     import modules.screen.screenData as screenData
     from modules.controls.keyboard import keyboard as keyboardModule
     import modules.logging.log as logModule
+    import modules.logging.logPipeline as logPipeline
     import modules.misc.appManager as appManager
     import modules.misc.settingsManager as settingsManager
     from modules.discord_bot.discordBot import discordBot
@@ -3175,17 +2762,21 @@ if __name__ == "__main__":
     #2: already running (do nothing)
     #3: already stopped (do nothing)
     #4: disconnected (rejoin)
+    #the flags live in shared memory, the manager only holds the queues and lists
+    controlBlock = ControlBlock(run=3)
     manager = multiprocessing.Manager()
-    run = manager.Value('i', 3)
+    run = controlBlock.run
     gui.setRunState(3)  # Initialize the global run state
-    recentLogs = manager.list()  # Shared list to store recent log entries for discord bot
-    gui.setRecentLogs(recentLogs)
-    updateGUI = manager.Value('i', 0)
-    skipTask = manager.Value('i', INTERRUPT_NONE)  # interrupt action for the running task
-    skipServer = manager.Value('i', 0)  # one-shot request to abandon the active private-server join
-    status = manager.Value(ctypes.c_wchar_p, "none")
-    presence = manager.Value(ctypes.c_wchar_p, "")
+    recentLogs = manager.list()  # Snapshot of the recent log entries for discord bot
+    recentLogsBuffer = logPipeline.RecentLogs(recentLogs)
+    gui.setRecentLogs(recentLogsBuffer)
+    updateGUI = controlBlock.updateGUI
+    skipTask = controlBlock.skipTask  # interrupt action for the running task
+    skipServer = controlBlock.skipServer  # one-shot request to abandon the active private-server join
+    status = controlBlock.status
+    presence = controlBlock.presence
     logQueue = manager.Queue()
+    logDrain = logPipeline.LogDrain(logQueue, recentLogsBuffer)
     discordMessageQueue = manager.Queue()
     planterCommandQueue = manager.Queue()
     streamControlQueue = manager.Queue()
@@ -3420,7 +3011,8 @@ if __name__ == "__main__":
                             try:
                                 pin_requests.put({
                                     'channel_id': webhookModule.last_channel_id,
-                                    'search_text': 'Stream URL'
+                                    'search_text': 'Stream URL',
+                                    'queued_at': time.time()
                                 })
                                 print("Pin request queued for stream URL message")
                             except Exception as e:
@@ -3787,48 +3379,10 @@ if __name__ == "__main__":
             except:
                 pass  # If eel is not ready, continue
 
-        #detect a new log message
-        if not logQueue.empty():
-            logData = logQueue.get()
-            if logData["type"] == "webhook": #webhook
-                msg = f"{logData['title']}<br>{logData['desc']}"
-
-                # Add to recent logs list (keep last 100 entries)
-                log_entry = {
-                    'time': logData['time'],
-                    'title': logData['title'],
-                    'desc': logData['desc'],
-                    'color': logData['color']
-                }
-                recentLogs.append(log_entry)
-                # Keep only the last 100 entries. Manager proxies can fail
-                # if the manager process closes; guard with fallbacks.
-                if len(recentLogs) > 100:
-                    try:
-                        # fast path: use slice operations on proxy
-                        recentLogs[:] = recentLogs[-100:]
-                    except Exception:
-                        # fallback: build a local snapshot and replace contents
-                        try:
-                            snapshot = list(recentLogs)
-                            snapshot = snapshot[-100:]
-                            # clear and extend the proxy list in-place
-                            try:
-                                del recentLogs[:]
-                                recentLogs.extend(snapshot)
-                            except Exception:
-                                # best-effort: if in-place replace fails, attempt to set by index
-                                for i, v in enumerate(snapshot):
-                                    if i < len(recentLogs):
-                                        recentLogs[i] = v
-                                    else:
-                                        recentLogs.append(v)
-                        except Exception:
-                            # give up silently to avoid crashing the main loop
-                            pass
-
-            #add it to gui
-            gui.log(logData["time"], msg, logData["color"])
+        #drain the pending log messages and add them to the gui in one call
+        logBatch = logDrain.drain()
+        if logBatch:
+            gui.logBatch(logBatch)
         
         #detect if the gui needs to be updated
         if updateGUI.value:
@@ -0,0 +1,184 @@
+"""
+Shared-memory control block for the run state the processes share.
+
+run, status, presence, skipTask, skipServer and updateGUI used to be Manager
+Values, so every .value read was a round trip to the manager process. The sleep
+helpers read them every few milliseconds. Here they live in RawArrays that the
+gui, macro and discord bot processes map directly, so a read is a memory load.
+Each field keeps the .value API and adds a sequence counter that is bumped on
+every write. Writes take one lock shared by the block, so compareAndSet and the
+string fields are atomic across processes. Queues, lists and other complex
+objects stay on the Manager.
+
+The macro process can be terminated at any point, also while it holds the lock
+or halfway through a string write. A write holds the lock for microseconds, so a
+writer that can't get it within LOCK_TIMEOUT releases it for the dead holder and
+takes it over, and a string write that finds a torn one finishes the sequence.
+Readers give up after READ_ATTEMPTS torn reads and return the last value they
+read.
+
+The block must be handed to processes as Process arguments, like the Values were.
+
+Run from the src folder to compare flag reads per second:
+    python -m modules.controls.controlBlock [--seconds 1]
+"""
+
+import ctypes
+import multiprocessing
+from contextlib import contextmanager
+
+STRING_SIZE = 4096 #bytes of utf-8, presence can hold a json payload
+LOCK_TIMEOUT = 0.5 #seconds, far longer than any write holds the lock
+READ_ATTEMPTS = 10000
+
+
+@contextmanager
+def _locked(lock):
+    '''Hold the block lock, taking it over from a process killed while holding it'''
+    #never write without the lock: if another writer takes it over first, wait for that one instead
+    while not lock.acquire(timeout=LOCK_TIMEOUT):
+        print("Control block lock held too long, releasing it")
+        try:
+            lock.release()
+        except ValueError:
+            pass #released in the meantime
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+class SharedInt:
+    '''An int in shared memory with a write sequence counter'''
+
+    def __init__(self, value=0, lock=None):
+        self._data = multiprocessing.RawArray(ctypes.c_longlong, 2) #value, seq
+        self._lock = lock or multiprocessing.Lock()
+        self._data[0] = int(value)
+
+    @property
+    def value(self):
+        return self._data[0]
+
+    @value.setter
+    def value(self, value):
+        with _locked(self._lock):
+            self._data[0] = int(value)
+            self._data[1] += 1
+
+    @property
+    def seq(self):
+        return self._data[1]
+
+    def compareAndSet(self, expected, value):
+        '''Set value only if it is still expected, returns whether it was set'''
+        with _locked(self._lock):
+            if self._data[0] != expected:
+                return False
+            self._data[0] = int(value)
+            self._data[1] += 1
+            return True
+
+
+class SharedString:
+    '''
+    A short string in shared memory. Readers don't lock: the sequence counter is odd
+    while a write is in progress, and a read that saw it change is retried.
+    '''
+
+    def __init__(self, value="", lock=None, size=STRING_SIZE):
+        self._buffer = multiprocessing.RawArray(ctypes.c_char, size)
+        self._header = multiprocessing.RawArray(ctypes.c_longlong, 2) #seq, length
+        self._lock = lock or multiprocessing.Lock()
+        self._cache = (-1, "")
+        self.value = value
+
+    @property
+    def value(self):
+        for _ in range(READ_ATTEMPTS):
+            seq = self._header[0]
+            if seq == self._cache[0]:
+                return self._cache[1]
+            if seq % 2:
+                continue #mid write
+            length = self._header[1]
+            raw = self._buffer.raw[:length]
+            if self._header[0] == seq:
+                text = raw.decode("utf-8", errors="ignore")
+                self._cache = (seq, text)
+                return text
+        #the writer died mid write, the next write repairs it
+        return self._cache[1]
+
+    @value.setter
+    def value(self, value):
+        data = str(value or "").encode("utf-8")[:len(self._buffer)]
+        with _locked(self._lock):
+            if self._header[0] % 2:
+                self._header[0] += 1 #a killed writer left the sequence odd
+            self._header[0] += 1
+            self._buffer[:len(data)] = data
+            self._header[1] = len(data)
+            self._header[0] += 1
+
+    @property
+    def seq(self):
+        return self._header[0] // 2
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cache"] = (-1, "")
+        return state
+
+
+class ControlBlock:
+    '''The fields main.py used to create on the Manager'''
+
+    def __init__(self, run=3):
+        lock = multiprocessing.Lock()
+        self.run = SharedInt(run, lock)
+        self.updateGUI = SharedInt(0, lock)
+        self.skipTask = SharedInt(0, lock)
+        self.skipServer = SharedInt(0, lock)
+        self.status = SharedString("none", lock)
+        self.presence = SharedString("", lock)
+
+
+def _readsPerSecond(read, seconds):
+    import time
+    count = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        for _ in range(100):
+            read()
+        count += 100
+    return count / seconds
+
+
+if __name__ == "__main__":
+    import argparse
+    from modules.controls import sleep
+    argParser = argparse.ArgumentParser(description="Compare Manager Value and control block reads.")
+    argParser.add_argument("--seconds", type=float, default=1)
+    args = argParser.parse_args()
+
+    manager = multiprocessing.Manager()
+    block = ControlBlock(run=2)
+    cases = [
+        ("Manager Value int", manager.Value('i', 2)),
+        ("control block int", block.run),
+        ("Manager Value str", manager.Value(ctypes.c_wchar_p, "gather_pine_tree")),
+        ("control block str", block.status),
+    ]
+    block.status.value = "gather_pine_tree"
+    for label, shared in cases:
+        rate = _readsPerSecond(lambda: shared.value, args.seconds)
+        print(f"{label}: {rate:,.0f} reads/s")
+
+    #what the chunked sleeps pay per check
+    for label, run, skipTask in [("Manager", manager.Value('i', 2), manager.Value('i', 0)), ("control block", block.run, block.skipTask)]:
+        sleep.set_run_state(run)
+        sleep.set_interrupt_action(skipTask)
+        rate = _readsPerSecond(lambda: sleep.raise_if_interrupted() or sleep.is_stopped() or sleep.is_paused(), args.seconds)
+        print(f"{label} sleep check (interrupt, stop, pause): {rate:,.0f} checks/s")
+    manager.shutdown()
@@ -1,7 +1,7 @@
 #custom sleep function with pause support
 import time
 
-# Module-level reference to the run state (multiprocessing.Value)
+# Module-level reference to the run state (a SharedInt from the control block)
 _run_state = None
 _interrupt_action = None
 _resume_callback = None
@@ -18,8 +18,9 @@ import ast
 import time
 import cv2
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Optional, Dict, Tuple
+from modules.discord_bot.queueBridge import QueueBridge
 from modules.controls.sleep import INTERRUPT_SKIP, INTERRUPT_RESET, INTERRUPT_AFB_REROLL, INTERRUPT_COLLECT_PLANTER
 
 from modules.misc import settingsManager
@@ -810,7 +811,9 @@ def _build_logger_embed(data):
         embed = discord.Embed(title="", description=f"[{formatted_time}] {desc}", color=color)
     for field in data.get("fields") or []:
         embed.add_field(name=field["name"], value=field["value"], inline=field.get("inline", False))
-    if data.get("imagePath"):
+    if data.get("imageData"):
+        embed.set_image(url=f"attachment://{data.get('imageName', 'screenshot.png')}")
+    elif data.get("imagePath"):
         embed.set_image(url="attachment://screenshot.png")
     return embed
 
@@ -825,6 +828,8 @@ def discordBot(token, run, status, skipTask, recentLogs=None, pin_requests=None,
     _discord_message_queue = discord_message_queue
     _planter_command_queue = planter_command_queue
     _stream_control_queue = stream_control_queue
+    # Threads that block on the manager queues and hand bursts to the bot loop
+    bridges = []
 
     def _parse_allowed_discord_ids(value):
         if value is None:
@@ -921,11 +926,14 @@ def discordBot(token, run, status, skipTask, recentLogs=None, pin_requests=None,
         except Exception as e:
             print(f"Failed to set Discord status: {e}")
         
-        # Start background task to process pin requests
-        if _pin_requests is not None:
-            bot.loop.create_task(process_pin_requests())
-        if _discord_message_queue is not None:
-            bot.loop.create_task(process_discord_messages())
+        # Start handing queued pin requests and logger messages to the loop
+        if not bridges:
+            if _pin_requests is not None:
+                bridges.append(QueueBridge(_pin_requests, process_pin_requests, "pin requests"))
+            if _discord_message_queue is not None:
+                bridges.append(QueueBridge(_discord_message_queue, send_logger_messages, "logger messages"))
+        for bridge in bridges:
+            bridge.start(bot.loop)
 
     @bot.event
     async def on_message(message):
@@ -992,31 +1000,69 @@ def discordBot(token, run, status, skipTask, recentLogs=None, pin_requests=None,
 
         await bot.process_commands(message)
 
-    async def process_discord_messages():
-        """Process outbound logger messages routed through the bot."""
-        while True:
-            try:
-                await discord.utils.sleep_until(datetime.now() + timedelta(seconds=1))
-                while _discord_message_queue and not _discord_message_queue.empty():
-                    try:
-                        data = _discord_message_queue.get_nowait()
-                        await send_logger_message(data)
-                    except Exception as e:
-                        print(f"Error processing Discord logger message: {e}")
-            except Exception as e:
-                print(f"Error in process_discord_messages loop: {e}")
-                await discord.utils.sleep_until(datetime.now() + timedelta(seconds=1))
+    async def send_logger_messages(batch):
+        """Send a burst of logger messages, one Discord message per channel run (up to 10 embeds)."""
+        group = []
+        for data in batch + [None]:
+            if group and (data is None or str(data.get("channel_id", "")).strip() != str(group[0].get("channel_id", "")).strip()):
+                try:
+                    if len(group) == 1:
+                        await send_logger_message(group[0])
+                    else:
+                        await send_logger_group(group)
+                except Exception as e:
+                    print(f"Error processing Discord logger message: {e}")
+                group = []
+            if data is not None:
+                group.append(data)
 
-    async def send_logger_message(data):
-        channel_id = str(data.get("channel_id", "")).strip()
+    async def _get_logger_channel(channel_id):
         if not channel_id.isdigit():
             print(f"Invalid Discord channel route: {channel_id}")
-            return
+            return None
         channel = bot.get_channel(int(channel_id))
         if not channel:
             channel = await bot.fetch_channel(int(channel_id))
         if not channel:
             print(f"Discord channel not found: {channel_id}")
+        return channel
+
+    async def send_logger_group(group):
+        channel = await _get_logger_channel(str(group[0].get("channel_id", "")).strip())
+        if not channel:
+            return
+        embeds = []
+        files = []
+        pings = []
+        for i, data in enumerate(group):
+            data = dict(data)
+            if data.get("imageData"):
+                #numbered, so the embeds of one message don't share an attachment name
+                data["imageName"] = f"{i}-{data.get('imageName', 'screenshot.png')}"
+                files.append(discord.File(io.BytesIO(data["imageData"]), filename=data["imageName"]))
+            elif data.get("imagePath") and os.path.exists(data["imagePath"]):
+                data["imageData"] = True
+                data["imageName"] = f"{i}-screenshot.png"
+                files.append(discord.File(data["imagePath"], filename=data["imageName"]))
+            else:
+                data["imagePath"] = None
+            embeds.append(_build_logger_embed(data))
+            if data.get("ping_user_id") and data["ping_user_id"] not in pings:
+                pings.append(data["ping_user_id"])
+        content = " ".join(f"<@{ping}>" for ping in pings) or None
+        try:
+            await channel.send(content=content, embeds=embeds, files=files)
+        except discord.HTTPException as e:
+            #over the combined embed or attachment size limits, send them one by one so only the offending one fails
+            print(f"Discord logger group send failed ({e}), sending {len(group)} messages separately")
+            for data in group:
+                await send_logger_message(data)
+        except Exception as e:
+            print(f"Discord logger send error: {e}")
+
+    async def send_logger_message(data):
+        channel = await _get_logger_channel(str(data.get("channel_id", "")).strip())
+        if not channel:
             return
 
         content = None
@@ -1026,33 +1072,28 @@ def discordBot(token, run, status, skipTask, recentLogs=None, pin_requests=None,
         image_path = data.get("imagePath")
         file_obj = None
         try:
-            if image_path and os.path.exists(image_path):
+            if data.get("imageData"):
+                file_obj = discord.File(io.BytesIO(data["imageData"]), filename=data.get("imageName", "screenshot.png"))
+            elif image_path and os.path.exists(image_path):
                 file_obj = discord.File(image_path, filename="screenshot.png")
             await channel.send(content=content, embed=embed, file=file_obj)
         except Exception as e:
             print(f"Discord logger send error: {e}")
     
-    async def process_pin_requests():
-        """Process pin requests from the queue"""
-        while True:
+    async def process_pin_requests(batch):
+        """Pin the requested messages, once per channel and search text in a burst"""
+        seen = set()
+        for request in batch:
+            channel_id = request.get('channel_id')
+            search_text = request.get('search_text', 'Stream URL')
+            if not channel_id or (channel_id, search_text) in seen:
+                continue
+            seen.add((channel_id, search_text))
             try:
-                await discord.utils.sleep_until(datetime.now() + timedelta(seconds=1))
-                
-                # Check if there are any pin requests
-                if _pin_requests and not _pin_requests.empty():
-                    try:
-                        request = _pin_requests.get_nowait()
-                        channel_id = request.get('channel_id')
-                        search_text = request.get('search_text', 'Stream URL')
-                        
-                        if channel_id:
-                            await pin_message_by_search(channel_id, search_text)
-                    except Exception as e:
-                        print(f"Error processing pin request: {e}")
+                await pin_message_by_search(channel_id, search_text)
             except Exception as e:
-                print(f"Error in process_pin_requests loop: {e}")
-                await discord.utils.sleep_until(datetime.now() + timedelta(seconds=1))
-    
+                print(f"Error processing pin request: {e}")
+
     async def pin_message_by_search(channel_id, search_text):
         """Pin a message in the specified channel that contains the search text"""
         try:
@@ -2706,7 +2747,13 @@ def discordBot(token, run, status, skipTask, recentLogs=None, pin_requests=None,
     @bot.tree.command(name = "ping", description = "Check if the bot is online")
     @requires_discord_permission("public_info")
     async def ping(interaction: discord.Interaction):
-        await interaction.response.send_message("Pong!")
+        message = "Pong!"
+        for bridge in bridges:
+            stats = bridge.stats()
+            if stats["delivered"]:
+                message += (f"\n{bridge.name}: {stats['delivered']} in {stats['batches']} sends, latency "
+                            f"p50 {stats['p50']*1000:.0f}ms p95 {stats['p95']*1000:.0f}ms p99 {stats['p99']*1000:.0f}ms")
+        await interaction.response.send_message(message)
     
     @bot.tree.command(name = "screenshot", description = "Send a screenshot of your screen")
     @requires_discord_permission("observation")
@@ -2792,10 +2839,10 @@ def discordBot(token, run, status, skipTask, recentLogs=None, pin_requests=None,
         if skipServer is None:
             await interaction.response.send_message("Server skipping is unavailable.", ephemeral=True)
             return
-        if skipServer.value != -1:
+        #only while the macro is joining a private server (-1), without racing it clearing the flag
+        if not skipServer.compareAndSet(-1, 1):
             await interaction.response.send_message("The macro is not currently attempting to join a private server.")
             return
-        skipServer.value = 1
         await interaction.response.send_message("Skipping the current private server. The macro will try the next backup, or a public server if none is configured.")
 
     @bot.tree.command(name = "reset", description = "Reset the character and return to hive")
@@ -2835,7 +2882,9 @@ def discordBot(token, run, status, skipTask, recentLogs=None, pin_requests=None,
     async def show_logs(interaction: discord.Interaction, count: int = 10):
         """Show recent actions from the macro log (limit by `count`)"""
         try:
-            if recentLogs is None or len(recentLogs) == 0:
+            # One copy of the snapshot the gui publishes
+            logSnapshot = list(recentLogs) if recentLogs is not None else []
+            if not logSnapshot:
                 await interaction.response.send_message("📝 No recent macro logs available.")
                 return
 
@@ -2853,7 +2902,7 @@ def discordBot(token, run, status, skipTask, recentLogs=None, pin_requests=None,
                 count = 50
 
             # Get the last `count` logs (or fewer if not available)
-            recent_actions = list(recentLogs)[-count:] if len(recentLogs) > count else list(recentLogs)
+            recent_actions = logSnapshot[-count:]
 
             log_text = ""
             for log_entry in recent_actions:
@@ -3011,8 +3060,7 @@ def discordBot(token, run, status, skipTask, recentLogs=None, pin_requests=None,
             bd = BuffDetector(robloxWindow)
 
             # Get current nectar values
-            import modules.macro as macroModule
-            nectar_names = getattr(macroModule, 'nectarNames', ["comforting","refreshing","satisfying","motivating","invigorating"])
+            from modules.submacros.autoPlanters import nectarNames as nectar_names
             current_vals = {}
             for n in nectar_names:
                 try:
@@ -3053,7 +3101,7 @@ def discordBot(token, run, status, skipTask, recentLogs=None, pin_requests=None,
                         pass
                     bd = BuffDetector(robloxWindow)
 
-                    nectar_names = getattr(__import__("modules.macro", fromlist=["nectarNames"]), 'nectarNames', ["comforting","refreshing","satisfying","motivating","invigorating"])
+                    from modules.submacros.autoPlanters import nectarNames as nectar_names
                     lines = []
                     for i, n in enumerate(nectar_names):
                         try:
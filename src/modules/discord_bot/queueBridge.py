@@ -0,0 +1,110 @@
+"""
+Bridge from a multiprocessing (Manager) queue to the bot's asyncio loop.
+
+A daemon thread blocks on the queue, so an item reaches the loop as soon as it
+is put instead of on the next poll, and an idle queue costs no proxy calls.
+Whatever piled up behind the first item is handed over as one batch with
+call_soon_threadsafe, so a burst can be sent with one Discord call. At most
+maxPending batches wait on the loop: while Discord is slow (rate limits) the
+thread stops pulling and the backlog stays in the Manager queue.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+
+MAX_BATCH = 10 #a discord message holds up to 10 embeds
+
+
+class QueueBridge:
+    def __init__(self, source, handler, name="queue", maxBatch=MAX_BATCH, maxPending=4):
+        '''
+        source: the queue to read, anything with get(timeout=) and get_nowait()
+        handler: coroutine function called on the loop with a list of items
+        '''
+        self.source = source
+        self.handler = handler
+        self.name = name
+        self.maxBatch = maxBatch
+        self.pending = threading.BoundedSemaphore(maxPending)
+        self.latencies = deque(maxlen=500)
+        self.delivered = 0
+        self.batches = 0
+        self.loop = None
+        self.inbox = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self, loop=None):
+        '''Start reading on a thread, handing batches to loop (the running loop by default)'''
+        if self.thread is not None:
+            return self
+        self.loop = loop or asyncio.get_running_loop()
+        self.inbox = asyncio.Queue()
+        #one consumer, so batches are sent in the order they were queued
+        self.loop.create_task(self._consume())
+        self.thread = threading.Thread(target=self._read, name=f"{self.name}-bridge", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def _read(self):
+        while not self.stopped.is_set():
+            try:
+                item = self.source.get(timeout=1)
+            except queue.Empty:
+                continue
+            except Exception as e:
+                #the manager went away with the gui
+                print(f"Discord {self.name} bridge stopped: {e}")
+                return
+            batch = [(item, time.time())]
+            while len(batch) < self.maxBatch:
+                try:
+                    batch.append((self.source.get_nowait(), time.time()))
+                except Exception:
+                    break
+            #backpressure: wait for the loop to catch up before pulling more
+            self.pending.acquire()
+            try:
+                self.loop.call_soon_threadsafe(self.inbox.put_nowait, batch)
+            except RuntimeError:
+                #loop closed
+                return
+
+    async def _consume(self):
+        while not self.stopped.is_set():
+            batch = await self.inbox.get()
+            await self._handle(batch)
+
+    async def _handle(self, batch):
+        try:
+            await self.handler([item for item, _ in batch])
+        except Exception as e:
+            print(f"Error processing Discord {self.name}: {e}")
+        finally:
+            self.pending.release()
+        now = time.time()
+        for item, receivedAt in batch:
+            #queued_at is stamped by the sender, otherwise count from when the bridge got it
+            queuedAt = item.get("queued_at", receivedAt) if isinstance(item, dict) else receivedAt
+            self.latencies.append(now - queuedAt)
+        self.delivered += len(batch)
+        self.batches += 1
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else 0.0
+        return {
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+        }
@@ -1,6 +1,4 @@
 import time as timeModule
-import threading
-import queue
 from modules.screen.screenshot import mssScreenshot
 import modules.logging.webhook as logWebhook
 import mss
@@ -234,28 +232,8 @@ def resolve_bot_route(route_settings, category, legacy_route=""):
     return "", category, None
 
 
-class webhookQueue:
-    def __init__(self):
-        self.queue = queue.Queue()
-        self.worker_thread = threading.Thread(target=self._process_queue, daemon=True)
-        self.worker_thread.start()
-
-    def _process_queue(self):
-        while True:
-            # Wait for a message from the queue
-            data = self.queue.get()
-            if data is None:
-                print("Webhook queue stopped.")
-                break
-            # Send the webhook
-            logWebhook.webhook(**data)
-            self.queue.task_done()
-
-    def add_to_queue(self, data):
-        self.queue.put(data)
-
 class log:
-    def __init__(self, logQueue, enableWebhook, webhookURL, sendScreenshots, hourlyReportOnly=False, blocking=False, robloxWindow: RobloxWindowBounds = None, enableDiscordPing=False, discordUserID=None, pingSettings=None, webhookTimeFormat=24, enableDiscordBot=False, discordMessageQueue=None, routeSettings=None):
+    def __init__(self, logQueue, enableWebhook, webhookURL, sendScreenshots, hourlyReportOnly=False, blocking=False, robloxWindow: RobloxWindowBounds = None, enableDiscordPing=False, discordUserID=None, pingSettings=None, webhookTimeFormat=24, enableDiscordBot=False, discordMessageQueue=None, routeSettings=None, imageFormat="jpeg", imageMaxDimension=1280):
         self.logQueue = logQueue
         self.webhookURL = webhookURL
         self.enableWebhook = enableWebhook
@@ -270,9 +248,12 @@ class log:
         self.discordUserID = discordUserID
         self.pingSettings = pingSettings or {}
         self.webhookTimeFormat = webhookTimeFormat
+        self.imageFormat = imageFormat
+        self.imageMaxDimension = imageMaxDimension
+        self.lastAttachment = None
 
         if not self.blocking:
-            self.webhookQueue = webhookQueue()
+            self.webhookQueue = logWebhook.WebhookDelivery()
 
     def log(self, msg):
         # Display in GUI or macro logs (to be implemented)
@@ -286,6 +267,7 @@ class log:
         self.enableDiscordBot = delivery_uses_bot_messages(settings)
 
     def _capture_image(self, ss=None, imagePath=None):
+        '''The image of a message: imagePath as given, or a new in-memory ImageAttachment of the `ss` region'''
         if not self.sendScreenshots:
             return None
         if imagePath:
@@ -293,7 +275,6 @@ class log:
         if not ss:
             return None
 
-        webhookImgPath = "webhookScreenshot.png"
         if self.robloxWindow:
             robloxWindow = self.robloxWindow
         else:
@@ -313,11 +294,18 @@ class log:
 
         for _ in range(2):
             try:
-                mssScreenshot(*screenshotRegions[ss], save=True, filename=webhookImgPath)
-                return webhookImgPath
+                image = mssScreenshot(*screenshotRegions[ss])
+                break
             except mss.exception.ScreenShotError:
                 timeModule.sleep(0.5)
-        return None
+        else:
+            return None
+        attachment = logWebhook.ImageAttachment(image, self.imageFormat, self.imageMaxDimension)
+        #the screen hasn't changed since the last capture, reuse its encoded image
+        if self.lastAttachment is not None and self.lastAttachment.signature == attachment.signature:
+            return self.lastAttachment
+        self.lastAttachment = attachment.encodeAsync()
+        return attachment
 
     def _ping_user_id(self, route_category, ping_category=None):
         ping_key = ping_category
@@ -329,7 +317,7 @@ class log:
             return self.discordUserID
         return None
 
-    def _send_discord_bot(self, channel_id, title, desc, time, color, imagePath=None, ping_user_id=None, time_format=None, fields=None):
+    def _send_discord_bot(self, channel_id, title, desc, time, color, imageData=None, ping_user_id=None, time_format=None, fields=None):
         if not self.enableDiscordBot or not self.discordMessageQueue:
             return None
         data = {
@@ -338,15 +326,22 @@ class log:
             "desc": desc,
             "time": time,
             "color": color,
-            "imagePath": imagePath,
+            "imageData": imageData,
+            "imageName": imageData.filename if isinstance(imageData, logWebhook.ImageAttachment) else "screenshot.png",
             "ping_user_id": ping_user_id,
             "time_format": time_format if time_format is not None else self.webhookTimeFormat,
             "fields": fields,
+            "queued_at": timeModule.time(),
         }
-        try:
-            self.discordMessageQueue.put(data)
-        except Exception as e:
-            print(f"Discord bot queue error: {e}")
+
+        def put():
+            try:
+                data["imageData"] = logWebhook.image_bytes(data["imageData"])
+                self.discordMessageQueue.put(data)
+            except Exception as e:
+                print(f"Discord bot queue error: {e}")
+        #through the encoder thread, behind the screenshot's encode, so messages stay in order
+        logWebhook.get_encoder().submit(put)
         return None
 
     def _deliver(self, title, desc, color, imagePath=None, ping_category=None, route_category=None, time_format=None, allow_hourly_only_filter=True, fields=None):
@@ -366,6 +361,8 @@ class log:
             if not route:
                 route, resolved_category, resolved_type = resolve_webhook_route(self.routeSettings, category, self.webhookURL)
         ping_user_id = self._ping_user_id(resolved_category, ping_category)
+        #read files now, they may be overwritten before the queued message is sent
+        imageData = imagePath if isinstance(imagePath, logWebhook.ImageAttachment) else logWebhook.read_image(imagePath)
         time_format = time_format if time_format is not None else self.webhookTimeFormat
 
         if not route:
@@ -380,7 +377,7 @@ class log:
                 "desc": desc,
                 "time": time,
                 "color": colors[color],
-                "imagePath": imagePath,
+                "imageData": imageData,
                 "ping_user_id": ping_user_id,
                 "time_format": time_format,
                 "fields": fields,
@@ -391,7 +388,7 @@ class log:
                 self.webhookQueue.add_to_queue(webhookData)
             return
         if resolved_type == "bot":
-            self._send_discord_bot(route, title, desc, time, colors[color], imagePath, ping_user_id, time_format, fields)
+            self._send_discord_bot(route, title, desc, time, colors[color], imageData, ping_user_id, time_format, fields)
             return
         print(f"Warning: Invalid Discord route '{route}'. Expected https:// webhook or numeric channel ID.")
 
@@ -403,7 +400,8 @@ class log:
             "time": time,
             "title": title,
             "desc": desc,
-            "color": colors[color]
+            "color": colors[color],
+            "queued_at": timeModule.time() #wall clock, it is read in the gui process
         }
         self.logQueue.put(logData)
 
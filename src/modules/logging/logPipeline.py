@@ -0,0 +1,123 @@
+"""
+GUI side of the macro log pipeline.
+
+The macro process puts log entries on a Manager queue. The GUI loop drains
+everything pending each tick (up to a budget), keeps the last entries in a
+process-local ring buffer and pushes the batch to the frontend in one call. The
+discord bot reads a snapshot of the ring buffer that is published to a Manager
+list with a single proxy call, only on ticks where something changed.
+"""
+
+import queue
+import time
+from collections import deque
+
+RECENT_LOGS_SIZE = 100
+DRAIN_BUDGET = 200 #entries per tick, so a flood can't stall the gui loop
+REPORT_INTERVAL = 600 #seconds between pipeline stat lines
+LAG_WARNING = 5 #seconds of end-to-end latency worth reporting early
+LAG_REPORT_INTERVAL = 30
+
+
+class RecentLogs:
+    '''The last log entries, kept locally, with a snapshot shared to other processes'''
+
+    def __init__(self, shared=None, size=RECENT_LOGS_SIZE):
+        self.entries = deque(maxlen=size)
+        self.shared = shared
+        self.dirty = False
+
+    def extend(self, entries):
+        if entries:
+            self.entries.extend(entries)
+            self.dirty = True
+
+    def clear(self):
+        self.entries.clear()
+        self.dirty = True
+        self.publish()
+
+    def publish(self):
+        if not self.dirty or self.shared is None:
+            return
+        try:
+            self.shared[:] = list(self.entries) #one round trip to the manager
+            self.dirty = False
+        except Exception:
+            #the manager may be shutting down, try again next tick
+            pass
+
+    def __iter__(self):
+        return iter(list(self.entries))
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class LogDrain:
+    '''Drains the macro's log queue in batches and measures queue depth and latency'''
+
+    def __init__(self, logQueue, recentLogs, budget=DRAIN_BUDGET):
+        self.logQueue = logQueue
+        self.recentLogs = recentLogs
+        self.budget = budget
+        self.lastReport = time.time()
+        self._resetStats()
+
+    def _resetStats(self):
+        self.drained = 0
+        self.ticks = 0
+        self.maxDepth = 0
+        self.latencies = []
+
+    def drain(self):
+        '''Returns the pending entries as (time, msg, color) for the gui'''
+        guiEntries = []
+        logEntries = []
+        now = time.time()
+        for _ in range(self.budget):
+            try:
+                logData = self.logQueue.get_nowait()
+            except queue.Empty:
+                break
+            except Exception:
+                #manager gone
+                break
+            if logData.get("type") != "webhook":
+                continue
+            if "queued_at" in logData:
+                self.latencies.append(now - logData["queued_at"])
+            logEntries.append({
+                'time': logData['time'],
+                'title': logData['title'],
+                'desc': logData['desc'],
+                'color': logData['color']
+            })
+            guiEntries.append((logData["time"], f"{logData['title']}<br>{logData['desc']}", logData["color"]))
+
+        if len(guiEntries) == self.budget:
+            #only ask for the depth when we couldn't keep up, qsize is another round trip
+            try:
+                self.maxDepth = max(self.maxDepth, self.logQueue.qsize())
+            except Exception:
+                pass
+        self.ticks += 1
+        self.drained += len(logEntries)
+        self.recentLogs.extend(logEntries)
+        self.recentLogs.publish()
+        self._report(now)
+        return guiEntries
+
+    def _report(self, now):
+        lagging = self.latencies and max(self.latencies) > LAG_WARNING
+        interval = LAG_REPORT_INTERVAL if lagging else REPORT_INTERVAL
+        if now - self.lastReport < interval:
+            return
+        if self.drained:
+            latencies = sorted(self.latencies)
+            p50 = latencies[len(latencies) // 2] if latencies else 0
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0
+            print(f"Log pipeline: {self.drained} entries over {self.ticks} ticks, backlog up to {self.maxDepth}, "
+                  f"latency p50 {p50*1000:.0f}ms p95 {p95*1000:.0f}ms")
+        self.lastReport = now
+        self._resetStats()
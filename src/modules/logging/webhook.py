@@ -1,68 +1,344 @@
-from discord_webhook import DiscordEmbed, DiscordWebhook
-from requests.exceptions import SSLError, ConnectionError
+import io
+import json
+import queue
+import threading
+import time as timeModule
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
 from modules.misc.settingsManager import getMacroVersion
 
 # Global variable to store message ID for pinning
 last_message_id = None
 last_channel_id = None
 
+MAX_EMBEDS = 10 #discord's limit per message
+MAX_EMBED_CHARS = 6000 #discord's limit for all embeds of a message
+MAX_BATCH_FILE_BYTES = 8 * 1024 * 1024 #stay under the smallest attachment limit
+MAX_RETRIES = 5
+
+_NO_PENDING = object() #None is the stop sentinel, so it can be held over like any message
+
+_session = None
+_sessionLock = threading.Lock()
+_encoder = None
+
 
 def response_footer():
     return f"Fuzzy Macro - Version {getMacroVersion()}"
 
-def webhook(url, title, desc, time, color, imagePath = None, ping_user_id = None, time_format=24, fields = None):
-    global last_message_id, last_channel_id
+def get_session():
+    #one keep-alive session for every webhook, so bursts reuse the connection
+    global _session
+    with _sessionLock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
 
-    # Check if URL is provided
-    if not url or not url.strip():
-        print(f"Warning: Webhook URL is empty. Skipping webhook message: {title} {desc}")
-        return None
+def get_encoder():
+    #a single thread, so encodes (and anything queued behind them) run in order off the macro thread
+    global _encoder
+    with _sessionLock:
+        if _encoder is None:
+            _encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="webhook-encode")
+        return _encoder
+
+
+class ImageAttachment:
+    '''
+    A screenshot kept in memory for one message and encoded once, in the encoder thread,
+    to a JPEG/WebP no larger than maxDimension on its longest side and roughly maxBytes.
+    '''
+    FORMATS = {"jpeg": ("JPEG", "jpg"), "webp": ("WEBP", "webp"), "png": ("PNG", "png")}
+
+    def __init__(self, image, format="jpeg", maxDimension=1280, quality=80, maxBytes=1024*1024):
+        self.image = image
+        self.format = format if format in self.FORMATS else "jpeg"
+        self.maxDimension = maxDimension
+        self.quality = quality
+        self.maxBytes = maxBytes
+        #identical consecutive captures share one attachment
+        self.signature = (image.size, zlib.crc32(image.tobytes()))
+        self.filename = f"screenshot.{self.FORMATS[self.format][1]}"
+        self.encodeTime = 0
+        self._data = None
+        self._lock = threading.Lock()
+
+    def encodeAsync(self):
+        get_encoder().submit(self.data)
+        return self
 
-    webhook = DiscordWebhook(url = url,rate_limit_retry=True)
+    def data(self):
+        with self._lock:
+            if self._data is None:
+                start = timeModule.perf_counter()
+                image = self.image
+                if self.maxDimension and max(image.size) > self.maxDimension:
+                    image = image.copy()
+                    image.thumbnail((self.maxDimension, self.maxDimension))
+                if self.format != "png":
+                    image = image.convert("RGB")
+                pillowFormat = self.FORMATS[self.format][0]
+                quality = self.quality
+                while True:
+                    out = io.BytesIO()
+                    if pillowFormat == "PNG":
+                        image.save(out, pillowFormat, optimize=True)
+                    else:
+                        image.save(out, pillowFormat, quality=quality)
+                    if pillowFormat == "PNG" or out.tell() <= self.maxBytes or quality <= 40:
+                        break
+                    quality -= 15
+                self._data = out.getvalue()
+                self.image = None #only the encoded bytes are kept
+                self.encodeTime = timeModule.perf_counter() - start
+            return self._data
 
-    # Add ping if user ID is provided
-    if ping_user_id:
-        webhook.content = f"<@{ping_user_id}>"
 
-    # Format time based on preference
+def image_bytes(imageData):
+    if isinstance(imageData, ImageAttachment):
+        return imageData.data()
+    return imageData
+
+def read_image(imagePath):
+    if not imagePath:
+        return None
+    try:
+        with open(imagePath, "rb") as f:
+            return f.read()
+    except OSError as e:
+        print(f"Webhook Error: could not read {imagePath}: {e}")
+        return None
+
+def format_time(time, time_format=24):
     if time_format == 12:
         try:
             # Parse the time string and convert to 12-hour format
             from datetime import datetime
             time_obj = datetime.strptime(time, "%H:%M:%S")
-            formatted_time = time_obj.strftime("%I:%M:%S %p")
+            return time_obj.strftime("%I:%M:%S %p")
         except:
-            formatted_time = time  # fallback to original if parsing fails
-    else:
-        formatted_time = time
+            return time  # fallback to original if parsing fails
+    return time
 
+def build_embed(title, desc, time, color, time_format=24, fields=None):
+    formatted_time = format_time(time, time_format)
     if title:
-        embed = DiscordEmbed(title="[{}] {}".format(formatted_time,title), description=desc, color=color)
+        embed = {"title": "[{}] {}".format(formatted_time, title), "description": desc}
     else:
-        embed = DiscordEmbed(title="", description="[{}] {}".format(formatted_time,desc), color=color)
-    embed.set_footer(text=response_footer())
+        embed = {"description": "[{}] {}".format(formatted_time, desc)}
+    embed["color"] = int(color, 16) if isinstance(color, str) else color
+    embed["footer"] = {"text": response_footer()}
 
     # Add embed fields (for hourly/session report text summaries)
     if fields:
-        for f in fields:
-            embed.add_embed_field(name=f["name"], value=f["value"], inline=f.get("inline", False))
+        embed["fields"] = [{"name": f["name"], "value": f["value"], "inline": f.get("inline", False)} for f in fields]
+    return embed
 
-    #if to add image
-    if imagePath:
-        with open(imagePath, "rb") as f:
-            webhook.add_file(file=f.read(), filename= "screenshot.png")
-        f.close()
-        embed.set_image(url='attachment://screenshot.png')
-    # add embed object to webhook
-    webhook.add_embed(embed)
-    try:
-        response = webhook.execute()
+def _message_chars(message):
+    return _embed_chars(build_embed(message["title"], message["desc"], message["time"], message["color"], message.get("time_format", 24), message.get("fields")))
+
+def _embed_chars(embed):
+    chars = len(embed.get("title") or "") + len(embed.get("description") or "") + len(embed["footer"]["text"])
+    for field in embed.get("fields", []):
+        chars += len(str(field["name"])) + len(str(field["value"]))
+    return chars
+
+
+class RateLimiter:
+    '''Per webhook pacing from discord's X-RateLimit headers'''
+
+    def __init__(self):
+        self.resumeAt = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        with self.lock:
+            resumeAt = self.resumeAt.get(url, 0)
+        delay = resumeAt - timeModule.monotonic()
+        if delay > 0:
+            timeModule.sleep(delay)
+
+    def update(self, url, response):
+        headers = response.headers
+        delay = 0
+        if response.status_code == 429:
+            try:
+                delay = float(response.json().get("retry_after", 1))
+            except Exception:
+                delay = float(headers.get("Retry-After", 1) or 1)
+        elif headers.get("X-RateLimit-Remaining") == "0":
+            delay = float(headers.get("X-RateLimit-Reset-After", 0) or 0)
+        if delay > 0:
+            with self.lock:
+                self.resumeAt[url] = max(self.resumeAt.get(url, 0), timeModule.monotonic() + delay)
+        return delay
+
+rateLimiter = RateLimiter()
+
+
+def send_messages(url, messages, session=None, stats=None):
+    '''
+    Send one or more messages to a webhook as a single post, one embed each.
+    messages: dicts with the webhook() arguments, imageData holding image bytes or an ImageAttachment
+    '''
+    global last_message_id, last_channel_id
+    session = session or get_session()
+    embeds = []
+    files = {}
+    attached = {} #the same screenshot in several messages of a batch is uploaded once
+    pings = []
+    for i, message in enumerate(messages):
+        embed = build_embed(message["title"], message["desc"], message["time"], message["color"], message.get("time_format", 24), message.get("fields"))
+        imageData = message.get("imageData")
+        if imageData is None and message.get("imagePath"):
+            imageData = read_image(message["imagePath"])
+        if isinstance(imageData, ImageAttachment) and imageData.signature in attached:
+            embed["image"] = {"url": f"attachment://{attached[imageData.signature]}"}
+        elif imageData:
+            filename = imageData.filename if isinstance(imageData, ImageAttachment) else "screenshot.png"
+            if len(messages) > 1:
+                filename = f"{i}-{filename}"
+            if isinstance(imageData, ImageAttachment):
+                attached[imageData.signature] = filename
+            data = image_bytes(imageData)
+            files[f"files[{len(files)}]"] = (filename, data)
+            if stats is not None:
+                stats["imageBytes"] += len(data)
+            embed["image"] = {"url": f"attachment://{filename}"}
+        embeds.append(embed)
+        ping = message.get("ping_user_id")
+        if ping and ping not in pings:
+            pings.append(ping)
+
+    payload = {"embeds": embeds}
+    if pings:
+        payload["content"] = " ".join(f"<@{ping}>" for ping in pings)
+
+    for _ in range(MAX_RETRIES):
+        rateLimiter.wait(url)
+        try:
+            if files:
+                response = session.post(url, params={"wait": "true"}, data={"payload_json": json.dumps(payload)}, files=files, timeout=30)
+            else:
+                response = session.post(url, params={"wait": "true"}, json=payload, timeout=30)
+        except Exception as e:
+            print(f"Webhook Error: {e}")
+            return None
+        if stats is not None:
+            stats["requests"] += 1
+        rateLimiter.update(url, response)
+        if response.status_code == 429:
+            if stats is not None:
+                stats["rateLimited"] += 1
+            continue
+        if response.status_code >= 400:
+            print(f"Webhook Error: {response.status_code} {response.text[:200]}")
+            if len(messages) > 1 and response.status_code < 500:
+                #one bad message shouldn't drop the rest of the batch, only the ones that still fail alone
+                print(f"Webhook: resending the {len(messages)} batched messages one at a time")
+                for message in messages:
+                    response = send_messages(url, [message], session, stats)
+            return response
         # Store message ID and channel ID for potential pinning
-        if response and hasattr(response, 'json'):
+        try:
             response_data = response.json()
             last_message_id = response_data.get('id')
             last_channel_id = response_data.get('channel_id')
+        except ValueError:
+            pass
         return response
-    except Exception as e:
-        print(f"Webhook Error: {e}")
+    print(f"Webhook Error: still rate limited after {MAX_RETRIES} tries, dropping {len(messages)} message(s)")
+    return None
+
+def webhook(url, title, desc, time, color, imagePath = None, ping_user_id = None, time_format=24, fields = None, imageData = None):
+    # Check if URL is provided
+    if not url or not url.strip():
+        print(f"Warning: Webhook URL is empty. Skipping webhook message: {title} {desc}")
         return None
+    return send_messages(url, [{
+        "title": title,
+        "desc": desc,
+        "time": time,
+        "color": color,
+        "imagePath": imagePath,
+        "imageData": imageData,
+        "ping_user_id": ping_user_id,
+        "time_format": time_format,
+        "fields": fields,
+    }])
+
+
+class WebhookDelivery:
+    '''
+    Background webhook sender. Messages queued while a post is in flight are sent
+    together, up to MAX_EMBEDS per post, as long as they go to the same webhook.
+    '''
+
+    def __init__(self, session=None):
+        self.queue = queue.Queue()
+        self.session = session
+        self.stats = {"messages": 0, "requests": 0, "rateLimited": 0, "imageBytes": 0}
+        self.latencies = deque(maxlen=1000)
+        self.worker_thread = threading.Thread(target=self._process_queue, daemon=True)
+        self.worker_thread.start()
+
+    def add_to_queue(self, data):
+        data = dict(data)
+        data["queued_at"] = timeModule.perf_counter()
+        self.queue.put(data)
+
+    def stop(self):
+        self.queue.put(None)
+
+    def _fits(self, batch, message, chars, fileBytes):
+        if len(batch) >= MAX_EMBEDS or message["url"] != batch[0]["url"]:
+            return False
+        if chars + _message_chars(message) > MAX_EMBED_CHARS:
+            return False
+        return fileBytes + len(image_bytes(message.get("imageData")) or b"") <= MAX_BATCH_FILE_BYTES
+
+    def _process_queue(self):
+        pending = _NO_PENDING
+        while True:
+            # Wait for a message from the queue
+            data = pending if pending is not _NO_PENDING else self.queue.get()
+            pending = _NO_PENDING
+            if data is None:
+                self.queue.task_done()
+                print("Webhook queue stopped.")
+                break
+            if not data.get("url", "").strip():
+                print(f"Warning: Webhook URL is empty. Skipping webhook message: {data.get('title')} {data.get('desc')}")
+                self.queue.task_done()
+                continue
+
+            #coalesce whatever piled up behind it
+            batch = [data]
+            chars = _message_chars(data)
+            fileBytes = len(image_bytes(data.get("imageData")) or b"")
+            while len(batch) < MAX_EMBEDS:
+                try:
+                    nextData = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nextData is None or not self._fits(batch, nextData, chars, fileBytes):
+                    pending = nextData
+                    break
+                chars += _message_chars(nextData)
+                fileBytes += len(image_bytes(nextData.get("imageData")) or b"")
+                batch.append(nextData)
+
+            try:
+                send_messages(batch[0]["url"], batch, self.session, self.stats)
+            except Exception as e:
+                print(f"Webhook Error: {e}")
+            sentAt = timeModule.perf_counter()
+            for message in batch:
+                self.latencies.append(sentAt - message.get("queued_at", sentAt))
+                self.queue.task_done()
+            self.stats["messages"] += len(batch)
@@ -0,0 +1,156 @@
+"""
+Webhook delivery benchmark against a local stand-in for Discord.
+
+The stand-in accepts webhook posts, answers after a fixed delay and enforces a
+per webhook bucket the way Discord does (X-RateLimit headers, 429 with
+retry_after when it is exceeded). A burst of log messages, some with images, is
+sent once the old way (a fresh connection and one post per message, retrying on
+429) and once through WebhookDelivery, and the throughput, number of posts and
+queue-to-sent latency percentiles are printed.
+
+Run from the src folder:
+    python -m modules.logging.webhookBenchmark [--messages 60] [--images 10]
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+import modules.logging.webhook as logWebhook
+
+
+class StandInDiscord(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" #keep-alive, like discord
+    bucketSize = 5
+    bucketWindow = 2.0
+    responseDelay = 0.03
+    lock = threading.Lock()
+    buckets = {}
+    posts = 0
+    embeds = 0
+    rejected = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.responseDelay)
+        cls = StandInDiscord
+        now = time.monotonic()
+        with cls.lock:
+            windowStart, used = cls.buckets.get(self.path.split("?")[0], (now, 0))
+            if now - windowStart >= cls.bucketWindow:
+                windowStart, used = now, 0
+            resetAfter = max(0.0, cls.bucketWindow - (now - windowStart))
+            if used >= cls.bucketSize:
+                cls.rejected += 1
+                self._reply(429, {"message": "You are being rate limited.", "retry_after": round(resetAfter, 3), "global": False},
+                            {"Retry-After": str(resetAfter), "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": f"{resetAfter:.3f}"})
+                return
+            used += 1
+            cls.buckets[self.path.split("?")[0]] = (windowStart, used)
+            cls.posts += 1
+            cls.embeds += max(1, body.count(b'"footer"'))
+            messageId = cls.posts
+        self._reply(200, {"id": str(messageId), "channel_id": "1"},
+                    {"X-RateLimit-Limit": str(cls.bucketSize), "X-RateLimit-Remaining": str(cls.bucketSize - used),
+                     "X-RateLimit-Reset-After": f"{resetAfter:.3f}"})
+
+    def _reply(self, status, data, headers):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.buckets = {}
+            cls.posts = cls.embeds = cls.rejected = 0
+
+
+def burst(count, images, url):
+    image = bytes(200 * 1024) #about the size of a compressed window screenshot
+    messages = []
+    for i in range(count):
+        messages.append({
+            "url": url,
+            "title": "",
+            "desc": f"Burst message {i}",
+            "time": time.strftime("%H:%M:%S"),
+            "color": "FFFFFF",
+            "imageData": image if i % max(1, count // max(1, images)) == 0 and images else None,
+            "ping_user_id": None,
+            "time_format": 24,
+            "fields": None,
+        })
+    return messages
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def sequential(messages):
+    '''The old delivery: one worker, a new connection and one post per message, retrying on 429'''
+    latencies = []
+    start = time.perf_counter()
+    for message in messages:
+        embed = logWebhook.build_embed(message["title"], message["desc"], message["time"], message["color"])
+        payload = {"embeds": [embed]}
+        for _ in range(logWebhook.MAX_RETRIES):
+            if message["imageData"]:
+                response = requests.post(message["url"], data={"payload_json": json.dumps(payload)}, files={"file": ("screenshot.png", message["imageData"])})
+            else:
+                response = requests.post(message["url"], json=payload)
+            if response.status_code != 429:
+                break
+            time.sleep(float(response.json().get("retry_after", 1)))
+        latencies.append(time.perf_counter() - start)
+    return time.perf_counter() - start, latencies
+
+
+def pooled(messages):
+    delivery = logWebhook.WebhookDelivery()
+    start = time.perf_counter()
+    for message in messages:
+        delivery.add_to_queue(message)
+    delivery.queue.join()
+    elapsed = time.perf_counter() - start
+    delivery.stop()
+    return elapsed, list(delivery.latencies)
+
+
+def report(label, count, elapsed, latencies):
+    print(f"{label}: {count/elapsed:.1f} msg/s, {StandInDiscord.posts} posts, {StandInDiscord.rejected} rate limited, "
+          f"latency p50 {percentile(latencies, 0.5)*1000:.0f}ms p95 {percentile(latencies, 0.95)*1000:.0f}ms "
+          f"p99 {percentile(latencies, 0.99)*1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    import argparse
+    argParser = argparse.ArgumentParser(description="Benchmark webhook delivery against a local stand-in server.")
+    argParser.add_argument("--messages", type=int, default=60)
+    argParser.add_argument("--images", type=int, default=10, help="how many of the messages carry a screenshot")
+    args = argParser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInDiscord)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/webhooks/1/token"
+
+    StandInDiscord.reset()
+    elapsed, latencies = sequential(burst(args.messages, args.images, url))
+    report("one post per message", args.messages, elapsed, latencies)
+
+    time.sleep(StandInDiscord.bucketWindow)
+    StandInDiscord.reset()
+    elapsed, latencies = pooled(burst(args.messages, args.images, url))
+    report("pooled and batched  ", args.messages, elapsed, latencies)
+    server.shutdown()
@@ -31,11 +31,13 @@ import numpy as np
 import threading
 from modules.submacros.backpack import bpc
 from modules.screen.imageSearch import *
+from modules.screen.scrollStitch import ScrollStitcher, StitchedScan
 from pynput.keyboard import Controller
 import cv2
 from modules.screen.color_check import get_sample_colors, percent_pixels_similar_to_color
 from datetime import timedelta, datetime, timezone
 from modules.misc.imageManipulation import *
+from modules.misc.questIndex import loadQuestData, QuestIndex
 from PIL import Image
 from modules.misc import messageBox
 from modules.submacros.memoryMatch import MemoryMatch
@@ -44,11 +46,10 @@ import re
 import ast
 from modules.submacros.hourlyReport import BUFF_RENDER_CONFIG, HourlyReport, BuffDetector
 from modules.submacros.itemMonitor import ItemMonitor
+from modules.submacros.inventoryMap import InventoryMap
 from modules.submacros.tadAltSync import TadAltSync
 from modules.submacros.liveGatherReport import LiveGatherReport, LiveQuestProgressReport
 from difflib import SequenceMatcher
-import fuzzywuzzy.process
-import fuzzywuzzy
 import traceback
 import pygetwindow as gw
 from modules.submacros.hasteCompensation import HasteCompensationRevamped
@@ -474,46 +475,13 @@ cyrillicToLatin = {
     'х': 'x'
 }
 
-#Load quest data from quest_data.txt
-quest_data = {}
-quest_bear = ""
-quest_title = ""
-quest_info = []
-
-with open("./data/bss/quest_data.txt", "r") as f:
-    qdata = [x for x in f.read().split("\n") if x]
-
-for line in qdata:
-    if line.startswith("==") and line.endswith("=="): #bear
-        if quest_title:
-            quest_data[quest_bear][quest_title] = quest_info  
-        quest_bear = line.strip("=")
-        quest_data[quest_bear] = {}
-        quest_title, quest_info = "", []
-    
-    elif line.startswith("-"): #new quest title
-        if quest_title:  
-            quest_data[quest_bear][quest_title] = quest_info
-        quest_title = line.lstrip("-").strip()
-        quest_info = []
-    
-    else:  #quest objectives
-        quest_info.append(line)
-quest_data[quest_bear][quest_title] = quest_info 
-
-#planter-related info
-nectarNames=["comforting", "refreshing", "satisfying", "motivating", "invigorating"]
-nectarFields = {
-  "comforting": ["dandelion", "bamboo", "pine tree"],
-  "refreshing": ["coconut", "strawberry", "blue flower"],
-  "satisfying": ["pineapple", "sunflower", "pumpkin"],
-  "motivating": ["stump", "spider", "mushroom", "rose"],
-  "invigorating": ["pepper", "mountain top", "clover", "cactus"]
-}
-allPlanters = ["paper", "ticket", "festive", "sticker", "plastic", "candy", "red_clay", "blue_clay", "tacky", "pesticide", "heat-treated", "hydroponic", "petal", "planter_of_plenty"]
-with open("./data/bss/auto_planter_ranking.json", "r") as f:
-    autoPlanterRankings = json.load(f)
+#Load quest data from quest_data.txt, and index the titles for OCR lookups (the reads are recorded for the questIndex benchmark)
+quest_data = loadQuestData()
+quest_index = QuestIndex(quest_data, recordPath=settingsManager.getUserDataPath("quest_ocr.txt"))
 
+#inventory item lookups: template match confidence, and the OCR'd name similarity that confirms a match
+INVENTORY_MATCH_THRESHOLD = 0.7
+INVENTORY_NAME_SIMILARITY = 0.7
 
 # Quest completer name mappings
 questCompleterFieldNames = {
@@ -722,7 +690,7 @@ class macro:
         self.keyboard = keyboard(self.setdat["movespeed"], self.setdat["haste_compensation"], self.hasteCompensation)
         pingSettings = {key: self.setdat.get(key, False) for key in PING_SETTING_KEYS}
         
-        self.logger = logModule.log(logQueue, logModule.delivery_uses_webhook(self.setdat), logModule.get_default_delivery_route(self.setdat), self.setdat.get("send_screenshot", True), blocking=self.setdat.get("low_performance", False), hourlyReportOnly=self.setdat.get("only_send_hourly_report", False), robloxWindow=self.robloxWindow, enableDiscordPing=True, discordUserID=self.setdat.get("discord_user_id", ""), pingSettings=pingSettings, webhookTimeFormat=self.setdat.get("webhook_time_format", 24), enableDiscordBot=logModule.delivery_uses_bot_messages(self.setdat), discordMessageQueue=discordMessageQueue, routeSettings=logModule.build_route_settings(self.setdat))
+        self.logger = logModule.log(logQueue, logModule.delivery_uses_webhook(self.setdat), logModule.get_default_delivery_route(self.setdat), self.setdat.get("send_screenshot", True), blocking=self.setdat.get("low_performance", False), hourlyReportOnly=self.setdat.get("only_send_hourly_report", False), robloxWindow=self.robloxWindow, enableDiscordPing=True, discordUserID=self.setdat.get("discord_user_id", ""), pingSettings=pingSettings, webhookTimeFormat=self.setdat.get("webhook_time_format", 24), enableDiscordBot=logModule.delivery_uses_bot_messages(self.setdat), discordMessageQueue=discordMessageQueue, routeSettings=logModule.build_route_settings(self.setdat), imageFormat=self.setdat.get("webhook_image_format", "jpeg"), imageMaxDimension=self.setdat.get("webhook_image_max_dimension", 1280))
         self.tadAltSync = TadAltSync(
             self.setdat,
             self.logger,
@@ -733,6 +701,7 @@ class macro:
         self.buffDetector = BuffDetector(self.robloxWindow)
         self.hourlyReport = HourlyReport(self.buffDetector, self.setdat.get("hourly_report_time_format", 24))
         self.itemMonitor = ItemMonitor(self.robloxWindow)
+        self.inventoryMap = InventoryMap()
         self.memoryMatch = MemoryMatch(self.robloxWindow, debug=True)
 
         #setup an internal cooldown tracker. The cooldowns can be modified
@@ -2362,44 +2331,85 @@ class macro:
     #scroll to an item in the inventory and return the x,y coordinates
     def getStringSimilarity(self, str1, str2):
         return SequenceMatcher(None, str1, str2).ratio()
-    
-    def findItemInInventory(self, itemName):
-        
-        def scrollToTop():
-            prevHash = None
-            for i in range(9):
-                mouse.scroll(100)
-                sleep(0.05)
-                if i > 10:
-                    screen = cv2.cvtColor(mssScreenshotNP(self.robloxWindow.mx, self.robloxWindow.my+120, 100, 200), cv2.COLOR_BGRA2RGB)
-                    hash = imagehash.average_hash(Image.fromarray(screen))
-                    if not prevHash is None and prevHash == hash:
-                        break
-                    prevHash = hash
+
+    def openInventoryAtTop(self):
+        #open the inventory, focus its scroll area and scroll to the top
+        self.toggleInventory("open")
+        time.sleep(0.3)
+        mouse.moveTo(self.robloxWindow.mx+312, self.robloxWindow.my+200)
+        mouse.click()
+        self.scrollInventoryToTop()
+        time.sleep(0.3)
+
+    def scrollInventoryToTop(self):
+        prevHash = None
+        for i in range(9):
+            mouse.scroll(100)
+            sleep(0.05)
+            if i > 10:
+                screen = cv2.cvtColor(mssScreenshotNP(self.robloxWindow.mx, self.robloxWindow.my+120, 100, 200), cv2.COLOR_BGRA2RGB)
+                hash = imagehash.average_hash(Image.fromarray(screen))
+                if not prevHash is None and prevHash == hash:
+                    break
+                prevHash = hash
+
+    def inventoryItemTemplate(self, itemName):
         #for retina, just a regular image search
         #for built-in, a transparency search
         itemImg = self.adjustImage("./images/inventory/old", itemName)
         #itemImg = cv2.cvtColor(itemImg, cv2.COLOR_RGB2GRAY)
-
         itemOCRName = itemName.lower().replace("planter", "") #the name of the item used to check with the ocr to verify its correct
         itemH, itemW, *_ = itemImg.shape
-        itemW //= self.robloxWindow.multi
-        itemH //= self.robloxWindow.multi
+        return itemImg, itemOCRName, itemW//self.robloxWindow.multi, itemH//self.robloxWindow.multi
+
+    def screenshotInventorySlot(self, loc, itemW, itemH):
+        #the matched item icon, used to verify a remembered position
+        return mssScreenshot(self.robloxWindow.mx+loc[0]//self.robloxWindow.multi, self.robloxWindow.my+90+loc[1]//self.robloxWindow.multi, itemW, itemH)
+
+    def inventoryNameMatches(self, itemOCRName, loc):
+        #ocr the item name beside the match to verify its the correct item
+        itemScreenshot = mssScreenshot(self.robloxWindow.mx+90, self.robloxWindow.my+(loc[1]//self.robloxWindow.multi)+60, 220, 60)
+        itemOCRText = ''.join([x[1][0] for x in ocr.ocrRead(itemScreenshot)]).replace(" ","").replace("-","").lower()
+        if itemOCRName in itemOCRText or self.getStringSimilarity(itemOCRName, itemOCRText) > INVENTORY_NAME_SIMILARITY:
+            print(itemOCRText)
+            return True
+        return False
+
+    def inventoryScrolledToEnd(self, prevHash):
+        #returns (at the end, hash of the view) after a scroll, the view stops changing at the bottom
+        screen = cv2.cvtColor(mssScreenshotNP(self.robloxWindow.mx, self.robloxWindow.my+100, 100, 200), cv2.COLOR_BGRA2RGB)
+        hash = imagehash.average_hash(Image.fromarray(screen))
+        return (not prevHash is None and prevHash == hash), hash
+
+    def findItemInInventory(self, itemName):
+        itemImg, itemOCRName, itemW, itemH = self.inventoryItemTemplate(itemName)
+
+        lookupStart = time.perf_counter()
+        windowHeight = self.robloxWindow.mh
+        self.openInventoryAtTop()
+
+        #jump to where the item was last found, and check its slot still looks the same
+        remembered = self.inventoryMap.get(itemName, windowHeight)
+        if remembered is not None:
+            for _ in range(remembered["step"]):
+                mouse.scroll(-2, True)
+                time.sleep(0.06)
+            time.sleep(0.3)
+            #a similar looking item can take the slot after the inventory reorders, so check the name too
+            if self.inventoryMap.slotMatches(remembered, self.screenshotInventorySlot(remembered["loc"], itemW, itemH)) and self.inventoryNameMatches(itemOCRName, remembered["loc"]):
+                self.inventoryMap.logLookup(itemName, "hit", remembered["step"], lookupStart)
+                return (40, remembered["loc"][1]//self.robloxWindow.multi+80)
+            self.inventoryMap.forget(itemName)
+            self.scrollInventoryToTop()
+            time.sleep(0.3)
 
-        #open inventory
-        self.toggleInventory("open")
-        time.sleep(0.3)
-        mouse.moveTo(self.robloxWindow.mx+312, self.robloxWindow.my+200)
-        mouse.click()
-        #scroll to top
-        scrollToTop()
         #scroll down, note the best match
         bestResults = []
         bestY = None
         foundEarly = False #if the max_val > 0.9, end searching early to save time
 
         prevHash = None
-        time.sleep(0.3)
+        scrollSteps = remembered["step"] if remembered is not None else 0
         for i in range(180):
             #screen = cv2.cvtColor(mssScreenshotNP(90, 90, 300-90, self.robloxWindow.mh-180), cv2.COLOR_RGBA2GRAY)
             #max_loc = fastFeatureMatching(screen, itemImg)
@@ -2407,14 +2417,11 @@ class macro:
             max_val, max_loc = locateImageOnScreen(itemImg, self.robloxWindow.mx, self.robloxWindow.my+90, 100, self.robloxWindow.mh-180)
             data = (max_val, max_loc, i)
             #most likely the correct item, stop searching
-            if max_val > 0.7:
-                itemScreenshot = mssScreenshot(self.robloxWindow.mx+90, self.robloxWindow.my+(max_loc[1]//self.robloxWindow.multi)+60, 220, 60)
-                itemOCRText = ''.join([x[1][0] for x in ocr.ocrRead(itemScreenshot)]).replace(" ","").replace("-","").lower()
-                if itemOCRName in itemOCRText or self.getStringSimilarity(itemOCRName, itemOCRText) > 0.7:
-                    print(itemOCRText)
-                    bestY = max_loc[1]
-                    foundEarly = True
-                    break
+            if max_val > INVENTORY_MATCH_THRESHOLD and self.inventoryNameMatches(itemOCRName, max_loc):
+                bestY = max_loc[1]
+                foundEarly = True
+                self.inventoryMap.record(itemName, i, max_loc, self.screenshotInventorySlot(max_loc, itemW, itemH), windowHeight)
+                break
             
             #store the top 5 results
             if len(bestResults) < 5 or max_val > bestResults[-1][0]:
@@ -2424,13 +2431,12 @@ class macro:
                     bestResults.pop()
                     
             mouse.scroll(-2, True)
+            scrollSteps += 1
             time.sleep(0.06)
 
-            screen = cv2.cvtColor(mssScreenshotNP(self.robloxWindow.mx, self.robloxWindow.my+100, 100, 200), cv2.COLOR_BGRA2RGB)
-            hash = imagehash.average_hash(Image.fromarray(screen))
-            if not prevHash is None and prevHash == hash:
+            atEnd, prevHash = self.inventoryScrolledToEnd(prevHash)
+            if atEnd:
                 break
-            prevHash = hash
 
             # self.logger.webhook("", f"Could not find {itemName} in inventory", "dark brown")
             # self.toggleInventory("close")
@@ -2467,13 +2473,59 @@ class macro:
             self.logger.webhook("", f"Could not find {itemName} in inventory", "dark brown")
             return None
         ''' 
+        self.inventoryMap.logLookup(itemName, "miss" if remembered is not None else "scan", scrollSteps, lookupStart)
         if bestY is None:
             self.logger.webhook("", f"Could not find {itemName} in inventory", "dark brown")
             return
         #return (bestX+20, bestY+80+20)
         bestY //= self.robloxWindow.multi
         return (40, bestY+80)
-        
+
+    def findItemsInInventory(self, itemNames):
+        '''
+        Find several items in one scroll through the inventory, matching every item still
+        missing against the same screenshot at each step. Found items are recorded in the
+        inventory map, so findItemInInventory can then jump straight to each of them.
+        Returns {itemName: scroll step, or None if not found}
+        '''
+        lookupStart = time.perf_counter()
+        windowHeight = self.robloxWindow.mh
+        pending = {itemName: self.inventoryItemTemplate(itemName) for itemName in dict.fromkeys(itemNames)}
+        found = {itemName: None for itemName in pending}
+        if not pending:
+            return found
+
+        self.openInventoryAtTop()
+
+        prevHash = None
+        steps = 0
+        for i in range(180):
+            screen = screenshotBGR(self.robloxWindow.mx, self.robloxWindow.my+90, 100, self.robloxWindow.mh-180)
+            for itemName, (itemImg, itemOCRName, itemW, itemH) in list(pending.items()):
+                res = locateImageInScreen(itemImg, screen)
+                if res is None or res[0] <= INVENTORY_MATCH_THRESHOLD:
+                    continue
+                max_loc = res[1]
+                if self.inventoryNameMatches(itemOCRName, max_loc):
+                    self.inventoryMap.record(itemName, i, max_loc, self.screenshotInventorySlot(max_loc, itemW, itemH), windowHeight)
+                    found[itemName] = i
+                    del pending[itemName]
+            if not pending:
+                break
+
+            mouse.scroll(-2, True)
+            steps += 1
+            time.sleep(0.06)
+
+            atEnd, prevHash = self.inventoryScrolledToEnd(prevHash)
+            if atEnd:
+                break
+
+        self.toggleInventory("close")
+        label = ", ".join(found) + (f" (missing {', '.join(pending)})" if pending else "")
+        self.inventoryMap.logLookup(label, "batch", steps, lookupStart)
+        return found
+
     
     #click at the specified coordinates to use an item in the inventory
     #if x/y is not provided, find the item in inventory
@@ -4012,8 +4064,7 @@ class macro:
             sawSprinklerGap = not clientAlreadyOpen
             softRejoinReadyAt = loadStartTime + (2 if clientAlreadyOpen else 0)
             while time.time() - loadStartTime < 36:
-                if joinPS and self.skipServer is not None and self.skipServer.value == 1:
-                    self.skipServer.value = 0
+                if joinPS and self.skipServer is not None and self.skipServer.value == 1 and self.skipServer.compareAndSet(1, 0):
                     invalidServerLinks.add(psLink)
                     self.logger.webhook("", "Private-server join skipped by Discord command; trying the next configured server", "orange")
                     rejoinSuccess = False
@@ -4296,6 +4347,13 @@ class macro:
                 pattern_ai_gather_model = str(fieldSetting.get("ai_gather_model", self.setdat.get("ai_gather_model", "Standard")))
                 fuzzyAITokenRanking = settingsManager.loadFuzzyAITokenRanking(field, pattern_ai_gather_model)
                 pattern_capture_backend = fuzzyAIRuntimeDefaults["fuzzy_ai_capture_backend"]
+                pattern_inference_backend = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_backend"]
+                pattern_inference_intra_op_threads = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_intra_op_threads"]
+                pattern_inference_inter_op_threads = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_inter_op_threads"]
+                pattern_inference_optimization_level = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_optimization_level"]
+                pattern_inference_quantized = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_quantized"]
+                pattern_tracker_detect_interval = fuzzyAIRuntimeDefaults["fuzzy_ai_tracker_detect_interval"]
+                pattern_inference_cpu_budget = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_cpu_budget"]
                 pattern_confidence_threshold = fuzzyAIRuntimeDefaults["fuzzy_ai_confidence_threshold"]
                 pattern_sprinkler_confidence_threshold = fuzzyAIRuntimeDefaults["fuzzy_ai_sprinkler_confidence_threshold"]
                 pattern_min_token_distance = fuzzyAIRuntimeDefaults["fuzzy_ai_min_token_distance"]
@@ -4513,6 +4571,13 @@ class macro:
         pattern_ai_gather_model = str(fieldSetting.get("ai_gather_model", self.setdat.get("ai_gather_model", "Standard")))
         fuzzyAITokenRanking = settingsManager.loadFuzzyAITokenRanking(field, pattern_ai_gather_model)
         pattern_capture_backend = fuzzyAIRuntimeDefaults["fuzzy_ai_capture_backend"]
+        pattern_inference_backend = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_backend"]
+        pattern_inference_intra_op_threads = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_intra_op_threads"]
+        pattern_inference_inter_op_threads = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_inter_op_threads"]
+        pattern_inference_optimization_level = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_optimization_level"]
+        pattern_inference_quantized = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_quantized"]
+        pattern_tracker_detect_interval = fuzzyAIRuntimeDefaults["fuzzy_ai_tracker_detect_interval"]
+        pattern_inference_cpu_budget = fuzzyAIRuntimeDefaults["fuzzy_ai_inference_cpu_budget"]
         pattern_confidence_threshold = fuzzyAIRuntimeDefaults["fuzzy_ai_confidence_threshold"]
         pattern_sprinkler_confidence_threshold = fuzzyAIRuntimeDefaults["fuzzy_ai_sprinkler_confidence_threshold"]
         pattern_min_token_distance = fuzzyAIRuntimeDefaults["fuzzy_ai_min_token_distance"]
@@ -6195,6 +6260,21 @@ class macro:
             return 0
         return slot
             
+    def prefetchPlantersInInventory(self, planters):
+        #find the inventory planters of a round of placements in one scroll, so each placement jumps straight to its planter
+        names = [f"{planter.lower().replace(' ', '').replace('-', '')}planter" for planter in dict.fromkeys(planters)
+                 if planter and planter != "none" and not self.getPlanterHotbarSlot(planter)]
+        #planters already in the inventory map are jumped to directly, only scan for the rest
+        windowHeight = self.robloxWindow.mh
+        names = [name for name in names if self.inventoryMap.get(name, windowHeight) is None]
+        if len(names) < 2:
+            return
+        try:
+            self.findItemsInInventory(names)
+        except Exception as e:
+            print(f"Planter prefetch failed: {e}")
+            self.toggleInventory("close")
+
     #place the planter and return true if successfully placed
     def placePlanter(self, planter, field, glitter):
         st = time.time()
@@ -6954,6 +7034,7 @@ class macro:
 
                     self.hourlyReport.addHourlyStat("honey_per_min", honey)
                     self.hourlyReport.addHourlyStat("backpack_per_min", backpack)
+                    self.prerenderHourlyReportCharts()
 
             # Item monitor: loot toast detection
             if (
@@ -6970,7 +7051,9 @@ class macro:
 
             if self.status.value != "rejoining" and not currSec%6 and currSec != self.prevSec:
                 i = (60*currMin + currSec)//6
-                screen = cv2.cvtColor(self.buffDetector.screenshotBuffArea(), cv2.COLOR_BGRA2BGR)
+                #one capture for every buff below; color lookups go through the snapshot's palette
+                buffBar = self.buffDetector.buffBar.snapshot()
+                screen = buffBar.bgr
                 height, width = screen.shape[:2]
                 uptimeBuffsColors = self.hourlyReport.uptimeBuffsColors
                 uptimeBuffsColorVariations = getattr(self.hourlyReport, "uptimeBuffsColorVariations", {})
@@ -6988,7 +7071,7 @@ class macro:
 
                 if "baby_love" in monitoredBuffs:
                     j = "baby_love"
-                    if self.buffDetector.detectBuffColorInImage(screen, uptimeBuffsColors[j][0], uptimeBuffsColors[j][1], y1=30*self.multi, variation=uptimeBuffsColorVariations.get(j, 0), searchDirection=7):
+                    if self.buffDetector.detectBuffColorInSnapshot(buffBar, uptimeBuffsColors[j][0], uptimeBuffsColors[j][1], y1=30*self.multi, variation=uptimeBuffsColorVariations.get(j, 0), searchDirection=7):
                         sampleValues[j] = 1
 
                 if "bear" in monitoredBuffs:
@@ -6997,7 +7080,7 @@ class macro:
                         sampleValues["bear"] = 1
 
                 for j in [key for key in selectedUptimeRows if key in uptimeBuffsColors and key not in {"baby_love", "haste", "melody", "boost", "bear"}]:
-                    res = self.buffDetector.detectBuffColorInImage(screen, uptimeBuffsColors[j][0], uptimeBuffsColors[j][1], y1=30*self.multi, y2=50*self.multi, variation=uptimeBuffsColorVariations.get(j, 0), searchDirection=7)
+                    res = self.buffDetector.detectBuffColorInSnapshot(buffBar, uptimeBuffsColors[j][0], uptimeBuffsColors[j][1], y1=30*self.multi, y2=50*self.multi, variation=uptimeBuffsColorVariations.get(j, 0), searchDirection=7)
                     if res:
                         chartType = BUFF_RENDER_CONFIG.get(j, ("binary",))[0]
                         if chartType == "binary":
@@ -7014,11 +7097,11 @@ class macro:
                 if "haste" in monitoredBuffs or "melody" in monitoredBuffs:
                     x = 0
                     for _ in range(3):
-                        res = self.buffDetector.detectBuffColorInImage(screen, uptimeBuffsColors["haste"][0], uptimeBuffsColors["haste"][1],x, 30*self.multi, variation=uptimeBuffsColorVariations.get("haste", 0), searchDirection=6)
+                        res = self.buffDetector.detectBuffColorInSnapshot(buffBar, uptimeBuffsColors["haste"][0], uptimeBuffsColors["haste"][1],x, 30*self.multi, variation=uptimeBuffsColorVariations.get("haste", 0), searchDirection=6)
                         if not res:
                             break
                         x = res[0]
-                        if "melody" in monitoredBuffs and self.buffDetector.detectBuffColorInImage(screen, uptimeBuffsColors["melody"][0], uptimeBuffsColors["melody"][1], x+2*self.multi, 30, x+34*self.multi, 40*self.multi, max(12, uptimeBuffsColorVariations.get("melody", 0))):
+                        if "melody" in monitoredBuffs and self.buffDetector.detectBuffColorInSnapshot(buffBar, uptimeBuffsColors["melody"][0], uptimeBuffsColors["melody"][1], x+2*self.multi, 30, x+34*self.multi, 40*self.multi, max(12, uptimeBuffsColorVariations.get("melody", 0))):
                             sampleValues["melody"] = 1
                         elif "haste" in monitoredBuffs and not sampleValues.get("haste", 0):
                             x1 = max(0, int(x+6*self.multi))
@@ -7033,15 +7116,15 @@ class macro:
                 if any(buff in monitoredBuffs for buff in ("blue_boost", "red_boost", "white_boost")):
                     x = screen.shape[1]
                     for _ in range(3):
-                        res = self.buffDetector.detectBuffColorInImage(screen, uptimeBuffsColors["boost"][0], uptimeBuffsColors["boost"][1], y1=30*self.multi, x2=x, variation=uptimeBuffsColorVariations.get("boost", 0), searchDirection=7)
+                        res = self.buffDetector.detectBuffColorInSnapshot(buffBar, uptimeBuffsColors["boost"][0], uptimeBuffsColors["boost"][1], y1=30*self.multi, x2=x, variation=uptimeBuffsColorVariations.get("boost", 0), searchDirection=7)
                         if not res:
                             break
                         x = res[0]+res[2]
                         y = res[1] + res[3]
 
-                        if len(self.buffDetector.detectBuffColorInImage(screen, uptimeBuffsColors["red_boost"][0], uptimeBuffsColors["red_boost"][1], x-30*self.multi, 15*self.multi, x-4*self.multi, 34*self.multi, max(20, uptimeBuffsColorVariations.get("red_boost", 0)))):
+                        if len(self.buffDetector.detectBuffColorInSnapshot(buffBar, uptimeBuffsColors["red_boost"][0], uptimeBuffsColors["red_boost"][1], x-30*self.multi, 15*self.multi, x-4*self.multi, 34*self.multi, max(20, uptimeBuffsColorVariations.get("red_boost", 0)))):
                             buffType = "red_boost"
-                        elif len(self.buffDetector.detectBuffColorInImage(screen, uptimeBuffsColors["blue_boost"][0], uptimeBuffsColors["blue_boost"][1], x-30*self.multi, 15*self.multi, x-4*self.multi, 34*self.multi, max(20, uptimeBuffsColorVariations.get("blue_boost", 0)))):
+                        elif len(self.buffDetector.detectBuffColorInSnapshot(buffBar, uptimeBuffsColors["blue_boost"][0], uptimeBuffsColors["blue_boost"][1], x-30*self.multi, 15*self.multi, x-4*self.multi, 34*self.multi, max(20, uptimeBuffsColorVariations.get("blue_boost", 0)))):
                             buffType = "blue_boost"
                         else:
                             buffType = "white_boost"
@@ -7062,9 +7145,17 @@ class macro:
                 isGathering = "gather_" in self.status.value
                 self.hourlyReport.recordUptimeSample(i, sampleValues, isGathering=isGathering, monitoredBuffs=monitoredBuffs)
                 self.hourlyReport.saveHourlyReportData()
+                self.prerenderHourlyReportCharts()
         except Exception:
             self.logger.webhook("Hourly Report Error", traceback.format_exc(), "red", ping_category="ping_critical_errors")
         
+    def prerenderHourlyReportCharts(self):
+        #keep the hourly report graphs rendered as samples come in, so the report at the hour boundary is quick
+        try:
+            self.hourlyReport.prerenderCharts(self.setdat)
+        except Exception as e:
+            print(f"Hourly report chart prerender failed: {e}")
+
     def hourlyReportBackground(self):
         while True:
             self.hourlyReportBackgroundOnce()
@@ -7087,11 +7178,12 @@ class macro:
         mouse.moveTo(self.robloxWindow.mx+(312), self.robloxWindow.my+(200))
         mouse.click()
 
-    def captureQuestScreenshots(self, maxScreens=150):
+    def captureQuestScreenshots(self, maxScreens=150, recordFolder=None):
         """
         Capture the quest list from top to bottom once.
-        Returned RGBA screenshots can be reused by findQuest for multiple
-        quest givers without reopening and rescrolling the quest UI.
+        The captures are stitched into one deduplicated canvas (StitchedScan) that
+        findQuest can reuse for multiple quest givers without reopening and
+        rescrolling the quest UI. Its OCR runs once and is shared by every lookup.
         """
         def screenshotQuest(screenshotHeight, mode="gray"):
             mode = mode.lower()
@@ -7117,20 +7209,36 @@ class macro:
             prevHash = currentHash
 
         sleep(0.4)
-        screens = []
-        prevHash = None
-        for _ in range(maxScreens):
-            screens.append(screenshotQuest(800, mode="RGBA"))
-            mouse.scroll(-1, True)
-            time.sleep(0.06)
-            currentHash = imagehash.average_hash(Image.fromarray(screenshotQuest(100)))
-            if prevHash is not None and prevHash == currentHash:
+        #stitch the captures by their overlap, and scroll further per step once the
+        #distance of a single scroll is known. Stop when a capture adds no new rows
+        stitcher = ScrollStitcher(minOverlap=40*self.robloxWindow.multi)
+        scrollClicks = 1
+        scrolls = 0
+        for i in range(maxScreens):
+            screen = screenshotQuest(800, mode="RGBA")
+            if recordFolder:
+                os.makedirs(recordFolder, exist_ok=True)
+                screen.save(os.path.join(recordFolder, f"quest-{i:03d}.png"))
+            newRows = stitcher.add(screen)
+            if i and not newRows:
                 break
-            prevHash = currentHash
+            if i and stitcher.lastShift is None:
+                #lost track of the overlap, go back to single scrolls
+                scrollClicks = 1
+            elif i and scrollClicks == 1:
+                scrollClicks = max(1, int(screen.height * 0.6 / newRows))
+            mouse.scroll(-scrollClicks, True)
+            scrolls += 1
+            time.sleep(0.06)
 
         self.toggleQuest()
         self.moveMouseToDefault()
-        return screens
+        canvas = stitcher.canvas()
+        if canvas is None:
+            return []
+        scan = StitchedScan(canvas, screen.height, scrolls)
+        print(f"Quest scan: {scrolls} scrolls, {stitcher.frames} captures stitched to {canvas.height}px")
+        return scan
 
     def captureQuestWatchScreen(self):
         """Capture the visible quest section without scrolling or toggling its UI."""
@@ -7528,12 +7636,17 @@ class macro:
                 screen = cv2.cvtColor(screen, cv2.COLOR_BGRA2GRAY)
             return screen
 
-        def ocrQuestTitleFromScreen(screen):
+        def ocrQuestTitleFromScreen(screen, lines=None):
             cropHeight = min(300, screen.height)
-            crop = screen.crop((0, 0, screen.width, cropHeight))
+            if lines is None:
+                crop = screen.crop((0, 0, screen.width, cropHeight))
+                lines = ocr.ocrRead(crop)
+            else:
+                #lines already read from a stitched scan, keep the ones in the same top area
+                lines = [line for line in lines if max(point[1] for point in line[0]) <= cropHeight]
             bestMatch = None
             questTitleNoise = ["talk", "complete", "compete", "competer", "collect", "field", "pollen", "tokens", "defeat", "catch"]
-            for bbox, (text, _conf) in ocr.ocrRead(crop):
+            for bbox, (text, _conf) in lines:
                 line = self.convertCyrillic(text.lower().strip())
                 if not line:
                     continue
@@ -7601,11 +7714,17 @@ class macro:
         except Exception:
             pass
         prevHash = None
-        screenSource = questScreens if questScreens is not None else range(150)
-        for i, screenEntry in enumerate(screenSource):
+        if isinstance(questScreens, StitchedScan):
+            #views down the stitched canvas, with the text the scan already read
+            screenSource = questScreens.windows()
+        elif questScreens is not None:
+            screenSource = ((screen, None) for screen in questScreens)
+        else:
+            screenSource = ((None, None) for _ in range(150))
+        for i, (screenEntry, screenLines) in enumerate(screenSource):
             screen = screenEntry if questScreens is not None else screenshotQuest(800, mode="RGBA")
 
-            ocrMatch = ocrQuestTitleFromScreen(screen)
+            ocrMatch = ocrQuestTitleFromScreen(screen, screenLines)
             if ocrMatch:
                 _score, questTitleRaw, questTitleYPos = ocrMatch
                 if ":" in questTitleRaw:
@@ -7613,7 +7732,7 @@ class macro:
                 if questGiver == "brown bear":
                     questTitle = questTitleRaw
                 else:
-                    questTitle, _ = fuzzywuzzy.process.extractOne(questTitleRaw, quest_data[questGiver].keys())
+                    questTitle, _ = quest_index.match(questGiver, questTitleRaw)
                 if logDetection:
                     self.logger.webhook("", f"Quest Title: {questTitle}", "dark brown")
                 break
@@ -7646,7 +7765,7 @@ class macro:
                     if questGiver == "brown bear":
                         questTitle = text
                     else:
-                        questTitle, _ = fuzzywuzzy.process.extractOne(text, quest_data[questGiver].keys())
+                        questTitle, _ = quest_index.match(questGiver, text)
                     if logDetection:
                         self.logger.webhook("", f"Quest Title: {questTitle}", "dark brown")
                     break
@@ -35,6 +35,12 @@ except Exception:
     Image = None
     ImageGrab = None
 
+from modules.misc import detectionDecode
+from modules.misc import inferenceBackends
+from modules.misc.inferenceScheduler import InferenceScheduler
+from modules.misc.preprocessEngine import PreprocessEngine
+from modules.misc.tokenTracker import TokenTracker
+
 
 ROBLOX_VIEWPORT_WIDTH = 1364
 ROBLOX_VIEWPORT_HEIGHT = 732
@@ -267,69 +273,180 @@ def preprocess_onnx_image(frame, input_width, input_height):
     return np.expand_dims(chw, axis=0)
 
 
-def postprocess(output, confidence_threshold):
-    """Decode classic YOLO ONNX output shaped [1, 4+nc, N]."""
-    outputs = np.squeeze(output[0])
-    if outputs.ndim != 2 or outputs.shape[0] < 5:
-        return []
+def preprocess_layout(model_kind, letterbox=False):
+    layout = "onnx" if model_kind == "opencv_onnx" else "coreml"
+    return f"petal_{layout}" if letterbox else layout
 
-    class_probs = outputs[4:, :]
-    confidences = np.max(class_probs, axis=0)
-    mask = confidences > confidence_threshold
-    if not np.any(mask):
-        return []
 
-    filtered_confidences = confidences[mask]
-    class_ids = np.argmax(class_probs[:, mask], axis=0)
-    boxes_data = outputs[:4, mask]
-    cx, cy, box_w, box_h = boxes_data
-    x1 = cx - box_w / 2.0
-    y1 = cy - box_h / 2.0
-    boxes = np.stack((x1, y1, box_w, box_h), axis=1)
-
-    indices = cv2.dnn.NMSBoxes(
-        boxes.tolist(),
-        filtered_confidences.tolist(),
-        confidence_threshold,
-        NMS_THRESHOLD,
-    )
+def preprocess_frame(runtime, model, frame, frame_id, input_width, input_height, layout, crop=None):
+    """Preprocess a mailbox frame for a model, returns (image, letterbox transform or None).
 
-    detections = []
-    if len(indices) > 0:
-        for index in np.array(indices).flatten():
-            bx, by, bw, bh = boxes[index]
-            detections.append(((bx, by, bx + bw, by + bh), int(class_ids[index]), float(filtered_confidences[index])))
-    return detections
+    The newest tensor of each geometry (input size, layout, crop) is kept with
+    the frame id it was built from, so every model or rescan that needs the same
+    tensor from the same frame reuses it. The image is shared, don't modify it.
+    Pass frame_id None for frames that didn't come from the mailbox.
+
+    Tensors are built in the preallocated buffers of the runtime's
+    PreprocessEngine and are overwritten by the next frame of the same geometry,
+    so a model used from several threads preprocesses under its inference lock.
+    """
+    start = time.perf_counter()
+    input_width = int(input_width)
+    input_height = int(input_height)
+    key = (input_width, input_height, layout, tuple(crop) if crop else None)
+    lock = runtime.get("preprocess_lock")
+    if lock is None:
+        lock = runtime.setdefault("preprocess_lock", threading.Lock())
+    cache = runtime.setdefault("preprocess_cache", {})
+    engine = runtime.get("preprocess_engine")
+    if engine is None:
+        engine = runtime.setdefault("preprocess_engine", PreprocessEngine())
+    stats = runtime.setdefault("preprocess_cache_stats", {}).setdefault(model, {"hits": 0, "misses": 0})
+
+    if frame_id:
+        with lock:
+            cached = cache.get(key)
+        if cached is not None and cached[0] == frame_id:
+            stats["hits"] += 1
+            record_stage_timing(runtime, model, "preprocess", time.perf_counter() - start)
+            return cached[1], cached[2]
+
+    source = crop_rect(frame, crop) if crop else frame
+    image, transform = engine.run(source, input_width, input_height, layout)
+    if frame_id:
+        with lock:
+            cache[key] = (frame_id, image, transform)
+    stats["misses"] += 1
+    record_stage_timing(runtime, model, "preprocess", time.perf_counter() - start)
+    return image, transform
+
+
+def record_stage_timing(runtime, model, stage, elapsed):
+    """Smoothed per-model milliseconds spent in a detection stage."""
+    timings = runtime.setdefault("stage_timing_ms", {}).setdefault(model, {})
+    elapsed_ms = elapsed * 1000.0
+    previous = timings.get(stage)
+    timings[stage] = elapsed_ms if previous is None else previous * 0.8 + elapsed_ms * 0.2
+
+
+def stage_timing_summary(runtime):
+    """One line per model: preprocess vs inference vs postprocess, and preprocess cache hits."""
+    parts = []
+    cache_stats = runtime.get("preprocess_cache_stats", {})
+    for model, timings in sorted(runtime.get("stage_timing_ms", {}).items()):
+        preprocess_ms = timings.get("preprocess", 0.0)
+        inference_ms = timings.get("inference", 0.0)
+        postprocess_ms = timings.get("postprocess", 0.0)
+        total_ms = preprocess_ms + inference_ms + postprocess_ms
+        stats = cache_stats.get(model, {})
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        hit_rate = 100.0 * stats.get("hits", 0) / lookups if lookups else 0.0
+        parts.append(
+            f"{model} preprocess={preprocess_ms:.1f}ms ({100.0 * preprocess_ms / total_ms if total_ms else 0.0:.0f}%) "
+            f"inference={inference_ms:.1f}ms postprocess={postprocess_ms:.1f}ms cache_hits={hit_rate:.0f}%"
+        )
+    engine = runtime.get("preprocess_engine")
+    if engine is not None:
+        stats = engine.stats()
+        parts.append(
+            f"preprocess buffers allocated {stats['allocations']} times over {stats['frames']} frames "
+            f"({stats['buffer_bytes'] / 1048576.0:.1f}MB)"
+        )
+    for model, tracker in sorted(runtime.get("trackers", {}).items()):
+        stats = tracker.stats()
+        scans = stats["updates"] + stats["predictions"]
+        parts.append(
+            f"{model} detector ran {stats['updates']}/{scans} scans, "
+            f"track={runtime.get('stage_timing_ms', {}).get(model, {}).get('track', 0.0):.2f}ms tracks={stats['tracks']}"
+        )
+    return "; ".join(parts)
+
+
+def postprocess(output, confidence_threshold):
+    """Decode classic YOLO ONNX output shaped [1, 4+nc, N]."""
+    return detectionDecode.detections_to_list(
+        detectionDecode.decode_yolo(output, confidence_threshold, NMS_THRESHOLD)
+    )
 
 
 def postprocess_tokens(output, confidence_threshold):
     """Decode CoreML end2end output shaped [1, max_det, 6] as xyxy/conf/cls."""
-    pred = output[0]
-    if pred.ndim != 3 or pred.shape[0] < 1 or pred.shape[2] < 6:
-        return []
+    return detectionDecode.detections_to_list(detectionDecode.decode_end2end(output, confidence_threshold))
 
-    detections = []
-    for row in pred[0]:
-        x1, y1, x2, y2, confidence, class_id = row[:6]
-        confidence = float(confidence)
-        if confidence < confidence_threshold:
-            continue
-
-        x1 = float(x1)
-        y1 = float(y1)
-        x2 = float(x2)
-        y2 = float(y2)
-        if x2 <= x1 or y2 <= y1:
-            continue
 
-        detections.append(((x1, y1, x2, y2), int(round(float(class_id))), confidence))
+def decode_detection_array(runtime, prefix, output, confidence_threshold):
+    """Decode a model output into a DETECTION_DTYPE structured array (box, class_id, confidence)."""
+    start = time.perf_counter()
+    if runtime.get(f"{prefix}_model_kind") == "opencv_onnx":
+        detections = detectionDecode.decode_yolo(output, confidence_threshold, NMS_THRESHOLD)
+    else:
+        detections = detectionDecode.decode_end2end(output, confidence_threshold)
+    record_stage_timing(runtime, prefix, "postprocess", time.perf_counter() - start)
     return detections
 
 
 def decode_detections(runtime, prefix, output, confidence_threshold):
-    if runtime.get(f"{prefix}_model_kind") == "opencv_onnx":
-        return postprocess(output, confidence_threshold)
-    return postprocess_tokens(output, confidence_threshold)
+    return detectionDecode.detections_to_list(
+        decode_detection_array(runtime, prefix, output, confidence_threshold)
+    )
+
+
+detections_to_list = detectionDecode.detections_to_list
+
+
+def detection_tracker(runtime, prefix):
+    trackers = runtime.setdefault("trackers", {})
+    tracker = trackers.get(prefix)
+    if tracker is None:
+        tracker = TokenTracker()
+        trackers[prefix] = tracker
+    return tracker
+
+
+def inference_scheduler(runtime, base_interval, cpu_budget):
+    scheduler = runtime.get("inference_scheduler")
+    if scheduler is None:
+        scheduler = InferenceScheduler(base_interval, cpu_budget=cpu_budget)
+        runtime["inference_scheduler"] = scheduler
+    scheduler.base_interval = base_interval
+    scheduler.cpu_budget = cpu_budget
+    return scheduler
+
+
+def detector_due(runtime, prefix, detect_interval, motion_state, now):
+    """
+    Whether the prefix scan has to run its detector, or can use the tracker's
+    predictions: every detect_interval seconds (0 runs it every scan), and right
+    away when motion_state (how the camera moves) changed since the last detector
+    run, which also drops the velocities measured before. With nothing tracked
+    the interval still holds, the scheduler already lengthens it for an empty
+    field and keeps it within the CPU budget.
+    """
+    tracker = detection_tracker(runtime, prefix)
+    state = runtime.setdefault("detector_runs", {}).get(prefix)
+    if state is None or state["motion"] != motion_state:
+        tracker.reset_motion()
+        return True
+    if detect_interval <= 0:
+        return True
+    return now - state["time"] >= detect_interval
+
+
+def track_detections(runtime, prefix, detections, motion_state, now):
+    """Feed a detector run to the prefix tracker, returns the detections with their track ids."""
+    runtime.setdefault("detector_runs", {})[prefix] = {"time": now, "motion": motion_state}
+    start = time.perf_counter()
+    tracks = detection_tracker(runtime, prefix).update(detections, now)
+    record_stage_timing(runtime, prefix, "track", time.perf_counter() - start)
+    return tracks
+
+
+def predict_detections(runtime, prefix, now):
+    """The prefix tracks at their predicted positions, for scans that skip the detector."""
+    start = time.perf_counter()
+    tracks = detection_tracker(runtime, prefix).predict(now)
+    record_stage_timing(runtime, prefix, "track", time.perf_counter() - start)
+    return tracks
 
 
 def build_capture(viewport, capture_backend="auto"):
@@ -418,6 +535,8 @@ def init_frame_mailbox(runtime):
 
 
 def publish_frame(runtime, frame):
+    """Publish a new frame. Published frames are never written to, so readers that only
+    preprocess them can skip the copy."""
     lock = runtime.get("frame_lock")
     if lock is None:
         init_frame_mailbox(runtime)
@@ -809,11 +928,10 @@ def load_coreml_model(model_path, compiled_output_name="var_1445"):
     return model, input_name, output_name
 
 
-def load_onnx_model(model_path):
-    if cv2 is None:
-        raise RuntimeError("OpenCV is required for ONNX AI gathering.")
-
-    model = cv2.dnn.readNetFromONNX(str(model_path))
+def load_onnx_model(model_path, backend="auto", **options):
+    """Load an ONNX model with an inference backend, options go to the backend."""
+    model = inferenceBackends.load(model_path, backend, **options)
+    print(f"[ai_gather] {Path(model_path).name} running on {model.name}")
     return model, None, None
 
 
@@ -834,16 +952,17 @@ def delete_model_path(model_path, debug_log_fn=None):
 
 
 def run_model(runtime, prefix, image):
+    start = time.perf_counter()
     if runtime.get(f"{prefix}_model_kind") == "opencv_onnx":
-        session = runtime[f"{prefix}_session"]
-        session.setInput(image)
-        return [session.forward()]
-
-    return [
-        runtime[f"{prefix}_session"].predict(
-            {runtime[f"{prefix}_input"]: image}
-        )[runtime[f"{prefix}_output"]]
-    ]
+        output = runtime[f"{prefix}_session"].run(image)
+    else:
+        output = [
+            runtime[f"{prefix}_session"].predict(
+                {runtime[f"{prefix}_input"]: image}
+            )[runtime[f"{prefix}_output"]]
+        ]
+    record_stage_timing(runtime, prefix, "inference", time.perf_counter() - start)
+    return output
 
 
 def relative_distance(x, y, homography):
@@ -853,6 +972,17 @@ def relative_distance(x, y, homography):
     return float(tx), float(-ty)
 
 
+def relative_distances(xs, ys, homography):
+    """relative_distance for arrays of capture points, with one perspectiveTransform."""
+    points = np.empty((len(xs), 1, 2), dtype=np.float32)
+    points[:, 0, 0] = xs
+    points[:, 0, 1] = np.asarray(ys) + 15
+    if not len(points):
+        return np.zeros(0), np.zeros(0)
+    transformed = cv2.perspectiveTransform(points, homography)
+    return transformed[:, 0, 0].astype(np.float64), -transformed[:, 0, 1].astype(np.float64)
+
+
 def resolve_sprinkler_model(model_dir=None, tag="ai_gather", download=True):
     model_dir = Path(model_dir or MODEL_DIR)
     sprinkler_model_kind = None
@@ -879,11 +1009,11 @@ def resolve_sprinkler_model(model_dir=None, tag="ai_gather", download=True):
     return sprinkler_path, sprinkler_model_kind
 
 
-def load_sprinkler_session(sprinkler_path, sprinkler_model_kind, debug_log_fn=None):
+def load_sprinkler_session(sprinkler_path, sprinkler_model_kind, debug_log_fn=None, inference_options=None):
     if sprinkler_path is None:
         return None, None, None
     if sprinkler_model_kind == "opencv_onnx":
-        session, input_name, output_name = load_onnx_model(sprinkler_path)
+        session, input_name, output_name = load_onnx_model(sprinkler_path, **(inference_options or {}))
         delete_model_path(MODEL_DIR / "sprinkler_detection_standard.mlmodelc", debug_log_fn)
         delete_model_path(MODEL_DIR / "sprinkler.mlpackage", debug_log_fn)
         return session, input_name, output_name
@@ -910,22 +1040,30 @@ def find_sprinkler(
     confidence_threshold,
     max_distance,
     target_label=None,
+    frame_id=None,
 ):
     if runtime.get("sprinkler_session") is None:
         runtime["last_sprinkler_status"] = "model_missing"
         return None
 
     if frame is None:
-        frame, _, _ = get_latest_frame(runtime, copy=True)
+        frame, frame_id, _ = get_latest_frame(runtime, copy=False)
         if frame is None:
             frame = grab_frame(runtime)
-    if runtime.get("sprinkler_model_kind") == "opencv_onnx":
-        image = preprocess_onnx_image(frame, SPRINKLER_INPUT_WIDTH, SPRINKLER_INPUT_HEIGHT)
-    else:
-        image = preprocess_coreml_image(frame, SPRINKLER_INPUT_WIDTH, SPRINKLER_INPUT_HEIGHT)
+            frame_id = None
     with sprinkler_infer_lock(runtime):
+        #the tensor buffer and bound outputs are reused, so hold the lock until decoded
+        image, _ = preprocess_frame(
+            runtime,
+            "sprinkler",
+            frame,
+            frame_id,
+            SPRINKLER_INPUT_WIDTH,
+            SPRINKLER_INPUT_HEIGHT,
+            preprocess_layout(runtime.get("sprinkler_model_kind")),
+        )
         output = run_model(runtime, "sprinkler", image)
-    detections = decode_detections(runtime, "sprinkler", output, confidence_threshold)
+        detections = decode_detections(runtime, "sprinkler", output, confidence_threshold)
 
     scale_x = runtime["capture"]["width"] / float(SPRINKLER_INPUT_WIDTH)
     scale_y = runtime["capture"]["height"] / float(SPRINKLER_INPUT_HEIGHT)
@@ -1271,6 +1409,9 @@ def same_token_candidate(a, b, switch_distance):
         return False
     if a.get("name") != b.get("name"):
         return False
+    if a.get("track_id") is not None and a.get("track_id") == b.get("track_id"):
+        #the tracker followed it, even if the planned position moved further
+        return True
     ax = a.get("future_x")
     ay = a.get("future_y")
     bx = b.get("future_x")
@@ -1311,6 +1452,7 @@ def clear_locked_target(runtime):
 
 
 def scanner_loop(runtime, scan_fn, interval, debug_log_fn=None, on_error=None):
+    """interval is in seconds, or a function returning it after every scan."""
     stop_event = runtime.get("scanner_stop_event")
     while stop_event is not None and not stop_event.is_set():
         scan_started = time.time()
@@ -1326,7 +1468,7 @@ def scanner_loop(runtime, scan_fn, interval, debug_log_fn=None, on_error=None):
             if debug_log_fn:
                 debug_log_fn(f"scanner error: {exc}", min_interval=1.0, key="scanner_error")
             return
-        remaining = interval - (time.time() - scan_started)
+        remaining = (interval() if callable(interval) else interval) - (time.time() - scan_started)
         time.sleep(max(remaining, 0.01))
 
 
@@ -1393,14 +1535,14 @@ def sprinkler_scanner_loop(
                 runtime,
                 after_id=after_id,
                 timeout=max(interval, 0.02),
-                copy=True,
+                copy=False,
             )
             if frame is None:
                 time.sleep(0.01)
                 continue
             runtime["sprinkler_last_frame_id"] = frame_id
 
-            result = find_sprinkler(runtime, frame=frame, **find_kwargs)
+            result = find_sprinkler(runtime, frame=frame, frame_id=frame_id, **find_kwargs)
             if apply_fn is not None:
                 apply_fn(runtime, result)
             else:
@@ -0,0 +1,222 @@
+"""
+Vectorized decoding of the AI gather model outputs.
+
+Detections are decoded into a numpy structured array of DETECTION_DTYPE
+(box as x1, y1, x2, y2 in model input pixels, class_id, confidence) without a
+Python loop per candidate: confidence filtering, box validation, class mapping
+and non-maximum suppression all run on arrays. detections_to_list converts to
+the ((x1, y1, x2, y2), class_id, confidence) tuples the rest of the patterns use.
+
+    yolo      classic YOLO output [1, 4+nc, N] (cx, cy, w, h, class scores), class
+              agnostic NMS. The candidate arrays go straight to cv2.dnn.NMSBoxes,
+              nms_indices does the same in numpy when OpenCV is missing.
+    end2end   NMS-free output [1, max_det, 6] (x1, y1, x2, y2, confidence, class)
+
+Run from the src folder to compare with the per-row decoders at realistic output
+sizes:
+    python -m modules.misc.detectionDecode [--repeat 200]
+"""
+
+import time
+
+try:
+    import cv2
+except Exception:
+    cv2 = None
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+NMS_THRESHOLD = 0.5
+
+DETECTION_DTYPE = None if np is None else np.dtype([
+    ("box", np.float32, (4,)),
+    ("class_id", np.int32),
+    ("confidence", np.float32),
+])
+
+
+def empty_detections():
+    return np.zeros(0, dtype=DETECTION_DTYPE)
+
+
+def make_detections(boxes, class_ids, confidences):
+    detections = np.empty(len(confidences), dtype=DETECTION_DTYPE)
+    detections["box"] = boxes
+    detections["class_id"] = class_ids
+    detections["confidence"] = confidences
+    return detections
+
+
+def nms_indices(boxes, scores, iou_threshold=NMS_THRESHOLD):
+    '''
+    Greedy non-maximum suppression on xyxy boxes like cv2.dnn.NMSBoxes. Returns the
+    kept indices by descending score, a box is dropped when its IoU with a kept
+    one is above iou_threshold. One vectorized pass per kept box.
+    '''
+    order = np.argsort(-scores, kind="stable")
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        order = order[1:]
+        overlapWidth = np.maximum(np.minimum(x2[best], x2[order]) - np.maximum(x1[best], x1[order]), 0)
+        overlapHeight = np.maximum(np.minimum(y2[best], y2[order]) - np.maximum(y1[best], y1[order]), 0)
+        intersection = overlapWidth * overlapHeight
+        order = order[intersection <= iou_threshold * (areas[best] + areas[order] - intersection)]
+    return np.asarray(keep, dtype=np.intp)
+
+
+def decode_yolo(output, confidence_threshold, nms_threshold=NMS_THRESHOLD):
+    '''Decode classic YOLO output shaped [1, 4+nc, N]'''
+    outputs = np.squeeze(output[0])
+    if outputs.ndim != 2 or outputs.shape[0] < 5:
+        return empty_detections()
+
+    class_probs = outputs[4:, :]
+    confidences = class_probs.max(axis=0)
+    candidates = np.flatnonzero(confidences > confidence_threshold)
+    if not candidates.size:
+        return empty_detections()
+
+    confidences = confidences[candidates]
+    class_ids = class_probs[:, candidates].argmax(axis=0)
+    cx, cy, box_w, box_h = outputs[:4, candidates]
+    boxes = np.stack((cx - box_w / 2.0, cy - box_h / 2.0, cx + box_w / 2.0, cy + box_h / 2.0), axis=1)
+
+    if cv2 is not None:
+        xywh = np.stack((boxes[:, 0], boxes[:, 1], box_w, box_h), axis=1).astype(np.float64)
+        keep = np.asarray(cv2.dnn.NMSBoxes(xywh, confidences, confidence_threshold, nms_threshold), dtype=np.intp).reshape(-1)
+    else:
+        keep = nms_indices(boxes, confidences, nms_threshold)
+    return make_detections(boxes[keep], class_ids[keep], confidences[keep])
+
+
+def decode_end2end(output, confidence_threshold):
+    '''Decode NMS-free output shaped [1, max_det, 6] as xyxy/conf/cls'''
+    pred = output[0]
+    if pred.ndim != 3 or pred.shape[0] < 1 or pred.shape[2] < 6:
+        return empty_detections()
+
+    rows = pred[0]
+    x1, y1, x2, y2, confidences = rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4]
+    valid = (confidences >= confidence_threshold) & (x2 > x1) & (y2 > y1)
+    rows = rows[valid]
+    return make_detections(rows[:, :4], np.rint(rows[:, 5]), rows[:, 4])
+
+
+def detections_to_list(detections):
+    '''[((x1, y1, x2, y2), class_id, confidence)] with Python numbers'''
+    return [
+        (tuple(box), class_id, confidence)
+        for box, class_id, confidence in zip(
+            detections["box"].tolist(),
+            detections["class_id"].tolist(),
+            detections["confidence"].tolist(),
+        )
+    ]
+
+
+def _loopEnd2end(output, confidence_threshold):
+    '''The per-row decoder this replaced, kept for the benchmark'''
+    detections = []
+    for row in output[0][0]:
+        x1, y1, x2, y2, confidence, class_id = row[:6]
+        confidence = float(confidence)
+        if confidence < confidence_threshold:
+            continue
+        x1, y1, x2, y2 = float(x1), float(y1), float(x2), float(y2)
+        if x2 <= x1 or y2 <= y1:
+            continue
+        detections.append(((x1, y1, x2, y2), int(round(float(class_id))), confidence))
+    return detections
+
+
+def _cv2Yolo(output, confidence_threshold):
+    '''The NMSBoxes decoder this replaced, kept for the benchmark'''
+    outputs = np.squeeze(output[0])
+    class_probs = outputs[4:, :]
+    confidences = np.max(class_probs, axis=0)
+    mask = confidences > confidence_threshold
+    if not np.any(mask):
+        return []
+    filtered = confidences[mask]
+    class_ids = np.argmax(class_probs[:, mask], axis=0)
+    cx, cy, box_w, box_h = outputs[:4, mask]
+    boxes = np.stack((cx - box_w / 2.0, cy - box_h / 2.0, box_w, box_h), axis=1)
+    indices = cv2.dnn.NMSBoxes(boxes.tolist(), filtered.tolist(), confidence_threshold, NMS_THRESHOLD)
+    detections = []
+    for index in np.array(indices).flatten():
+        bx, by, bw, bh = boxes[index]
+        detections.append(((bx, by, bx + bw, by + bh), int(class_ids[index]), float(filtered[index])))
+    return detections
+
+
+def _syntheticYolo(rng, anchors, classes, objects, width, height):
+    '''Mostly background anchors plus a few clusters of overlapping confident boxes'''
+    output = np.zeros((1, 4 + classes, anchors), dtype=np.float32)
+    output[0, 0] = rng.uniform(0, width, anchors)
+    output[0, 1] = rng.uniform(0, height, anchors)
+    output[0, 2:4] = rng.uniform(10, 60, (2, anchors))
+    output[0, 4:] = rng.uniform(0, 0.2, (classes, anchors))
+    for _ in range(objects):
+        #neighbouring anchors all predict the object with slightly different boxes
+        center = rng.uniform((0, 0), (width, height))
+        size = rng.uniform(20, 60)
+        members = rng.choice(anchors, 20, replace=False)
+        output[0, 0:2, members] = center + rng.normal(0, 2, (20, 2))
+        output[0, 2:4, members] = size + rng.normal(0, 2, (20, 2))
+        output[0, 4 + rng.integers(classes), members] = rng.uniform(0.3, 0.95, 20)
+    return output
+
+
+def _syntheticEnd2end(rng, max_det, classes, objects, width, height):
+    output = np.zeros((1, max_det, 6), dtype=np.float32)
+    x1 = rng.uniform(0, width - 60, max_det)
+    y1 = rng.uniform(0, height - 60, max_det)
+    output[0, :, 0], output[0, :, 1] = x1, y1
+    output[0, :, 2], output[0, :, 3] = x1 + rng.uniform(10, 60, max_det), y1 + rng.uniform(10, 60, max_det)
+    output[0, :, 4] = rng.uniform(0, 0.1, max_det)
+    output[0, :objects, 4] = rng.uniform(0.3, 0.95, objects)
+    output[0, :, 5] = rng.integers(0, classes, max_det)
+    return output
+
+
+if __name__ == "__main__":
+    import argparse
+    argParser = argparse.ArgumentParser(description="Compare vectorized and per-row detection decoding.")
+    argParser.add_argument("--repeat", type=int, default=200)
+    argParser.add_argument("--objects", type=int, default=15, help="tokens on screen")
+    argParser.add_argument("--confidence", type=float, default=0.3)
+    args = argParser.parse_args()
+    rng = np.random.default_rng(0)
+
+    def timeit(decode, output):
+        output = [output] #run_model returns a list of outputs
+        decode(output, args.confidence)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = decode(output, args.confidence)
+        return (time.perf_counter() - start) / args.repeat * 1000, result
+
+    cases = [
+        ("end2end max_det=300", _syntheticEnd2end(rng, 300, 20, args.objects, 992, 480), _loopEnd2end, decode_end2end),
+        ("end2end max_det=1000", _syntheticEnd2end(rng, 1000, 20, args.objects, 992, 480), _loopEnd2end, decode_end2end),
+    ]
+    if cv2 is not None:
+        cases += [
+            ("yolo 640x640 (8400 anchors, 2 classes)", _syntheticYolo(rng, 8400, 2, args.objects, 640, 640), _cv2Yolo, decode_yolo),
+            ("yolo 992x480 (9765 anchors, 20 classes)", _syntheticYolo(rng, 9765, 20, args.objects, 992, 480), _cv2Yolo, decode_yolo),
+        ]
+    else:
+        print("OpenCV is not installed, skipping the yolo comparison")
+
+    for label, output, before, after in cases:
+        beforeMs, beforeResult = timeit(before, output)
+        afterMs, afterResult = timeit(after, output)
+        print(f"{label}: {beforeMs:.3f}ms -> {afterMs:.3f}ms per frame, "
+              f"{len(beforeResult)} vs {len(afterResult)} detections")
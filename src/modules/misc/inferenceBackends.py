@@ -0,0 +1,259 @@
+"""
+Inference backends for the ONNX token, sprinkler and blooms models.
+
+A backend wraps a loaded model behind run(image), which takes the NCHW float32
+blob the ONNX preprocessing builds and returns the list of model outputs, like
+run_model in ai_gather_common expects.
+
+    opencv       cv2.dnn, always available when OpenCV is
+    onnxruntime  ONNX Runtime on the CPU, with control over its thread pools and
+                 graph optimizations. Outputs with a fixed shape are bound to
+                 preallocated arrays (IO binding), so a frame doesn't allocate
+                 its output tensors. Can run a dynamically quantized int8 copy
+                 of the model, made next to it on first use.
+
+"auto" picks onnxruntime when it is installed and falls back to opencv.
+
+Run from the src folder to compare per-frame latency and detections across
+backends on recorded frames (a folder of images or a video file):
+    python -m modules.misc.inferenceBackends --model data/user/ai_models/token_detection_standard.onnx --frames recording.mp4
+"""
+
+import time
+from pathlib import Path
+
+try:
+    import cv2
+except Exception:
+    cv2 = None
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    import onnxruntime as ort
+except Exception:
+    ort = None
+
+OPTIMIZATION_LEVELS = {
+    "disabled": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+
+class OpenCVDnnBackend:
+    name = "opencv"
+
+    def __init__(self, model_path, **options):
+        if cv2 is None:
+            raise RuntimeError("OpenCV is required for ONNX AI gathering.")
+        self.model_path = Path(model_path)
+        self.net = cv2.dnn.readNetFromONNX(str(model_path))
+
+    def run(self, image):
+        self.net.setInput(image)
+        return [self.net.forward()]
+
+
+class OnnxRuntimeBackend:
+    name = "onnxruntime"
+
+    def __init__(
+        self,
+        model_path,
+        intra_op_threads=0,
+        inter_op_threads=0,
+        optimization_level="all",
+        quantized=False,
+        io_binding=True,
+        **options,
+    ):
+        '''
+        intra_op_threads, inter_op_threads: 0 lets onnxruntime decide
+        optimization_level: disabled, basic, extended or all
+        quantized: run an int8 dynamically quantized copy of the model
+        '''
+        if ort is None:
+            raise RuntimeError("onnxruntime is not installed")
+        self.model_path = Path(model_path)
+        if quantized:
+            self.model_path = quantized_model_path(self.model_path)
+            self.name = "onnxruntime-int8"
+
+        sessionOptions = ort.SessionOptions()
+        sessionOptions.intra_op_num_threads = max(0, int(intra_op_threads))
+        sessionOptions.inter_op_num_threads = max(0, int(inter_op_threads))
+        sessionOptions.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        #the scanners run a frame every few dozen ms, don't keep cores spinning in between
+        sessionOptions.add_session_config_entry("session.intra_op.allow_spinning", "0")
+        level = OPTIMIZATION_LEVELS.get(str(optimization_level).lower(), "ORT_ENABLE_ALL")
+        sessionOptions.graph_optimization_level = getattr(ort.GraphOptimizationLevel, level)
+        self.session = ort.InferenceSession(
+            str(self.model_path),
+            sess_options=sessionOptions,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_names = [output.name for output in self.session.get_outputs()]
+
+        self.binding = None
+        self.outputs = None
+        if io_binding:
+            self._bind_outputs()
+
+    def _bind_outputs(self):
+        '''Preallocate every output when all of their shapes are fixed, otherwise run without binding'''
+        outputs = []
+        for output in self.session.get_outputs():
+            if not all(isinstance(dim, int) and dim > 0 for dim in output.shape):
+                return
+            if output.type != "tensor(float)":
+                return
+            outputs.append(np.empty(output.shape, dtype=np.float32))
+        self.binding = self.session.io_binding()
+        for name, array in zip(self.output_names, outputs):
+            self.binding.bind_output(name, "cpu", 0, np.float32, array.shape, array.ctypes.data)
+        self.outputs = outputs
+
+    def run(self, image):
+        '''
+        With IO binding the returned arrays are reused by the next run, decode them
+        before running the model again.
+        '''
+        if self.binding is None:
+            return self.session.run(self.output_names, {self.input_name: image})
+        image = np.ascontiguousarray(image, dtype=np.float32)
+        self.binding.bind_cpu_input(self.input_name, image)
+        self.session.run_with_iobinding(self.binding)
+        return self.outputs
+
+
+BACKENDS = {
+    "opencv": OpenCVDnnBackend,
+    "onnxruntime": OnnxRuntimeBackend,
+}
+
+
+def quantized_model_path(model_path):
+    '''The int8 copy of model_path, quantized on first use and when the model is newer'''
+    model_path = Path(model_path)
+    target = model_path.with_name(model_path.stem + ".int8.onnx")
+    if target.exists() and target.stat().st_mtime >= model_path.stat().st_mtime:
+        return target
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    print(f"Quantizing {model_path.name} to int8")
+    temp = target.with_name(target.name + ".tmp")
+    quantize_dynamic(str(model_path), str(temp), weight_type=QuantType.QUInt8)
+    temp.replace(target)
+    return target
+
+
+def resolve_backend(backend="auto"):
+    backend = str(backend or "auto").lower()
+    if backend == "auto":
+        return "onnxruntime" if ort is not None else "opencv"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    return backend
+
+
+def load(model_path, backend="auto", **options):
+    '''
+    Load model_path with backend. When onnxruntime was picked automatically and
+    fails to load the model, fall back to opencv.
+    '''
+    name = resolve_backend(backend)
+    try:
+        return BACKENDS[name](model_path, **options)
+    except Exception as e:
+        if str(backend or "auto").lower() != "auto" or name == "opencv":
+            raise
+        print(f"onnxruntime could not load {Path(model_path).name} ({e}), using opencv")
+        return OpenCVDnnBackend(model_path, **options)
+
+
+def _loadFrames(path, limit):
+    import os
+    frames = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path))[:limit]:
+            frame = cv2.imread(os.path.join(path, name))
+            if frame is not None:
+                frames.append(frame)
+        return frames
+    capture = cv2.VideoCapture(path)
+    while len(frames) < limit:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+if __name__ == "__main__":
+    import argparse
+    from modules.misc import ai_gather_common as agc
+    argParser = argparse.ArgumentParser(description="Compare inference backends on an ONNX model.")
+    argParser.add_argument("--model", required=True, help="token, sprinkler or blooms .onnx model")
+    argParser.add_argument("--frames", help="folder of images or a video file, random frames if not given")
+    argParser.add_argument("--count", type=int, default=100)
+    argParser.add_argument("--size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"),
+                           help="model input size, taken from the model when it is fixed")
+    argParser.add_argument("--confidence", type=float, default=0.3)
+    argParser.add_argument("--intra", type=int, default=0, help="onnxruntime intra-op threads")
+    argParser.add_argument("--inter", type=int, default=0, help="onnxruntime inter-op threads")
+    argParser.add_argument("--optimization", default="all", choices=list(OPTIMIZATION_LEVELS))
+    argParser.add_argument("--warmup", type=int, default=5)
+    args = argParser.parse_args()
+
+    candidates = [("opencv", {})]
+    if ort is not None:
+        options = {"intra_op_threads": args.intra, "inter_op_threads": args.inter, "optimization_level": args.optimization}
+        candidates.append(("onnxruntime", options))
+        candidates.append(("onnxruntime", dict(options, io_binding=False)))
+        candidates.append(("onnxruntime", dict(options, quantized=True)))
+    else:
+        print("onnxruntime is not installed, only opencv will run")
+
+    width, height = args.size or (agc.INPUT_WIDTH, agc.INPUT_HEIGHT)
+    if args.size is None and ort is not None:
+        shape = ort.InferenceSession(args.model, providers=["CPUExecutionProvider"]).get_inputs()[0].shape
+        if isinstance(shape[2], int) and isinstance(shape[3], int):
+            height, width = shape[2], shape[3]
+
+    if args.frames:
+        frames = _loadFrames(args.frames, args.count)
+    else:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(args.count)]
+    if not frames:
+        raise SystemExit("No frames found")
+    images = [agc.preprocess_onnx_image(frame, width, height) for frame in frames]
+
+    print(f"{len(images)} frames at {width}x{height}")
+    for name, options in candidates:
+        try:
+            backend = load(args.model, name, **options)
+        except Exception as e:
+            print(f"{name}: could not load ({e})")
+            continue
+        label = backend.name + ("" if options.get("io_binding", True) or name == "opencv" else " (no io binding)")
+        for image in images[:args.warmup]:
+            backend.run(image)
+        latencies = []
+        detections = 0
+        for image in images:
+            start = time.perf_counter()
+            output = backend.run(image)
+            latencies.append(time.perf_counter() - start)
+            detections += len(agc.postprocess(output, args.confidence))
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{label}: p50 {p50*1000:.1f}ms p95 {p95*1000:.1f}ms, "
+              f"{detections/len(images):.2f} detections/frame")
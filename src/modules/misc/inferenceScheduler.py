@@ -0,0 +1,154 @@
+"""
+Adaptive detector cadence for the AI gather scanners.
+
+A fixed scan interval runs the model as often on a slow machine, where it can
+take most of the interval and starve the rest of the macro, as on a fast one,
+where it could run more often. The scheduler picks the interval to the next
+detector run instead:
+
+    moving     the camera moves with the player, run more often (moving_factor)
+    targets    something to chase is visible, slightly more often the more there
+               are (density_gain per target, up to density_cap)
+    idle       standing still with nothing visible, run less often (idle_factor)
+    urgent     a decision is waited on (e.g. the pattern needs a fresh scan after
+               a walk), run at min_interval
+
+The result is kept between min_interval and max_interval, then raised so the
+model's measured latency takes at most cpu_budget of the wall time: the budget
+wins over max_interval, so a slow machine runs the model less often instead of
+back to back.
+
+It also measures the capture to decision latency (from the capture of the frame
+a decision was made on to the decision being published) and the decision rate,
+see summary() for the debug log.
+
+Run from the src folder to see the intervals it picks for a range of model
+latencies:
+    python -m modules.misc.inferenceScheduler [--budget 0.5]
+"""
+
+import time
+
+MIN_INTERVAL = 0.04
+MAX_INTERVAL = 0.5
+CPU_BUDGET = 0.5 #share of the wall time the detector may run for
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        base_interval,
+        min_interval=MIN_INTERVAL,
+        max_interval=MAX_INTERVAL,
+        cpu_budget=CPU_BUDGET,
+        moving_factor=0.75,
+        idle_factor=2.0,
+        density_gain=0.05,
+        density_cap=8,
+    ):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cpu_budget = cpu_budget
+        self.moving_factor = moving_factor
+        self.idle_factor = idle_factor
+        self.density_gain = density_gain
+        self.density_cap = density_cap
+        self.interval = base_interval
+        self.reason = "base"
+        self.latency = None #smoothed seconds per detector run
+        self.runs = 0
+        self.decision_latency = None
+        self.decision_rate = None
+        self.last_decision = None
+
+    def record_inference(self, elapsed):
+        '''Seconds a detector run took, preprocessing to decoded detections'''
+        self.runs += 1
+        self.latency = elapsed if self.latency is None else self.latency * 0.8 + elapsed * 0.2
+
+    def record_decision(self, captured_at=None, decided_at=None):
+        '''
+        A decision was published. captured_at is when the frame it was made on was
+        captured, None for decisions that didn't look at a new frame (they only
+        count towards the rate).
+        '''
+        decided_at = time.time() if decided_at is None else decided_at
+        if captured_at:
+            latency = max(decided_at - captured_at, 0.0)
+            self.decision_latency = latency if self.decision_latency is None else self.decision_latency * 0.8 + latency * 0.2
+        if self.last_decision is not None and decided_at > self.last_decision:
+            rate = 1.0 / (decided_at - self.last_decision)
+            self.decision_rate = rate if self.decision_rate is None else self.decision_rate * 0.8 + rate * 0.2
+        self.last_decision = decided_at
+
+    def budget_interval(self):
+        '''Shortest interval that keeps the detector within the CPU budget'''
+        if not self.latency or self.cpu_budget <= 0:
+            return 0.0
+        return self.latency / min(self.cpu_budget, 1.0)
+
+    def plan(self, moving=False, targets=0, urgent=False):
+        '''Pick the interval to the next detector run, returns it in seconds'''
+        if urgent:
+            self.interval, self.reason = self.min_interval, "urgent"
+            return self.interval
+
+        if moving:
+            interval, reason = self.base_interval * self.moving_factor, "moving"
+        elif targets > 0:
+            interval = self.base_interval / (1.0 + self.density_gain * min(targets, self.density_cap))
+            reason = f"{targets} targets"
+        else:
+            interval, reason = self.base_interval * self.idle_factor, "idle"
+        interval = min(max(interval, self.min_interval), self.max_interval)
+
+        floor = self.budget_interval()
+        if floor > interval:
+            interval, reason = floor, reason + ", cpu budget"
+        self.interval, self.reason = interval, reason
+        return interval
+
+    def stats(self):
+        return {
+            "interval_ms": self.interval * 1000.0,
+            "reason": self.reason,
+            "model_ms": (self.latency or 0.0) * 1000.0,
+            "cpu_share": (self.latency or 0.0) / self.interval if self.interval > 0 else 0.0,
+            "capture_to_decision_ms": (self.decision_latency or 0.0) * 1000.0,
+            "decisions_per_second": self.decision_rate or 0.0,
+            "runs": self.runs,
+        }
+
+    def summary(self):
+        stats = self.stats()
+        return (
+            f"interval={stats['interval_ms']:.0f}ms ({stats['reason']}) model={stats['model_ms']:.1f}ms "
+            f"cpu={100.0 * min(stats['cpu_share'], 1.0):.0f}%/{100.0 * self.cpu_budget:.0f}% "
+            f"capture_to_decision={stats['capture_to_decision_ms']:.0f}ms "
+            f"decisions={stats['decisions_per_second']:.1f}/s runs={stats['runs']}"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+    argParser = argparse.ArgumentParser(description="Show the detector intervals picked for a range of model latencies.")
+    argParser.add_argument("--base", type=float, default=0.08, help="nominal interval in seconds")
+    argParser.add_argument("--budget", type=float, default=CPU_BUDGET)
+    args = argParser.parse_args()
+
+    situations = [
+        ("idle", {}),
+        ("1 target", {"targets": 1}),
+        ("8 targets", {"targets": 8}),
+        ("moving", {"moving": True}),
+    ]
+    print(f"base {args.base * 1000:.0f}ms, cpu budget {args.budget * 100:.0f}% (fixed interval: {1 / args.base:.1f} runs/s)")
+    for latencyMs in (5, 15, 40, 80, 150):
+        scheduler = InferenceScheduler(args.base, cpu_budget=args.budget)
+        scheduler.record_inference(latencyMs / 1000.0)
+        cells = []
+        for label, situation in situations:
+            interval = scheduler.plan(**situation)
+            cells.append(f"{label} {interval * 1000:.0f}ms ({min(latencyMs / 1000.0 / interval, 1.0) * 100:.0f}% cpu)")
+        print(f"model {latencyMs}ms: " + ", ".join(cells))
@@ -0,0 +1,189 @@
+"""
+Model input preprocessing into preallocated buffers.
+
+preprocess_onnx_image and letterbox_rgb build every input from scratch: a
+resized copy, a color converted copy, a float copy, a transposed copy and, for
+letterboxing, a fresh padded canvas. At a scan every 80ms that is a steady
+stream of multi-megabyte allocations. The engine keeps the buffers of each input
+geometry (size and layout) and reuses them: the frame is resized straight into
+its buffer (into the letterbox canvas for petal layouts) with cv2.resize(dst=...),
+and the channel swap, HWC to CHW and /255 happen in one pass into the float
+tensor. Buffers are only allocated again when the geometry or the frame size
+changes.
+
+The returned image is the engine's buffer and is overwritten by the next frame of
+the same geometry, so finish inference on it before preprocessing the next one.
+CoreML layouts still allocate the PIL image handed to the model.
+
+Run from the src folder to compare memory allocated per frame and per-frame
+latency with the allocating preprocessing:
+    python -m modules.misc.preprocessEngine [--frames 200]
+"""
+
+import time
+
+try:
+    import cv2
+except Exception:
+    cv2 = None
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    from PIL import Image
+except Exception:
+    Image = None
+
+LETTERBOX_FILL = 114
+
+
+class PreprocessEngine:
+    def __init__(self):
+        self.buffers = {} #(width, height, layout): {name: array}
+        self.transforms = {}
+        self.allocations = 0
+        self.frames = 0
+
+    def _buffer(self, key, name, shape, dtype, fill=None):
+        buffers = self.buffers.setdefault(key, {})
+        array = buffers.get(name)
+        if array is None or array.shape != shape or array.dtype != dtype:
+            array = np.empty(shape, dtype=dtype) if fill is None else np.full(shape, fill, dtype=dtype)
+            buffers[name] = array
+            self.allocations += 1
+        return array
+
+    def run(self, frame, input_width, input_height, layout):
+        '''Returns (image, letterbox transform or None) like the preprocess_* functions'''
+        input_width = int(input_width)
+        input_height = int(input_height)
+        key = (input_width, input_height, layout)
+        self.frames += 1
+        if layout in ("petal_onnx", "petal_coreml"):
+            resized, transform = self._letterbox(key, frame, input_width, input_height)
+        else:
+            resized, transform = self._resize(key, frame, input_width, input_height), None
+
+        if layout in ("onnx", "petal_onnx"):
+            tensor = self._buffer(key, "tensor", (1, 3, input_height, input_width), np.float32)
+            bgr_to_chw_rgb(resized, tensor[0])
+            return tensor, transform
+
+        if Image is None:
+            raise RuntimeError("Pillow is required for CoreML inference.")
+        rgb = self._buffer(key, "rgb", (input_height, input_width, 3), np.uint8)
+        cv2.cvtColor(resized, cv2.COLOR_BGRA2RGB if resized.shape[2] == 4 else cv2.COLOR_BGR2RGB, dst=rgb)
+        return Image.fromarray(rgb), transform
+
+    def _resize(self, key, frame, input_width, input_height):
+        if frame.shape[1] == input_width and frame.shape[0] == input_height:
+            return frame
+        resized = self._buffer(key, "resized", (input_height, input_width, frame.shape[2]), np.uint8)
+        return resize_into(frame, resized)
+
+    def _letterbox(self, key, frame, input_width, input_height):
+        frame_height, frame_width, channels = frame.shape
+        canvas = self._buffer(key, "canvas", (input_height, input_width, channels), np.uint8, LETTERBOX_FILL)
+        transform = self.transforms.get(key)
+        if transform is None or transform["source"] != (frame_width, frame_height, channels):
+            scale = min(input_width / float(frame_width), input_height / float(frame_height))
+            resized_width = max(1, int(round(frame_width * scale)))
+            resized_height = max(1, int(round(frame_height * scale)))
+            transform = {
+                "scale": scale,
+                "pad_x": (input_width - resized_width) // 2,
+                "pad_y": (input_height - resized_height) // 2,
+                "size": (resized_width, resized_height),
+                "source": (frame_width, frame_height, channels),
+            }
+            self.transforms[key] = transform
+            canvas[:] = LETTERBOX_FILL #the padding stays put until the frame size changes
+        resized_width, resized_height = transform["size"]
+        pad_x, pad_y = transform["pad_x"], transform["pad_y"]
+        resize_into(frame, canvas[pad_y:pad_y + resized_height, pad_x:pad_x + resized_width])
+        return canvas, transform
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "allocations": self.allocations,
+            "buffer_bytes": sum(array.nbytes for buffers in self.buffers.values() for array in buffers.values()),
+        }
+
+
+def resize_into(frame, dst):
+    resized = cv2.resize(frame, (dst.shape[1], dst.shape[0]), dst=dst, interpolation=cv2.INTER_LINEAR)
+    if resized is not dst:
+        #opencv allocated instead of writing into the view
+        dst[...] = resized
+    return dst
+
+
+def bgr_to_chw_rgb(src, dst):
+    '''Write the BGR(A) uint8 image src into the float32 CHW array dst as RGB / 255'''
+    scale = np.float32(1.0 / 255.0)
+    for channel in range(3):
+        np.multiply(src[:, :, 2 - channel], scale, out=dst[channel], dtype=np.float32)
+    return dst
+
+
+def _transientBytes(preprocess, frames):
+    '''Largest amount numpy allocated while preprocessing one frame, numpy reports its buffers to tracemalloc'''
+    import tracemalloc
+    tracemalloc.start()
+    preprocess(frames[0]) #let the engine make its buffers first
+    peak = 0
+    for frame in frames:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        preprocess(frame)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return peak
+
+
+if __name__ == "__main__":
+    import argparse
+    from modules.misc import ai_gather_common as agc
+    argParser = argparse.ArgumentParser(description="Compare allocating and preallocated model preprocessing.")
+    argParser.add_argument("--frames", type=int, default=200)
+    argParser.add_argument("--width", type=int, default=agc.ROBLOX_VIEWPORT_WIDTH)
+    argParser.add_argument("--height", type=int, default=agc.ROBLOX_VIEWPORT_HEIGHT)
+    args = argParser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (args.height, args.width, 4), dtype=np.uint8) for _ in range(4)]
+    crop = (agc.AT_CROP[0], agc.AT_CROP[1], agc.INPUT_WIDTH, agc.INPUT_HEIGHT)
+    cases = [
+        ("token", "onnx", agc.INPUT_WIDTH, agc.INPUT_HEIGHT, crop),
+        ("sprinkler", "onnx", agc.SPRINKLER_INPUT_WIDTH, agc.SPRINKLER_INPUT_HEIGHT, None),
+        ("petal", "petal_onnx", 640, 640, None),
+    ]
+    baseline = {
+        "onnx": lambda frame, w, h: agc.preprocess_onnx_image(frame, w, h),
+        "petal_onnx": lambda frame, w, h: agc.preprocess_petal_onnx_image(frame, w, h)[0],
+    }
+
+    print(f"{args.frames} frames of {args.width}x{args.height} BGRA")
+    for name, layout, width, height, rect in cases:
+        engine = PreprocessEngine()
+        inputs = [agc.crop_rect(frame, rect) if rect else frame for frame in frames]
+        expected = baseline[layout](inputs[0], width, height)
+        actual = engine.run(inputs[0], width, height, layout)[0]
+        difference = float(np.abs(expected - actual).max())
+        for label, preprocess in (
+            ("before", lambda frame: baseline[layout](frame, width, height)),
+            ("after", lambda frame: engine.run(frame, width, height, layout)[0]),
+        ):
+            transient = _transientBytes(preprocess, inputs)
+            start = time.perf_counter()
+            for i in range(args.frames):
+                preprocess(inputs[i % len(inputs)])
+            elapsed = time.perf_counter() - start
+            print(f"{name} {width}x{height} {label}: {elapsed / args.frames * 1000:.2f}ms/frame, "
+                  f"{transient / 1024 / 1024:.1f}MB allocated per frame")
+        print(f"{name}: max difference {difference:.2g}, engine buffers allocated {engine.allocations} times "
+              f"over {engine.frames} frames")
@@ -0,0 +1,219 @@
+"""
+Quest title index for fuzzy matching OCR'd quest titles.
+
+findQuest maps an OCR'd title to a quest in quest_data.txt with fuzzywuzzy's
+extractOne, which scores every title of the bear each time. QuestIndex is built
+once when quest_data is loaded: titles are normalized the way fuzzywuzzy
+does, and every title is filed under its character trigrams. A lookup
+gathers the titles that share the most trigrams with the OCR text and only
+scores those. When the shortlist has no confident match the full extractOne is
+run instead, so weak OCR reads are answered exactly as before. A confident
+shortlist match is not checked against the other titles, so it can differ from
+extractOne when a title outside the shortlist scores higher or ties earlier in
+quest_data order; the benchmark counts how often that happens. The last
+CACHE_SIZE results are memoized per bear and normalized text, OCR repeats the
+same misreads a lot.
+
+With recordPath set, every OCR text that isn't cached is appended to that file
+as a "bear|ocr text" line (macro records to data/user/quest_ocr.txt). Benchmark
+those recorded reads from the src folder, or generated misreads of every title
+without --fixture:
+    python -m modules.misc.questIndex [--fixture data/user/quest_ocr.txt]
+"""
+
+import os
+import time
+from collections import OrderedDict, defaultdict
+import fuzzywuzzy.process
+from fuzzywuzzy import utils as fuzzUtils
+
+SHORTLIST_SIZE = 5
+MIN_SHORTLIST_SCORE = 85 #below this the whole title list is scored, like before
+CACHE_SIZE = 256
+MAX_RECORD_BYTES = 256 * 1024 #stop recording OCR reads once the file is this large
+
+
+def loadQuestData(path="./data/bss/quest_data.txt"):
+    """{bear: {title: [objectives]}} from quest_data.txt"""
+    questData = {}
+    bear = ""
+    title = ""
+    info = []
+    with open(path, "r") as f:
+        lines = [x for x in f.read().split("\n") if x]
+
+    for line in lines:
+        if line.startswith("==") and line.endswith("=="): #bear
+            if title:
+                questData[bear][title] = info
+            bear = line.strip("=")
+            questData[bear] = {}
+            title, info = "", []
+
+        elif line.startswith("-"): #new quest title
+            if title:
+                questData[bear][title] = info
+            title = line.lstrip("-").strip()
+            info = []
+
+        else: #quest objectives
+            info.append(line)
+    questData[bear][title] = info
+    return questData
+
+
+def normalize(text):
+    """Same normalization fuzzywuzzy applies before scoring (lowercase, alphanumerics only)"""
+    return fuzzUtils.full_process(text, force_ascii=True)
+
+
+def trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+
+class QuestIndex:
+    def __init__(self, questData, recordPath=None):
+        self.questData = questData
+        self.recordPath = recordPath
+        self.titles = {} #bear -> titles in quest_data order (extractOne breaks ties by order)
+        self.normalizedTitles = {} #bear -> {title: normalized title}
+        self.postings = {} #bear -> {trigram: [title positions]}
+        self.cache = OrderedDict() #(bear, normalized text) -> result, least recently used first
+        self.stats = {"lookups": 0, "cached": 0, "shortlisted": 0, "fullScans": 0, "time": 0.0}
+        for bear, quests in questData.items():
+            titles = list(quests.keys())
+            self.titles[bear] = titles
+            self.normalizedTitles[bear] = {title: normalize(title) for title in titles}
+            postings = defaultdict(list)
+            for position, title in enumerate(titles):
+                for gram in trigrams(self.normalizedTitles[bear][title]):
+                    postings[gram].append(position)
+            self.postings[bear] = dict(postings)
+
+    def shortlist(self, bear, normalizedText, size=SHORTLIST_SIZE):
+        """Titles sharing the most trigrams with the text, in quest_data order"""
+        postings = self.postings.get(bear, {})
+        hits = defaultdict(int)
+        for gram in trigrams(normalizedText):
+            for position in postings.get(gram, ()):
+                hits[position] += 1
+        best = sorted(hits, key=lambda position: (-hits[position], position))[:size]
+        titles = self.titles[bear]
+        return [titles[position] for position in sorted(best)]
+
+    def match(self, bear, text):
+        """(title, score) like fuzzywuzzy.process.extractOne(text, quest_data[bear].keys()), see the module docstring"""
+        start = time.perf_counter()
+        self.stats["lookups"] += 1
+        normalizedText = normalize(text)
+        key = (bear, normalizedText)
+        result = self.cache.get(key)
+        if result is not None:
+            self.stats["cached"] += 1
+            self.cache.move_to_end(key)
+        else:
+            self.record(bear, text)
+            result = None
+            candidates = self.shortlist(bear, normalizedText) if normalizedText else []
+            if candidates:
+                result = fuzzywuzzy.process.extractOne(text, candidates)
+                if result is None or result[1] < MIN_SHORTLIST_SCORE:
+                    result = None
+                else:
+                    self.stats["shortlisted"] += 1
+            if result is None:
+                result = fuzzywuzzy.process.extractOne(text, self.titles[bear])
+                self.stats["fullScans"] += 1
+            self.cache[key] = result
+            if len(self.cache) > CACHE_SIZE:
+                self.cache.popitem(last=False)
+        self.stats["time"] += time.perf_counter() - start
+        return result
+
+    def record(self, bear, text):
+        """Append an OCR read to recordPath for the benchmark fixture"""
+        if not self.recordPath or "\n" in text:
+            return
+        try:
+            if os.path.exists(self.recordPath) and os.path.getsize(self.recordPath) >= MAX_RECORD_BYTES:
+                return
+            with open(self.recordPath, "a") as f:
+                f.write(f"{bear}|{text}\n")
+        except OSError:
+            pass
+
+
+def _noisyVariants(title, count, rng):
+    """OCR-like misreads of a title: dropped, swapped and confused characters"""
+    confusions = {"o": "0", "l": "1", "i": "l", "e": "c", "s": "5", "m": "rn", "a": "o", "u": "v"}
+    variants = []
+    for _ in range(count):
+        chars = list(title)
+        for _ in range(rng.randint(1, 3)):
+            if not chars:
+                break
+            i = rng.randrange(len(chars))
+            op = rng.random()
+            if op < 0.3:
+                del chars[i]
+            elif op < 0.6 and chars[i] in confusions:
+                chars[i] = confusions[chars[i]]
+            elif i + 1 < len(chars):
+                chars[i], chars[i+1] = chars[i+1], chars[i]
+        variants.append("".join(chars))
+    return variants
+
+
+def benchmark(fixturePath=None, repeats=5, seed=1):
+    """Compare index lookups to extractOne over the full title list. Returns the number of mismatches."""
+    import random
+    questData = loadQuestData()
+    if fixturePath:
+        with open(fixturePath, "r") as f:
+            queries = [tuple(line.rstrip("\n").split("|", 1)) for line in f if "|" in line]
+    else:
+        rng = random.Random(seed)
+        queries = [(bear, variant) for bear, quests in questData.items() for title in quests
+                   for variant in [title] + _noisyVariants(title, 4, rng)]
+    queries = [(bear, text) for bear, text in queries if bear in questData]
+    if not queries:
+        print("No queries to benchmark")
+        return 0
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        expected = [fuzzywuzzy.process.extractOne(text, questData[bear].keys()) for bear, text in queries]
+    fullTime = (time.perf_counter() - start) / (repeats * len(queries))
+
+    coldIndex = QuestIndex(questData)
+    start = time.perf_counter()
+    found = [coldIndex.match(bear, text) for bear, text in queries]
+    coldTime = (time.perf_counter() - start) / len(queries)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for bear, text in queries:
+            coldIndex.match(bear, text)
+    warmTime = (time.perf_counter() - start) / (repeats * len(queries))
+
+    mismatches = 0
+    for (bear, text), want, got in zip(queries, expected, found):
+        if want[0] != got[0]:
+            mismatches += 1
+            print(f"{bear}: '{text}' -> index '{got[0]}' ({got[1]}), extractOne '{want[0]}' ({want[1]})")
+    stats = coldIndex.stats
+    print(f"{len(queries)} queries, {mismatches} mismatches")
+    print(f"extractOne over all titles: {fullTime*1e6:.0f}us per lookup")
+    print(f"index, first lookup:        {coldTime*1e6:.0f}us per lookup")
+    print(f"index, repeated lookup:     {warmTime*1e6:.0f}us per lookup")
+    print(f"shortlist answered {stats['shortlisted']}, fell back to a full scan {stats['fullScans']}")
+    return mismatches
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    argParser = argparse.ArgumentParser(description="Benchmark the quest title index against extractOne.")
+    argParser.add_argument("--fixture", help='recorded "bear|ocr text" lines, defaults to generated misreads of every title')
+    args = argParser.parse_args()
+    sys.exit(1 if benchmark(args.fixture) else 0)
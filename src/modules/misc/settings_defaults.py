@@ -748,6 +748,8 @@ DEFAULT_GENERAL_SETTINGS = {'hive_number': 1,
  'route_guiding_star': '',
  'route_stream': '',
  'send_screenshot': True,
+ 'webhook_image_format': 'jpeg',
+ 'webhook_image_max_dimension': 1280,
  'enable_webhook': True,
  'live_gather_report': False,
  'live_gather_report_interval': 10,
@@ -2003,6 +2005,13 @@ FUZZY_AI_RUNTIME_DEFAULTS = {
     "fuzzy_ai_sprinkler_rescan_delay": 0.3,
     "fuzzy_ai_target_sprinkler_label": "",
     "fuzzy_ai_capture_backend": "auto",
+    "fuzzy_ai_inference_backend": "auto",
+    "fuzzy_ai_inference_intra_op_threads": 0,
+    "fuzzy_ai_inference_inter_op_threads": 0,
+    "fuzzy_ai_inference_optimization_level": "all",
+    "fuzzy_ai_inference_quantized": False,
+    "fuzzy_ai_tracker_detect_interval": 0.16,
+    "fuzzy_ai_inference_cpu_budget": 0.5,
     "fuzzy_ai_debug_mode": None,
     "fuzzy_ai_record_video": None,
     "fuzzy_ai_record_video_fps": None,
@@ -0,0 +1,320 @@
+"""
+Multi-object tracking of the AI gather detections between detector runs.
+
+A SORT-style tracker: every track keeps the box of its last detection and a
+constant velocity of the box center, so its position can be predicted at any time
+without running the model. When the detector runs, its detections are associated
+with the predicted tracks greedily by IoU, with a center distance gate for small
+boxes that moved further than their size (IoU is 0 for those), and only between
+the same class. Matched tracks keep their id and update their velocity, unmatched
+detections start new tracks. Tracks the last detector run missed are kept for
+max_age seconds to pick them up again, but not predicted, so a collected token
+doesn't linger.
+
+Boxes are x1, y1, x2, y2 in model input pixels like detectionDecode. update and
+predict return TRACK_DTYPE structured arrays: the DETECTION_DTYPE fields plus the
+track id and the seconds since the track was last detected, so they can be
+scored like the decoded detections.
+
+Run from the src folder to evaluate on a recording from the AI gather recording
+thread (data/user/recordings): the model runs on every frame as the reference,
+and running it every Nth frame with tracker predictions in between is compared
+with keeping the last detections:
+    python -m modules.misc.tokenTracker --model data/user/ai_models/token_detection_standard.onnx --video recording.mp4 [--every 2 3 4]
+"""
+
+import time
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from modules.misc import detectionDecode
+
+IOU_THRESHOLD = 0.1
+MAX_DISTANCE = 48.0 #center distance in model pixels a box may move between detections
+MAX_AGE = 0.6 #seconds a track is kept without a detection
+VELOCITY_SMOOTHING = 0.6 #weight of the newest velocity measurement
+
+TRACK_DTYPE = None if np is None else np.dtype(detectionDecode.DETECTION_DTYPE.descr + [
+    ("track_id", np.int32),
+    ("age", np.float32),
+])
+
+
+def box_centers(boxes):
+    return np.stack(((boxes[:, 0] + boxes[:, 2]) / 2.0, (boxes[:, 1] + boxes[:, 3]) / 2.0), axis=1)
+
+
+def iou_matrix(boxes_a, boxes_b):
+    '''IoU of every box in boxes_a with every box in boxes_b, shaped [len(a), len(b)]'''
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    overlap_w = np.maximum(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0)
+    overlap_h = np.maximum(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0)
+    intersection = overlap_w * overlap_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return intersection / np.maximum(area_a + area_b - intersection, 1e-6)
+
+
+def associate(boxes_a, classes_a, boxes_b, classes_b, iou_threshold=IOU_THRESHOLD, max_distance=MAX_DISTANCE):
+    '''
+    Greedy one to one matching of two box sets of the same class, cheapest pair
+    first. A pair qualifies with an IoU of at least iou_threshold or centers at
+    most max_distance apart, and costs 1 - IoU plus its distance over max_distance.
+    Returns a list of (index in a, index in b).
+    '''
+    if not len(boxes_a) or not len(boxes_b):
+        return []
+    iou = iou_matrix(boxes_a, boxes_b)
+    distance = np.linalg.norm(box_centers(boxes_a)[:, None, :] - box_centers(boxes_b)[None, :, :], axis=2)
+    valid = (classes_a[:, None] == classes_b[None, :]) & ((iou >= iou_threshold) | (distance <= max_distance))
+    cost = 1.0 - iou + distance / max(max_distance, 1e-6)
+    rows, cols = np.nonzero(valid)
+    order = np.argsort(cost[rows, cols], kind="stable")
+    used_a, used_b = set(), set()
+    pairs = []
+    for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+        if row in used_a or col in used_b:
+            continue
+        used_a.add(row)
+        used_b.add(col)
+        pairs.append((row, col))
+    return pairs
+
+
+class TokenTracker:
+    def __init__(
+        self,
+        iou_threshold=IOU_THRESHOLD,
+        max_distance=MAX_DISTANCE,
+        max_age=MAX_AGE,
+        velocity_smoothing=VELOCITY_SMOOTHING,
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.velocity_smoothing = velocity_smoothing
+        self.next_id = 1
+        self.updates = 0
+        self.predictions = 0
+        self.reset()
+
+    def reset(self):
+        '''Drop every track, e.g. when the camera was reset'''
+        self.boxes = np.zeros((0, 4), dtype=np.float32) #box at the last detection
+        self.velocity = np.zeros((0, 2), dtype=np.float64) #center px/s
+        self.measured = np.zeros(0, dtype=bool) #velocity was measured since the last reset_motion
+        self.class_ids = np.zeros(0, dtype=np.int32)
+        self.confidences = np.zeros(0, dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int32)
+        self.seen_at = np.zeros(0, dtype=np.float64)
+        self.missed = np.zeros(0, dtype=bool) #not matched by the last update
+
+    def reset_motion(self):
+        '''
+        Forget the velocities when the motion of the camera changes (the player
+        starts or stops walking), the next detection measures them again.
+        '''
+        self.velocity[:] = 0.0
+        self.measured[:] = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _predicted_boxes(self, now):
+        elapsed = (now - self.seen_at)[:, None]
+        shift = np.tile(self.velocity * elapsed, 2)
+        return (self.boxes + shift).astype(np.float32)
+
+    def _tracks(self, indices, boxes, now):
+        tracks = np.empty(len(indices), dtype=TRACK_DTYPE)
+        tracks["box"] = boxes
+        tracks["class_id"] = self.class_ids[indices]
+        tracks["confidence"] = self.confidences[indices]
+        tracks["track_id"] = self.ids[indices]
+        tracks["age"] = now - self.seen_at[indices]
+        return tracks
+
+    def update(self, detections, now=None):
+        '''
+        Associate a DETECTION_DTYPE array from the detector with the tracks.
+        Returns the detections in the same order as a TRACK_DTYPE array with
+        their track ids.
+        '''
+        now = time.time() if now is None else now
+        self.updates += 1
+        keep = now - self.seen_at <= self.max_age
+        if not keep.all():
+            self._select(keep)
+
+        boxes = detections["box"].astype(np.float32, copy=False)
+        class_ids = detections["class_id"].astype(np.int32, copy=False)
+        pairs = associate(
+            self._predicted_boxes(now), self.class_ids,
+            boxes, class_ids,
+            self.iou_threshold, self.max_distance,
+        )
+        track_of = np.full(len(detections), -1, dtype=np.intp)
+        self.missed[:] = True
+        if pairs:
+            tracks, matched = (np.asarray(indices, dtype=np.intp) for indices in zip(*pairs))
+            elapsed = np.maximum(now - self.seen_at[tracks], 1e-3)[:, None]
+            measured = (box_centers(boxes[matched]) - box_centers(self.boxes[tracks])) / elapsed
+            weight = np.where(self.measured[tracks], self.velocity_smoothing, 1.0)[:, None]
+            self.velocity[tracks] = weight * measured + (1.0 - weight) * self.velocity[tracks]
+            self.measured[tracks] = True
+            self.boxes[tracks] = boxes[matched]
+            self.class_ids[tracks] = class_ids[matched]
+            self.confidences[tracks] = detections["confidence"][matched]
+            self.seen_at[tracks] = now
+            self.missed[tracks] = False
+            track_of[matched] = tracks
+
+        new = np.flatnonzero(track_of < 0)
+        if new.size:
+            start = len(self.ids)
+            self.boxes = np.concatenate((self.boxes, boxes[new]))
+            self.velocity = np.concatenate((self.velocity, np.zeros((new.size, 2))))
+            self.measured = np.concatenate((self.measured, np.zeros(new.size, dtype=bool)))
+            self.class_ids = np.concatenate((self.class_ids, class_ids[new]))
+            self.confidences = np.concatenate((self.confidences, detections["confidence"][new]))
+            self.ids = np.concatenate((self.ids, np.arange(self.next_id, self.next_id + new.size, dtype=np.int32)))
+            self.seen_at = np.concatenate((self.seen_at, np.full(new.size, now)))
+            self.missed = np.concatenate((self.missed, np.zeros(new.size, dtype=bool)))
+            self.next_id += int(new.size)
+            track_of[new] = np.arange(start, start + new.size)
+
+        return self._tracks(track_of, boxes, now)
+
+    def predict(self, now=None):
+        '''Every track the last update matched at its predicted position as a TRACK_DTYPE array'''
+        now = time.time() if now is None else now
+        self.predictions += 1
+        live = np.flatnonzero(~self.missed & (now - self.seen_at <= self.max_age))
+        return self._tracks(live, self._predicted_boxes(now)[live], now)
+
+    def _select(self, mask):
+        self.boxes = self.boxes[mask]
+        self.velocity = self.velocity[mask]
+        self.measured = self.measured[mask]
+        self.class_ids = self.class_ids[mask]
+        self.confidences = self.confidences[mask]
+        self.ids = self.ids[mask]
+        self.seen_at = self.seen_at[mask]
+        self.missed = self.missed[mask]
+
+    def stats(self):
+        return {"tracks": len(self.ids), "updates": self.updates, "predictions": self.predictions}
+
+
+def _evaluate(reference, times, every, predict):
+    '''
+    Compare predictions with the reference detections on the frames the detector
+    skipped. reference_ids are the ids a tracker fed every frame gives, an id
+    switch is a reference object matched to a different predicted id than before.
+    '''
+    matched = missed = extra = switches = 0
+    errors = []
+    seen = {}
+    for index, (detections, reference_ids) in enumerate(reference):
+        predicted = predict(index, times[index])
+        if index % every == 0:
+            continue
+        pairs = associate(
+            predicted["box"], predicted["class_id"],
+            detections["box"], detections["class_id"],
+            iou_threshold=0.3, max_distance=0.0,
+        )
+        matched += len(pairs)
+        missed += len(detections) - len(pairs)
+        extra += len(predicted) - len(pairs)
+        for row, col in pairs:
+            errors.append(float(np.linalg.norm(box_centers(predicted["box"][row:row + 1] - detections["box"][col:col + 1]))))
+            if "track_id" in predicted.dtype.names:
+                reference_id = int(reference_ids[col])
+                track_id = int(predicted["track_id"][row])
+                if seen.get(reference_id, track_id) != track_id:
+                    switches += 1
+                seen[reference_id] = track_id
+    return {
+        "recall": matched / max(matched + missed, 1),
+        "precision": matched / max(matched + extra, 1),
+        "error": sum(errors) / max(len(errors), 1),
+        "switches": switches,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import cv2
+    from modules.misc import ai_gather_common as agc
+    from modules.misc import inferenceBackends
+    argParser = argparse.ArgumentParser(description="Evaluate token tracking between detector runs on a recorded gather video.")
+    argParser.add_argument("--model", required=True, help="token .onnx model")
+    argParser.add_argument("--video", required=True, help="recording from the AI gather recording thread")
+    argParser.add_argument("--every", type=int, nargs="+", default=[2, 3, 4], help="run the detector every N frames")
+    argParser.add_argument("--count", type=int, default=600)
+    argParser.add_argument("--confidence", type=float, default=0.3)
+    argParser.add_argument("--size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"),
+                           default=(agc.INPUT_WIDTH, agc.INPUT_HEIGHT), help="model input size")
+    argParser.add_argument("--backend", default="auto", choices=["auto"] + list(inferenceBackends.BACKENDS))
+    args = argParser.parse_args()
+
+    capture = cv2.VideoCapture(args.video)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 12.0
+    capture.release()
+    frames = inferenceBackends._loadFrames(args.video, args.count)
+    if not frames:
+        raise SystemExit("No frames found")
+    height, width = frames[0].shape[:2]
+    rect = agc.token_crop_for_capture({"width": width, "height": height})["rect"]
+    backend = inferenceBackends.load(args.model, args.backend)
+    inputWidth, inputHeight = args.size
+    decode = detectionDecode.decode_yolo if backend.run(
+        agc.preprocess_onnx_image(agc.crop_rect(frames[0], rect), inputWidth, inputHeight)
+    )[0].shape[-1] != 6 else detectionDecode.decode_end2end
+
+    #the detector on every frame is the reference
+    times = [index / fps for index in range(len(frames))]
+    referenceTracker = TokenTracker()
+    reference = []
+    inferenceSeconds = 0.0
+    for frame, now in zip(frames, times):
+        start = time.perf_counter()
+        image = agc.preprocess_onnx_image(agc.crop_rect(frame, rect), inputWidth, inputHeight)
+        detections = decode(backend.run(image), args.confidence)
+        inferenceSeconds += time.perf_counter() - start
+        reference.append((detections, referenceTracker.update(detections, now)["track_id"]))
+    inferenceMs = inferenceSeconds / len(frames) * 1000
+    print(f"{len(frames)} frames at {fps:.1f} fps, {backend.name} detector {inferenceMs:.1f}ms/frame, "
+          f"{sum(len(d) for d, _ in reference) / len(frames):.1f} tokens/frame")
+
+    for every in args.every:
+        last = {}
+
+        def hold(index, now):
+            if index % every == 0:
+                last["detections"] = reference[index][0]
+            return last["detections"]
+
+        tracker = TokenTracker()
+        trackerSeconds = [0.0]
+
+        def track(index, now):
+            start = time.perf_counter()
+            if index % every == 0:
+                result = tracker.update(reference[index][0], now)
+            else:
+                result = tracker.predict(now)
+            trackerSeconds[0] += time.perf_counter() - start
+            return result
+
+        for label, predict in (("hold last detections", hold), ("tracker", track)):
+            result = _evaluate(reference, times, every, predict)
+            extra = f", {trackerSeconds[0] / len(frames) * 1000:.3f}ms/frame, {result['switches']} id switches" if predict is track else ""
+            print(f"every {every} ({fps / every:.1f} detector runs/s, ~{inferenceMs * (every - 1) / every:.1f}ms/frame saved) "
+                  f"{label}: recall {result['recall']:.3f} precision {result['precision']:.3f} "
+                  f"center error {result['error']:.1f}px{extra}")
@@ -134,9 +134,19 @@ def locateImageOnScreen(target, x, y, w, h, threshold=0, scales=None, return_sca
     - Returns None when no match reaches `threshold`.
     """
     # capture screen region (same as before)
+    return locateImageInScreen(target, screenshotBGR(x, y, w, h), threshold, scales, return_scale, resize_interp, early_exit_thresh)
+
+def screenshotBGR(x, y, w, h):
+    """uint8 BGR capture of a region, the screen format locateImageInScreen expects"""
     screen = mssScreenshot(x, y, w, h)
     screen = cv2.cvtColor(np.array(screen), cv2.COLOR_RGB2BGR)
-    screen = _to_uint8(screen)
+    return _to_uint8(screen)
+
+def locateImageInScreen(target, screen, threshold=0, scales=None, return_scale=False, resize_interp=cv2.INTER_AREA, early_exit_thresh=0.995):
+    """
+    locateImageOnScreen on an already captured BGR screen (see screenshotBGR),
+    so several templates can be matched against one capture.
+    """
     if screen is None:
         return None
 
@@ -0,0 +1,171 @@
+"""
+Stitch a scrolled panel into one tall image.
+
+Consecutive captures of a scrolling panel overlap. The scroll offset between two
+captures is found by correlating their row profiles (mean color of a few column
+bands per row), and only the rows that weren't seen yet are appended. The result
+is a deduplicated canvas that can be OCR'd once instead of once per capture.
+
+Benchmark on a recorded scroll sequence from the src folder:
+    python -m modules.screen.scrollStitch ../quest_scroll_frames [--ocr]
+"""
+
+import time
+import numpy as np
+from PIL import Image
+
+PROFILE_BANDS = 8
+MAX_PROFILE_ERROR = 6.0 #mean gray level difference allowed for an overlap to count
+
+
+def rowProfile(frame):
+    """(height, PROFILE_BANDS) mean brightness of each row in a few column bands"""
+    gray = np.asarray(frame, dtype=np.float32)[..., :3].mean(axis=2)
+    bands = np.array_split(gray, PROFILE_BANDS, axis=1)
+    return np.stack([band.mean(axis=1) for band in bands], axis=1)
+
+
+def estimateScrollOffset(prevProfile, currProfile, minOverlap=40):
+    """How many rows the content moved up between two captures, and the mean profile error
+    at that offset. Returns (None, error) when the captures don't overlap."""
+    height = min(len(prevProfile), len(currProfile))
+    prevProfile, currProfile = prevProfile[:height], currProfile[:height]
+    maxShift = max(0, height - minOverlap)
+    errors = np.array([np.abs(prevProfile[shift:] - currProfile[:height - shift]).mean() for shift in range(maxShift + 1)])
+    shift = int(np.argmin(errors))
+    if errors[shift] > MAX_PROFILE_ERROR:
+        return None, float(errors[shift])
+    return shift, float(errors[shift])
+
+
+class ScrollStitcher:
+    """Accumulates captures of a panel scrolled downwards into one canvas"""
+
+    def __init__(self, minOverlap=40):
+        self.minOverlap = minOverlap
+        self.blocks = []
+        self.height = 0
+        self.frames = 0
+        self.lastShift = None
+        self._prevProfile = None
+
+    def add(self, frame):
+        """Add a capture. Returns how many new rows it contributed (0 means the panel didn't move)."""
+        arr = np.asarray(frame)
+        profile = rowProfile(arr)
+        self.frames += 1
+        if self._prevProfile is None:
+            newRows = len(arr)
+        else:
+            shift, _ = estimateScrollOffset(self._prevProfile, profile, self.minOverlap)
+            #no confident overlap: keep the whole capture rather than lose rows
+            newRows = len(arr) if shift is None else shift
+            self.lastShift = shift
+        if newRows:
+            self.blocks.append(arr[len(arr) - newRows:])
+            self.height += newRows
+        self._prevProfile = profile
+        return newRows
+
+    def canvas(self):
+        if not self.blocks:
+            return None
+        return Image.fromarray(np.concatenate(self.blocks, axis=0), "RGBA")
+
+
+class StitchedScan:
+    """A stitched panel plus an OCR pass over it that is run once and shared by every lookup"""
+
+    def __init__(self, canvas, frameHeight, scrolls=0, ocrTileOverlap=120):
+        self.canvas = canvas
+        self.frameHeight = frameHeight
+        self.scrolls = scrolls
+        self.ocrTileOverlap = ocrTileOverlap
+        self.ocrTime = 0
+        self._lines = None
+
+    def ocrLines(self):
+        """OCR lines of the whole canvas, in canvas coordinates: [(bbox, (text, conf))]"""
+        if self._lines is not None:
+            return self._lines
+        from modules.screen import ocr
+        start = time.perf_counter()
+        lines = []
+        height = self.canvas.height
+        tileHeight = self.frameHeight
+        stride = max(1, tileHeight - self.ocrTileOverlap)
+        top = 0
+        while True:
+            bottom = min(height, top + tileHeight)
+            last = bottom >= height
+            tile = self.canvas.crop((0, top, self.canvas.width, bottom))
+            for bbox, (text, conf) in ocr.ocrRead(tile):
+                if not text or not bbox or isinstance(bbox[0], str):
+                    continue
+                lineTop = min(point[1] for point in bbox)
+                #lines starting in the overlap are read again, whole, by the next tile
+                if not last and lineTop >= stride:
+                    continue
+                lines.append(([[point[0], point[1] + top] for point in bbox], (text, conf)))
+            if last:
+                break
+            top += stride
+        self._lines = lines
+        self.ocrTime = time.perf_counter() - start
+        return lines
+
+    def windows(self, stride=200):
+        """Frame sized views down the canvas with the OCR lines fully inside each view.
+        Every row of the canvas is within `stride` pixels of the top of some view."""
+        lines = self.ocrLines()
+        top = 0
+        while True:
+            bottom = min(self.canvas.height, top + self.frameHeight)
+            window = self.canvas.crop((0, top, self.canvas.width, bottom))
+            windowLines = [
+                ([[x, y - top] for x, y in bbox], result) for bbox, result in lines
+                if min(p[1] for p in bbox) >= top and max(p[1] for p in bbox) <= bottom
+            ]
+            yield window, windowLines
+            if bottom >= self.canvas.height:
+                break
+            top += stride
+
+
+def stitchFrames(frames, minOverlap=40):
+    stitcher = ScrollStitcher(minOverlap)
+    for frame in frames:
+        stitcher.add(frame)
+    return stitcher
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    import os
+    argParser = argparse.ArgumentParser(description="Stitch a recorded scroll sequence and report the savings.")
+    argParser.add_argument("folder", help="folder of frames, stitched in file name order")
+    argParser.add_argument("--ocr", action="store_true", help="also time OCR of every frame against OCR of the stitched canvas")
+    args = argParser.parse_args()
+
+    paths = sorted(p for p in glob.glob(os.path.join(args.folder, "*.png")) if not p.endswith(".out.png"))
+    frames = [Image.open(p).convert("RGBA") for p in paths]
+    if not frames:
+        raise SystemExit(f"No frames in {args.folder}")
+    start = time.perf_counter()
+    stitcher = stitchFrames(frames)
+    stitchTime = time.perf_counter() - start
+    canvas = stitcher.canvas()
+    totalRows = sum(f.height for f in frames)
+    print(f"{len(frames)} frames, {totalRows} rows -> {canvas.height} rows stitched "
+          f"({100 - canvas.height / totalRows * 100:.0f}% duplicate) in {stitchTime*1000:.0f}ms")
+    canvas.save(os.path.join(args.folder, "stitched.out.png"))
+    if args.ocr:
+        from modules.screen import ocr
+        start = time.perf_counter()
+        for frame in frames:
+            ocr.ocrRead(frame)
+        perFrame = time.perf_counter() - start
+        scan = StitchedScan(canvas, frames[0].height)
+        scan.ocrLines()
+        print(f"OCR every frame: {perFrame:.2f}s, OCR stitched canvas: {scan.ocrTime:.2f}s")
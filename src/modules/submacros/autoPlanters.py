@@ -0,0 +1,500 @@
+"""
+Auto planter decisions.
+
+AutoPlanterPlanner holds the auto planter state (the three planter slots, the
+last field used for each nectar and field degradation) and decides which
+planters to harvest and where to place the next ones. It only reads settings,
+the planter rankings, the current nectar percentages and the clock it is given,
+so the macro drives it with the live game and planterSimulator drives it with a
+simulated one.
+"""
+
+import json
+import time
+
+nectarNames=["comforting", "refreshing", "satisfying", "motivating", "invigorating"]
+nectarFields = {
+  "comforting": ["dandelion", "bamboo", "pine tree"],
+  "refreshing": ["coconut", "strawberry", "blue flower"],
+  "satisfying": ["pineapple", "sunflower", "pumpkin"],
+  "motivating": ["stump", "spider", "mushroom", "rose"],
+  "invigorating": ["pepper", "mountain top", "clover", "cactus"]
+}
+allPlanters = ["paper", "ticket", "festive", "sticker", "plastic", "candy", "red_clay", "blue_clay", "tacky", "pesticide", "heat-treated", "hydroponic", "petal", "planter_of_plenty"]
+with open("./data/bss/auto_planter_ranking.json", "r") as f:
+    autoPlanterRankings = json.load(f)
+
+fieldToNectar = {}
+for nectarName, fields in nectarFields.items():
+    for fieldName in fields:
+        fieldToNectar[fieldName] = nectarName
+
+
+def emptyAutoPlanterSlot():
+    return {
+        "planter": "",
+        "nectar": "",
+        "field": "",
+        "harvest_time": 0,
+        "nectar_est_percent": 0,
+        "placed_time": 0,
+        "grow_duration": 0,
+        "natural_grow_duration": 0
+    }
+
+
+def estimateNectarGain(planterObj, growTimeSeconds):
+    growTimeSeconds = max(0, growTimeSeconds)
+    return min(100.0, round((growTimeSeconds * planterObj["nectar_bonus"] * planterObj["grow_bonus"] / 864), 1))
+
+
+class AutoPlanterPlanner:
+    def __init__(self, setdat, data, getNectar, clock=time.time, rankings=None, log=print):
+        '''
+        setdat: macro settings
+        data: the contents of auto_planters.json
+        getNectar: nectar name -> current nectar percent
+        '''
+        self.setdat = setdat
+        self.getNectar = getNectar
+        self.clock = clock
+        self.rankings = autoPlanterRankings if rankings is None else rankings
+        self.log = log
+
+        self.planterData = data.get("planters", [])
+        self.nectarLastFields = data.get("nectar_last_field", {})
+        self.gatherFlag = data.get("gather", False)
+        self.fieldDegradation = data.get("field_degradation", {})
+
+        self.priorityMap = {}
+        for i in range(5):
+            nectar = setdat[f"auto_priority_{i}_nectar"]
+            if nectar == "none":
+                continue
+            self.priorityMap[nectar] = {
+                "min": float(setdat[f"auto_priority_{i}_min"]),
+                "index": i,
+                "weight": max(0.5, 1.35 - (i * 0.12))
+            }
+
+        self.currentNectarCache = {}
+        self.blockedPlacements = set()
+        self.blockedPlanters = set()
+
+        self.normalizeFieldDegradation()
+        self.planterData = [self.normalizeAutoPlanterSlot(slot) for slot in self.planterData[:3]]
+        while len(self.planterData) < 3:
+            self.planterData.append(emptyAutoPlanterSlot())
+        for nectarName in nectarNames:
+            self.nectarLastFields.setdefault(nectarName, "")
+
+    def toDict(self):
+        return {
+            "planters": self.planterData,
+            "nectar_last_field": self.nectarLastFields,
+            "gather": self.gatherFlag,
+            "field_degradation": self.fieldDegradation
+        }
+
+    def emptyFieldDegradationState(self):
+        return {
+            fieldName: {
+                "hours": 0.0,
+                "updated_at": 0.0
+            }
+            for fieldName in fieldToNectar
+        }
+
+    def getDecayedDegradationEntry(self, fieldName, defaultNow=None):
+        now = self.clock() if defaultNow is None else defaultNow
+        rawEntry = self.fieldDegradation.get(fieldName, {})
+
+        if isinstance(rawEntry, dict):
+            hours = float(rawEntry.get("hours", rawEntry.get("value", 0) or 0))
+            updatedAt = float(rawEntry.get("updated_at", now) or now)
+        else:
+            hours = float(rawEntry or 0)
+            updatedAt = now
+
+        elapsedHours = max(0.0, (now - updatedAt) / 3600.0)
+        remainingHours = max(0.0, min(48.0, hours - elapsedHours))
+        return {
+            "hours": remainingHours,
+            "updated_at": now
+        }
+
+    def normalizeFieldDegradation(self):
+        now = self.clock()
+        normalized = self.emptyFieldDegradationState()
+        for fieldName in normalized:
+            normalized[fieldName] = self.getDecayedDegradationEntry(fieldName, defaultNow=now)
+        self.fieldDegradation = normalized
+
+    def getPlanterRanking(self, field, planterName):
+        for planterObj in self.rankings.get(field, []):
+            if planterObj["name"] == planterName:
+                return planterObj
+        return None
+
+    def getEffectiveNaturalGrowTimeSeconds(self, fieldName, planterObj):
+        return max(0.0, (planterObj["grow_time"] + self.getFieldDegradationHours(fieldName)) * 60 * 60)
+
+    def normalizeAutoPlanterSlot(self, slot):
+        normalized = emptyAutoPlanterSlot()
+        if isinstance(slot, dict):
+            for key in normalized:
+                normalized[key] = slot.get(key, normalized[key])
+
+        if normalized["field"]:
+            normalized["field"] = normalized["field"].replace("_", " ")
+        if normalized["planter"] and not normalized["nectar"]:
+            normalized["nectar"] = fieldToNectar.get(normalized["field"], "")
+
+        ranking = None
+        if normalized["planter"] and normalized["field"]:
+            ranking = self.getPlanterRanking(normalized["field"], normalized["planter"])
+
+        if normalized["planter"] and ranking:
+            if normalized["grow_duration"] <= 0:
+                normalized["grow_duration"] = ranking["grow_time"] * 60 * 60
+            if normalized["natural_grow_duration"] <= 0:
+                normalized["natural_grow_duration"] = ranking["grow_time"] * 60 * 60
+            if normalized["placed_time"] <= 0 and normalized["harvest_time"] > 0:
+                normalized["placed_time"] = max(0, normalized["harvest_time"] - normalized["grow_duration"])
+            if normalized["nectar_est_percent"] <= 0:
+                normalized["nectar_est_percent"] = estimateNectarGain(ranking, normalized["grow_duration"])
+
+        return normalized
+
+    def getCurrentNectarPercent(self, nectar):
+        if nectar not in self.currentNectarCache:
+            try:
+                self.currentNectarCache[nectar] = self.getNectar(nectar)
+            except Exception:
+                self.currentNectarCache[nectar] = 0.0
+            self.log(f"Current {nectar} Nectar: {self.currentNectarCache[nectar]}%")
+        return self.currentNectarCache[nectar]
+
+    def getPriorityInfo(self, nectar):
+        return self.priorityMap.get(nectar, {"min": 100.0, "index": len(self.priorityMap), "weight": 0.35})
+
+    def getEstimateNectarPercent(self, nectar):
+        return sum(
+            max(0, planter.get("nectar_est_percent", 0))
+            for planter in self.planterData
+            if planter["planter"] and planter.get("nectar") == nectar
+        )
+
+    def getTotalNectarPercent(self, nectar):
+        return self.getCurrentNectarPercent(nectar) + self.getEstimateNectarPercent(nectar)
+
+    def calculatePlacementPlan(self, fieldName, planterObj, nectar, projectedNectarPercent):
+        now = self.clock()
+        projectedNectarPercent = max(0.0, projectedNectarPercent)
+        minPercent = max(self.getPriorityInfo(nectar)["min"], projectedNectarPercent)
+        naturalGrowTimeSeconds = self.getEffectiveNaturalGrowTimeSeconds(fieldName, planterObj)
+        naturalGrowTimeHours = naturalGrowTimeSeconds / 3600.0
+
+        if self.setdat["auto_planters_collect_auto"]:
+            nectarBonus = max(planterObj["nectar_bonus"], 0.1)
+            growBonus = max(planterObj["grow_bonus"], 0.1)
+            totalBonus = max(nectarBonus * growBonus, 0.1)
+            timeToCap = max(0.25, ((max(0, 100 - projectedNectarPercent) / nectarBonus) * 0.24) / growBonus)
+
+            if totalBonus < 1.2:
+                growTimeHours = min(timeToCap, 0.5)
+            elif minPercent > projectedNectarPercent and projectedNectarPercent <= 90:
+                if projectedNectarPercent > 20:
+                    bonusTime = (100 / projectedNectarPercent) * totalBonus
+                    growTimeHours = (((minPercent - projectedNectarPercent + bonusTime) / nectarBonus) * 0.24) / growBonus
+                elif projectedNectarPercent > 10:
+                    growTimeHours = min(naturalGrowTimeHours, 4)
+                else:
+                    growTimeHours = min(naturalGrowTimeHours, 2)
+            else:
+                growTimeHours = timeToCap
+
+            finalGrowTime = min(
+                naturalGrowTimeHours,
+                (growTimeHours + growTimeHours / totalBonus),
+                (timeToCap + timeToCap / totalBonus)
+            ) * 60 * 60
+            planterHarvestTime = now + finalGrowTime
+        elif self.setdat["auto_planters_collect_full"]:
+            finalGrowTime = naturalGrowTimeSeconds
+            planterHarvestTime = now + finalGrowTime
+        else:
+            finalGrowTime = min(naturalGrowTimeHours, self.setdat["auto_planters_collect_every"]) * 60 * 60
+            planterHarvestTime = now + finalGrowTime
+            for activePlanter in self.planterData:
+                harvestTime = activePlanter["harvest_time"]
+                if harvestTime > now and planterHarvestTime > harvestTime:
+                    planterHarvestTime = harvestTime
+            finalGrowTime = max(0, planterHarvestTime - now)
+
+        return {
+            "grow_duration": finalGrowTime,
+            "harvest_time": planterHarvestTime,
+            "placed_time": now,
+            "nectar_est_percent": estimateNectarGain(planterObj, finalGrowTime),
+            "natural_grow_duration": naturalGrowTimeSeconds
+        }
+
+    def savePlacedPlanter(self, slot, field, planterObj, nectar, placementPlan):
+        self.planterData[slot] = {
+            "planter": planterObj["name"],
+            "nectar": nectar,
+            "field": field,
+            "harvest_time": placementPlan["harvest_time"],
+            "nectar_est_percent": placementPlan["nectar_est_percent"],
+            "placed_time": placementPlan["placed_time"],
+            "grow_duration": placementPlan["grow_duration"],
+            "natural_grow_duration": placementPlan["natural_grow_duration"]
+        }
+        self.nectarLastFields[nectar] = field
+
+    def getFieldDegradationHours(self, fieldName):
+        entry = self.getDecayedDegradationEntry(fieldName)
+        self.fieldDegradation[fieldName] = entry
+        return entry["hours"]
+
+    def getNaturalPlanterProgress(self, planter):
+        if not planter["planter"]:
+            return 0.0
+        naturalGrowDuration = planter.get("natural_grow_duration", 0)
+        placedTime = planter.get("placed_time", 0)
+        if naturalGrowDuration > 0 and placedTime > 0:
+            return max(0.0, min(1.0, (self.clock() - placedTime) / naturalGrowDuration))
+        if planter["harvest_time"] <= self.clock():
+            return 1.0
+        return 0.0
+
+    def getPlanterProgress(self, planter):
+        return self.getNaturalPlanterProgress(planter)
+
+    def recordFieldDegradation(self, planter):
+        fieldName = planter.get("field")
+        planterName = planter.get("planter")
+        if not fieldName or not planterName:
+            return
+
+        ranking = self.getPlanterRanking(fieldName, planterName)
+        if not ranking:
+            return
+
+        naturalGrowHours = max(
+            ranking["grow_time"],
+            (planter.get("natural_grow_duration", 0) or 0) / 3600.0
+        )
+        progress = self.getNaturalPlanterProgress(planter)
+        degradationToAdd = 1.0 + (naturalGrowHours * max(0.0, progress))
+        currentHours = self.getFieldDegradationHours(fieldName)
+        self.fieldDegradation[fieldName] = {
+            "hours": min(48.0, currentHours + degradationToAdd),
+            "updated_at": self.clock()
+        }
+
+    def getPlanterSlotsToHarvest(self):
+        planterSlotsToHarvest = []
+        if self.setdat["auto_planters_collect_auto"]:
+            for nectarName in nectarNames:
+                matchingPlanters = []
+                currentNectarPercent = self.getCurrentNectarPercent(nectarName)
+                projectedNectarPercent = self.getTotalNectarPercent(nectarName)
+
+                if currentNectarPercent >= 99:
+                    requiredProgress = 0.0
+                elif projectedNectarPercent >= 120:
+                    requiredProgress = 0.55
+                elif currentNectarPercent >= 90 and projectedNectarPercent >= 110:
+                    requiredProgress = 0.75
+                else:
+                    continue
+
+                for slot, planter in enumerate(self.planterData):
+                    if planter["planter"] and planter.get("nectar") == nectarName:
+                        matchingPlanters.append((slot, planter, self.getNaturalPlanterProgress(planter)))
+
+                matchingPlanters.sort(key=lambda item: (-item[2], item[1]["harvest_time"]))
+                remainingProjected = projectedNectarPercent
+                targetProjected = max(self.getPriorityInfo(nectarName)["min"] + 5, 100)
+
+                for slot, planter, progress in matchingPlanters:
+                    timeRemaining = max(0, planter["harvest_time"] - self.clock())
+                    if currentNectarPercent < 99 and progress < requiredProgress and timeRemaining > 45 * 60:
+                        continue
+                    planterSlotsToHarvest.append(slot)
+                    remainingProjected -= max(0, planter.get("nectar_est_percent", 0))
+                    if remainingProjected <= targetProjected:
+                        break
+
+        for slot, planter in enumerate(self.planterData):
+            if planter["planter"] and self.clock() > planter["harvest_time"]:
+                planterSlotsToHarvest.append(slot)
+
+        return sorted(set(planterSlotsToHarvest))
+
+    def harvested(self, slot):
+        '''A planter was collected: degrade its field and free the slot'''
+        self.recordFieldDegradation(self.planterData[slot])
+        self.planterData[slot] = emptyAutoPlanterSlot()
+        self.currentNectarCache.clear()
+
+    def getMaxAllowedPlanters(self):
+        maxAllowedPlanters = 0
+        for planterName in allPlanters:
+            settingName = planterName.replace(" ", "_")
+            if self.setdat.get(f"auto_planter_{settingName}", False):
+                maxAllowedPlanters += 1
+        return min(maxAllowedPlanters, self.setdat["auto_max_planters"])
+
+    def getAvailableFields(self, occupiedFields):
+        return [
+            field for field in fieldToNectar
+            if self.setdat.get(f"auto_field_{field.replace(' ', '_')}", False) and field not in occupiedFields
+        ]
+
+    def buildPlacementCandidates(self, occupiedFields, occupiedPlanters):
+        candidates = []
+        for field in self.getAvailableFields(occupiedFields):
+            addedForField = 0
+            for planterObj in self.rankings.get(field, []):
+                planterName = planterObj["name"]
+                if planterName in occupiedPlanters or planterName in self.blockedPlanters or (planterName, field) in self.blockedPlacements:
+                    continue
+
+                settingPlanter = planterName.replace(" ", "_")
+                if not self.setdat.get(f"auto_planter_{settingPlanter}", False):
+                    continue
+                if not self.setdat.get(f"auto_planter_{settingPlanter}_field_{field.replace(' ', '_')}", True):
+                    continue
+
+                candidates.append({
+                    "field": field,
+                    "nectar": fieldToNectar[field],
+                    "planter": planterName,
+                    "planter_obj": planterObj
+                })
+                addedForField += 1
+                if addedForField >= 4:
+                    break
+        return candidates
+
+    def evaluateCandidate(self, candidate, projectedNectarPercentages, availableFieldCounts):
+        nectar = candidate["nectar"]
+        priorityInfo = self.getPriorityInfo(nectar)
+        projectedPercent = projectedNectarPercentages[nectar]
+        if projectedPercent >= max(priorityInfo["min"] + 20, 110):
+            return None
+
+        placementPlan = self.calculatePlacementPlan(candidate["field"], candidate["planter_obj"], nectar, projectedPercent)
+        if placementPlan["nectar_est_percent"] <= 0:
+            return None
+
+        deficitToMin = max(0.0, priorityInfo["min"] - projectedPercent)
+        if deficitToMin > 0:
+            needWeight = 1.0 + (deficitToMin / 18.0)
+        elif projectedPercent < 100:
+            needWeight = 0.45 + ((100 - projectedPercent) / 160.0)
+        else:
+            needWeight = max(0.05, 0.18 - ((projectedPercent - 100) / 120.0))
+
+        score = candidate["planter_obj"]["nectar_bonus"] * candidate["planter_obj"]["grow_bonus"]
+        score *= priorityInfo["weight"] * needWeight
+
+        if availableFieldCounts.get(nectar, 0) > 1 and self.nectarLastFields.get(nectar) == candidate["field"]:
+            score *= 0.97
+
+        degradationHours = self.getFieldDegradationHours(candidate["field"])
+        degradationPenalty = 1 / (1 + (degradationHours / 12.0))
+        score *= degradationPenalty
+        score *= max(0.1, candidate["planter_obj"]["grow_time"] / max(0.1, placementPlan["natural_grow_duration"] / 3600.0))
+
+        return {
+            "score": score,
+            "plan": placementPlan
+        }
+
+    def findBestPlacements(self, slotsRemaining, occupiedFields, occupiedPlanters, projectedNectarPercentages):
+        if slotsRemaining <= 0:
+            return 0.0, []
+
+        candidates = self.buildPlacementCandidates(occupiedFields, occupiedPlanters)
+        if not candidates:
+            return 0.0, []
+
+        availableFieldCounts = {}
+        for candidate in candidates:
+            nectar = candidate["nectar"]
+            availableFieldCounts[nectar] = availableFieldCounts.get(nectar, 0) + 1
+
+        scoredCandidates = []
+        for candidate in candidates:
+            evaluation = self.evaluateCandidate(candidate, projectedNectarPercentages, availableFieldCounts)
+            if evaluation and evaluation["score"] > 0:
+                scoredCandidates.append((evaluation["score"], candidate, evaluation["plan"]))
+
+        if not scoredCandidates:
+            return 0.0, []
+
+        scoredCandidates.sort(key=lambda item: item[0], reverse=True)
+        scoredCandidates = scoredCandidates[:36]
+
+        bestScore = 0.0
+        bestPlacements = []
+
+        for score, candidate, placementPlan in scoredCandidates:
+            updatedProjected = projectedNectarPercentages.copy()
+            updatedProjected[candidate["nectar"]] += placementPlan["nectar_est_percent"]
+
+            futureScore, futurePlacements = self.findBestPlacements(
+                slotsRemaining - 1,
+                occupiedFields | {candidate["field"]},
+                occupiedPlanters | {candidate["planter"]},
+                updatedProjected
+            )
+
+            totalScore = score + futureScore
+            if totalScore > bestScore:
+                bestScore = totalScore
+                bestPlacements = [(candidate, placementPlan)] + futurePlacements
+
+        return bestScore, bestPlacements
+
+    def getNextPlacement(self, maxAllowedPlanters):
+        '''
+        The next planter to place, as (slot, candidate, placementPlan).
+        Returns None when no more planters should be placed
+        '''
+        plantersPlaced = sum(bool(planter["planter"]) for planter in self.planterData)
+        if plantersPlaced >= maxAllowedPlanters:
+            return None
+
+        openSlots = [idx for idx, planter in enumerate(self.planterData) if not planter["planter"]]
+        if not openSlots:
+            return None
+
+        projectedNectarPercentages = {
+            nectarName: self.getTotalNectarPercent(nectarName)
+            for nectarName in nectarNames
+        }
+        occupiedFields = {planter["field"] for planter in self.planterData if planter["field"]}
+        occupiedPlanters = {planter["planter"] for planter in self.planterData if planter["planter"]}
+        _, plannedPlacements = self.findBestPlacements(
+            min(len(openSlots), maxAllowedPlanters - plantersPlaced),
+            occupiedFields,
+            occupiedPlanters,
+            projectedNectarPercentages
+        )
+
+        if not plannedPlacements:
+            return None
+
+        candidate, placementPlan = plannedPlacements[0]
+        return openSlots[0], candidate, placementPlan
+
+    def placementFailed(self, candidate, missingInventory):
+        if missingInventory:
+            self.blockedPlanters.add(candidate["planter"])
+        else:
+            self.blockedPlacements.add((candidate["planter"], candidate["field"]))
@@ -0,0 +1,235 @@
+"""
+Shared buff bar capture.
+
+Haste compensation, the hourly report buff/nectar readers and the uptime
+sampler all read the same strip at the top of the Roblox window. BuffBarParser
+captures it once and hands out a BuffBarSnapshot: the capture, its color
+conversions and the palette of colors on the bar, each computed on first use
+and then shared. Color lookups for a buff that isn't on the bar are answered
+from the palette without scanning the strip, and parsed values are kept on the
+snapshot so another consumer of the same capture gets them for free.
+
+Record fixtures and benchmark them from the src folder:
+    python -m modules.submacros.buffBarParser --record ../buffbar_fixtures
+    python -m modules.submacros.buffBarParser --fixtures ../buffbar_fixtures
+"""
+
+import threading
+import time
+import cv2
+import numpy as np
+from PIL import Image
+from modules.screen.screenshot import mssScreenshotNP
+
+BUFF_BAR_Y = 33 #below the top of the window (after the bss y offset)
+BUFF_BAR_HEIGHT = 48 #haste compensation reads 48 rows
+BUFF_AREA_HEIGHT = 45 #BuffDetector reads the first 45
+
+
+def hexToBGR(hex):
+    return ((hex & 0xFF), (hex >> 8) & 0xFF, (hex >> 16) & 0xFF)
+
+
+class BuffBarSnapshot:
+    """One capture of the buff bar. The arrays are shared between consumers, copy before drawing on them."""
+
+    def __init__(self, bgra, bounds=None, timestamp=None):
+        self.bgra = bgra
+        self.bounds = bounds
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self._values = {}
+
+    def age(self):
+        return time.time() - self.timestamp
+
+    def value(self, key, build):
+        """Parsed value `key` of this capture, computed by `build()` the first time it is asked for."""
+        try:
+            return self._values[key]
+        except KeyError:
+            value = build()
+            self._values[key] = value
+            return value
+
+    @property
+    def buffArea(self):
+        """BGRA, the area returned by BuffDetector.screenshotBuffArea"""
+        rows = round(self.bgra.shape[0] * BUFF_AREA_HEIGHT / BUFF_BAR_HEIGHT)
+        return self.value("buffArea", lambda: self.bgra[:rows])
+
+    @property
+    def bgr(self):
+        return self.value("bgr", lambda: cv2.cvtColor(self.buffArea, cv2.COLOR_BGRA2BGR))
+
+    @property
+    def gray(self):
+        return self.value("gray", lambda: cv2.cvtColor(self.buffArea, cv2.COLOR_BGRA2GRAY))
+
+    @property
+    def rgba(self):
+        """Pillow RGBA of the full strip, for the bitmap matcher"""
+        return self.value("rgba", lambda: Image.fromarray(cv2.cvtColor(self.bgra, cv2.COLOR_BGRA2RGBA), "RGBA"))
+
+    @property
+    def palette(self):
+        """Every distinct BGR color in buffArea, as an (n, 3) int16 array"""
+        def build():
+            packed = self.bgr.reshape(-1, 3).astype(np.uint32)
+            packed = np.unique((packed[:, 0] << 16) | (packed[:, 1] << 8) | packed[:, 2])
+            return np.stack(((packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF), axis=1).astype(np.int16)
+        return self.value("palette", build)
+
+    def hasColor(self, hex, variation=0):
+        """False when no pixel of the bar is within `variation` of the color (the cv2.inRange rule)"""
+        return self.hasColors([hex], [variation])[0]
+
+    def hasColors(self, hexes, variations):
+        """hasColor for many colors in one pass over the palette"""
+        colors = np.array([hexToBGR(h) for h in hexes], dtype=np.int16)
+        variations = np.asarray(variations, dtype=np.int16)
+        key = ("hasColors", tuple(map(tuple, colors.tolist())), tuple(variations.tolist()))
+        def build():
+            palette = self.palette
+            if not len(palette):
+                return [False] * len(colors)
+            diff = np.abs(palette[None, :, :] - colors[:, None, :]).max(axis=2)
+            return (diff <= variations[:, None]).any(axis=1).tolist()
+        return self.value(key, build)
+
+
+class BuffBarParser:
+    """Captures the buff bar at most once per `maxAge` seconds and shares the snapshot between threads."""
+
+    def __init__(self, robloxWindow, maxAge=0.05):
+        self.robloxWindow = robloxWindow
+        self.maxAge = maxAge
+        self.latest = None
+        self.lock = threading.Lock()
+        self.captures = 0
+        self.reuses = 0
+
+    def bounds(self):
+        rw = self.robloxWindow
+        return (int(rw.mx), int(rw.my + rw.yOffset + BUFF_BAR_Y), int(rw.mw), BUFF_BAR_HEIGHT)
+
+    def capture(self):
+        bounds = self.bounds()
+        return BuffBarSnapshot(mssScreenshotNP(*bounds), bounds)
+
+    def snapshot(self, maxAge=None):
+        """Latest capture if it is recent enough and the window hasn't moved, otherwise a new one"""
+        maxAge = self.maxAge if maxAge is None else maxAge
+        with self.lock:
+            latest = self.latest
+            if latest is not None and latest.age() <= maxAge and latest.bounds == self.bounds():
+                self.reuses += 1
+                return latest
+            self.latest = self.capture()
+            self.captures += 1
+            return self.latest
+
+
+_parsersLock = threading.Lock()
+
+def getBuffBarParser(robloxWindow):
+    """
+    The shared parser for a roblox window, so all buff readers use the same captures.
+    It is kept on the window itself, so it and its last capture go away with the window.
+    """
+    with _parsersLock:
+        parser = getattr(robloxWindow, "_buffBarParser", None)
+        if parser is None:
+            parser = BuffBarParser(robloxWindow)
+            robloxWindow._buffBarParser = parser
+        return parser
+
+
+def _fixtureWindow(bgra):
+    from types import SimpleNamespace
+    multi = 2 if bgra.shape[0] > BUFF_BAR_HEIGHT else 1
+    return SimpleNamespace(mx=0, my=0, yOffset=0, mw=bgra.shape[1] // multi, multi=multi, isRetina=multi == 2,
+                           display_type="retina" if multi == 2 else "built-in")
+
+
+def record(folder, count=20, interval=3):
+    """Save live buff bar captures as fixtures"""
+    import os
+    from modules.screen.robloxWindow import RobloxWindowBounds
+    os.makedirs(folder, exist_ok=True)
+    robloxWindow = RobloxWindowBounds()
+    robloxWindow.setRobloxWindowBounds()
+    parser = BuffBarParser(robloxWindow)
+    for i in range(count):
+        snapshot = parser.snapshot(maxAge=0)
+        cv2.imwrite(os.path.join(folder, f"buffbar-{int(snapshot.timestamp)}-{i}.png"), snapshot.bgra)
+        print(f"recorded {i+1}/{count}")
+        time.sleep(interval)
+
+
+def benchmark(folder, repeats=20):
+    """Run the uptime color lookups over recorded fixtures, once per lookup on its own
+    conversion (the old way) and once through a shared snapshot. Checks both agree."""
+    import glob
+    import os
+    from modules.submacros.hourlyReport import BuffDetector, HourlyReport
+
+    paths = sorted(glob.glob(os.path.join(folder, "*.png")))
+    if not paths:
+        print(f"No fixtures in {folder}")
+        return 1
+    hourlyReport = HourlyReport()
+    colors = hourlyReport.uptimeBuffsColors
+    variations = getattr(hourlyReport, "uptimeBuffsColorVariations", {})
+
+    mismatches = 0
+    separate = shared = 0
+    for path in paths:
+        bgra = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if bgra is None or bgra.ndim != 3 or bgra.shape[2] != 4:
+            print(f"Skipping {path}: not a BGRA capture")
+            continue
+        detector = BuffDetector(_fixtureWindow(bgra))
+        multi = detector.robloxWindow.multi
+        lookups = [(hex, minSize, variations.get(key, 0)) for key, (hex, minSize) in colors.items()]
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            expected = []
+            for hex, minSize, variation in lookups:
+                screen = cv2.cvtColor(bgra[:round(bgra.shape[0] * BUFF_AREA_HEIGHT / BUFF_BAR_HEIGHT)], cv2.COLOR_BGRA2BGR)
+                expected.append(detector.detectBuffColorInImage(screen, hex, minSize, y1=30*multi, variation=variation, searchDirection=7))
+        separate += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            snapshot = BuffBarSnapshot(bgra)
+            snapshot.hasColors([hex for hex, _, _ in lookups], [v for _, _, v in lookups])
+            found = [detector.detectBuffColorInSnapshot(snapshot, hex, minSize, y1=30*multi, variation=variation, searchDirection=7)
+                     for hex, minSize, variation in lookups]
+        shared += time.perf_counter() - start
+
+        if [tuple(x) for x in found] != [tuple(x) for x in expected]:
+            mismatches += 1
+            print(f"{os.path.basename(path)}: shared snapshot disagrees with direct detection")
+
+    runs = len(paths) * repeats
+    print(f"{len(paths)} fixtures, {len(colors)} buff colors")
+    print(f"separate conversions: {separate/runs*1000:.2f}ms per sample")
+    print(f"shared snapshot:      {shared/runs*1000:.2f}ms per sample")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    argParser = argparse.ArgumentParser(description="Record buff bar fixtures or benchmark the shared buff bar parser.")
+    argParser.add_argument("--record", help="folder to save live captures to")
+    argParser.add_argument("--count", type=int, default=20)
+    argParser.add_argument("--fixtures", help="folder of recorded captures to benchmark")
+    args = argParser.parse_args()
+    if args.record:
+        record(args.record, args.count)
+    elif args.fixtures:
+        sys.exit(benchmark(args.fixtures))
+    else:
+        argParser.print_help()
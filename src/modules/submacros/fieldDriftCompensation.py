@@ -1,6 +1,8 @@
 from modules.misc.imageManipulation import pillowToCv2
 from modules.screen.screenshot import mssScreenshot
 from modules.misc.appManager import openApp
+from modules.misc import detectionDecode
+from modules.misc import inferenceBackends
 import modules.misc.settingsManager as settingsManager
 from modules.controls.keyboard import keyboard
 import numpy as np
@@ -177,7 +179,16 @@ class fieldDriftCompensation():
                 self._warn_sprinkler_model("coremltools is not installed")
                 return False
             if has_onnx:
-                self._sprinkler_session = cv2.dnn.readNetFromONNX(str(model_path_onnx))
+                #same backend options the ai gather patterns are given
+                runtimeDefaults = settingsManager.FUZZY_AI_RUNTIME_DEFAULTS
+                self._sprinkler_session = inferenceBackends.load(
+                    model_path_onnx,
+                    runtimeDefaults["fuzzy_ai_inference_backend"],
+                    intra_op_threads=runtimeDefaults["fuzzy_ai_inference_intra_op_threads"],
+                    inter_op_threads=runtimeDefaults["fuzzy_ai_inference_inter_op_threads"],
+                    optimization_level=runtimeDefaults["fuzzy_ai_inference_optimization_level"],
+                    quantized=runtimeDefaults["fuzzy_ai_inference_quantized"],
+                )
                 self._sprinkler_model_kind = "opencv_onnx"
                 self._sprinkler_input_name = None
                 self._sprinkler_output_name = None
@@ -208,44 +219,10 @@ class fieldDriftCompensation():
         return np.expand_dims(chw, axis=0)
 
     def _postprocess_sprinkler_output(self, output):
-        outputs = np.squeeze(output[0])
-        if outputs.ndim != 2 or outputs.shape[0] < 5:
-            return []
-
-        class_probs = outputs[4:, :]
-        confidences = np.max(class_probs, axis=0)
-        mask = confidences > self._sprinkler_confidence_threshold
-        if not np.any(mask):
-            return []
-
-        filtered_confidences = confidences[mask]
-        class_ids = np.argmax(class_probs[:, mask], axis=0)
-        boxes_data = outputs[:4, mask]
-        cx, cy, box_w, box_h = boxes_data
-        x1 = cx - box_w / 2.0
-        y1 = cy - box_h / 2.0
-        boxes = np.stack((x1, y1, box_w, box_h), axis=1)
-
-        indices = cv2.dnn.NMSBoxes(
-            boxes.tolist(),
-            filtered_confidences.tolist(),
-            self._sprinkler_confidence_threshold,
-            self._sprinkler_nms_threshold,
+        return detectionDecode.detections_to_list(
+            detectionDecode.decode_yolo(output, self._sprinkler_confidence_threshold, self._sprinkler_nms_threshold)
         )
 
-        detections = []
-        if len(indices) > 0:
-            for index in np.array(indices).flatten():
-                bx, by, bw, bh = boxes[index]
-                detections.append(
-                    (
-                        (bx, by, bx + bw, by + bh),
-                        int(class_ids[index]),
-                        float(filtered_confidences[index]),
-                    )
-                )
-        return detections
-
     def _target_sprinkler_label(self):
         try:
             settings = settingsManager.loadAllSettings()
@@ -261,8 +238,7 @@ class fieldDriftCompensation():
         try:
             tensor = self._preprocess_sprinkler_image(imgSRC)
             if self._sprinkler_model_kind == "opencv_onnx":
-                self._sprinkler_session.setInput(tensor)
-                output = [self._sprinkler_session.forward()]
+                output = self._sprinkler_session.run(tensor)
             else:
                 prediction = self._sprinkler_session.predict({self._sprinkler_input_name: tensor})
                 output = [prediction[self._sprinkler_output_name]]
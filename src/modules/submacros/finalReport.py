@@ -486,6 +486,8 @@ class FinalReport:
                 continue
 
         self.drawer = FinalReportDrawer(theme=theme, accent=accent)
+        # multi-day sessions hold far more uptime samples than the graphs have pixels
+        uptimeChartValues = self.hourlyReport.sessionUptimeChartValues(self.drawer.STAT_MONITOR_GRAPH_WIDTH)
 
         # Draw the comprehensive final report
         try:
@@ -493,7 +495,7 @@ class FinalReport:
                 hourlyReportStats, sessionStats, honeyPerSec,
                 sessionHoney, onlyValidHourlyHoney,
                 buffQuantity, nectarQuantity, planterData,
-                self.hourlyReport.sessionUptimeBuffsValues, self.hourlyReport.sessionBuffGatherIntervals,
+                uptimeChartValues, self.hourlyReport.sessionBuffGatherIntervals,
                 configuredUptimeBuffs=uptime_buffs,
                 configuredHourlyBuffs=hourly_buffs,
                 enabled_fields=enabled_fields,
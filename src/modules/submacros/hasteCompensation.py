@@ -16,6 +16,7 @@ import mss.darwin
 mss.darwin.IMAGE_OPTIONS = 0
 from modules.screen.robloxWindow import RobloxWindowBounds
 from modules.submacros.hourlyReport import NATRO_BUFF_CHARACTER_TEMPLATES
+from modules.submacros.buffBarParser import getBuffBarParser
 
 class HasteCompensation():
     def __init__(self, isRetina, baseMoveSpeed):
@@ -396,6 +397,8 @@ class HasteCompensationRevamped():
     def __init__(self, robloxWindow: RobloxWindowBounds, baseMoveSpeed):
         self.robloxWindow = robloxWindow
         self.baseMoveSpeed = baseMoveSpeed
+        #shared with the hourly report buff readers
+        self.buffBar = getBuffBarParser(robloxWindow)
 
         self.countBitmaps = self._loadCountBitmaps()
         self.bearMorphs = []
@@ -442,17 +445,17 @@ class HasteCompensationRevamped():
         return bitmaps
 
     def screenshotBuff(self):   
-        with mss.mss() as sct:
-            monitor = {"left": int(self.robloxWindow.mx), "top": int(self.robloxWindow.my+self.robloxWindow.yOffset+33), "width": int(self.robloxWindow.mw), "height": int(48)}
-            sct_img = sct.grab(monitor)
-            img = Image.frombytes("RGBA", sct_img.size, sct_img.bgra, "raw", "BGRA")
-            #img.save(f"buff_area.png")
-            return img
+        return self.buffBar.snapshot().rgba
 
     #similar to natro's implementation for haste detection
     def getHaste(self):
-        start_time = time.time()
-        screen = self.screenshotBuff()
+        #movement polls this in a tight loop, a capture only gets parsed once
+        snapshot = self.buffBar.snapshot()
+        haste, bearmorphSpeed = snapshot.value("haste", lambda: self._parseHaste(snapshot.rgba))
+        return (self.baseMoveSpeed + bearmorphSpeed) * (1 + (0.1 * haste))
+
+    def _parseHaste(self, screen):
+        """(haste stacks incl. +10 for haste+, bear morph speed) of one buff bar capture"""
         haste = 0
         hasteX = None
 
@@ -487,13 +490,11 @@ class HasteCompensationRevamped():
             if bitmap_matcher.find_bitmap_cython(screen, img, variance=30):
                 bearmorphSpeed = 4
                 break
-        end_time = time.time()
 
         #search for haste+
         if bitmap_matcher.find_bitmap_cython(screen, self.hastePlus, variance=20 if self.robloxWindow.isRetina else 2):
             haste += 10
             
-        #print(end_time-start_time)
         #print(f"{(self.baseMoveSpeed + bearmorphSpeed) * (1 + (0.1 * haste))} --- {self.baseMoveSpeed}, {haste}")
         
-        return (self.baseMoveSpeed + bearmorphSpeed) * (1 + (0.1 * haste))
+        return haste, bearmorphSpeed
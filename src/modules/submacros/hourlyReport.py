@@ -10,18 +10,21 @@ import numpy as np
 import platform
 from modules.misc.messageBox import msgBox
 from modules.screen.imageSearch import locateTransparentImageOnScreen, locateTransparentImage
-from modules.screen.screenshot import mssScreenshotNP, mssScreenshot
+from modules.screen.screenshot import mssScreenshot
 from modules.misc.imageManipulation import adjustImage
 import time
 import pyautogui as pag
 from modules.screen.ocr import ocrRead, imToString
 import copy
+from contextlib import contextmanager
 from datetime import datetime
 from modules.screen.robloxWindow import RobloxWindowBounds
 import pickle
 import json
 from modules.misc import settingsManager
 from modules.misc.settingsManager import getCurrentProfile, loadFields, getMacroVersion
+from modules.submacros.seriesDownsampling import SeriesRollup, minMaxDownsample
+from modules.submacros.buffBarParser import getBuffBarParser
 
 ww, wh = pag.size()
 
@@ -257,6 +260,7 @@ HOURLY_BUFF_OCR_MAX_VALUES = {
 
 # Ordered main/important buffs first, situational ones last (shown top-to-bottom in the grid)
 MAX_UPTIME_BUFF_OPTIONS = 16
+UPTIME_SAMPLE_PERIOD = 6 #seconds between uptime samples (600 slots per hour)
 DEFAULT_UPTIME_BUFFS = [
     "boost", "haste", "focus", "bomb_combo", "balloon_aura",
     "inspire", "reindeerfetch", "honey_mark", "pollen_mark",
@@ -353,6 +357,9 @@ class BuffDetector():
 
         self.robloxWindow = robloxWindow
         self.y = 33
+        #captures are shared with haste compensation and the uptime sampler
+        self.buffBar = getBuffBarParser(robloxWindow)
+        self.buffTemplates = {}
 
         self.buffSize = 76 if self.robloxWindow.isRetina else 39
 
@@ -366,7 +373,13 @@ class BuffDetector():
         self.nectarKernel = cv2.getStructuringElement(cv2.MORPH_RECT,(3,3))
 
     def screenshotBuffArea(self):
-        return mssScreenshotNP(self.robloxWindow.mx, self.robloxWindow.my+self.robloxWindow.yOffset+33, self.robloxWindow.mw, 45)
+        return self.buffBar.snapshot().buffArea
+
+    def getBuffTemplate(self, buff):
+        #adjustImage lists and resizes from disk, only do it once per buff
+        if buff not in self.buffTemplates:
+            self.buffTemplates[buff] = adjustImage("./images/buffs", buff, self.robloxWindow.display_type)
+        return self.buffTemplates[buff]
 
     def getBuffQuantityFromImg(self, bgrImg,transform, crop=True, buff=None, intOnly=False):
         #buff size is 76x76
@@ -563,13 +576,15 @@ class BuffDetector():
 
         if screen is None:
             screen = self.screenshotBuffArea()
+        #convert once for all the template searches
+        screenGray = cv2.cvtColor(screen, cv2.COLOR_BGRA2GRAY if screen.shape[2] == 4 else cv2.COLOR_BGR2GRAY) if screen.ndim == 3 else screen
 
         for buff,v in buffs:
             templatePosition, transform, stackable = v
 
             #find the buff
             try:
-                buffTemplate = adjustImage("./images/buffs", buff, self.robloxWindow.display_type)
+                buffTemplate = self.getBuffTemplate(buff)
             except FileNotFoundError:
                 if buff == "tide_blessing":
                     buffQuantity.append(self.getTideBlessingOcr(screen))
@@ -581,7 +596,7 @@ class BuffDetector():
             finalBuffValues = []
 
             for _ in range(3):
-                res = locateTransparentImage(buffTemplate, screen, threshold)
+                res = locateTransparentImage(buffTemplate, screenGray, threshold)
 
                 if not res: 
                     finalBuffValues.append(0)
@@ -760,15 +775,24 @@ class BuffDetector():
 
         return []
 
-        
-    def getNectar(self, nectar):
+    def detectBuffColorInSnapshot(self, snapshot, hex, minSize, x1=0, y1=0, x2=None, y2=None, variation=0, searchDirection=1, instances=1):
+        """detectBuffColorInImage on a shared BuffBarSnapshot. Buffs whose color isn't on the bar
+        are ruled out from the snapshot's palette, and repeated lookups reuse the first result"""
+        if not snapshot.hasColor(hex, variation):
+            return []
+        key = ("color", hex, tuple(minSize), x1, y1, x2, y2, variation, searchDirection, instances)
+        return snapshot.value(key, lambda: self.detectBuffColorInImage(snapshot.bgr, hex, minSize, x1, y1, x2, y2, variation,
+                                                                       searchDirection=searchDirection, instances=instances))
+
+    def getNectar(self, nectar, screen=None):
         vals = self.nectars[nectar]
         col, offsetCoords = vals
         offsetX, offsetY = offsetCoords
 
         #find the buff
-        screen = self.screenshotBuffArea()
-        buffTemplate = adjustImage("./images/buffs", nectar, self.robloxWindow.display_type)
+        if screen is None:
+            screen = self.screenshotBuffArea()
+        buffTemplate = self.getBuffTemplate(nectar)
         res = locateTransparentImage(buffTemplate, screen, 0.5) #get the best match first. At high nectar levels, it becomes hard to detect the nectar icon
         if not res: 
             return 0
@@ -799,10 +823,12 @@ class BuffDetector():
         return quantity
 
 
-    def getNectars(self):
+    def getNectars(self, screen=None):
+        if screen is None:
+            screen = self.screenshotBuffArea()
         nectarQuantity = []
         for nectar in self.nectars:
-            nectarQuantity.append(self.getNectar(nectar))
+            nectarQuantity.append(self.getNectar(nectar, screen))
         return nectarQuantity
 
 
@@ -904,6 +930,7 @@ class HourlyReport():
         self.hourlyReportStats = {}
         self.sessionReportStats = {}
         self.sessionUptimeBuffsValues = {}
+        self.sessionUptimeRollups = {}
         self.sessionBuffGatherIntervals = []
         self.latestBuffQuantity = []
         self.latestBuffKeys = []
@@ -960,6 +987,7 @@ class HourlyReport():
 
             if buffName not in self.sessionUptimeBuffsValues:
                 self.sessionUptimeBuffsValues[buffName] = []
+            self._sessionUptimeRollup(buffName).append(value)
             self.sessionUptimeBuffsValues[buffName].append(value)
 
         if not hasattr(self, "buffGatherIntervals") or self.buffGatherIntervals is None:
@@ -971,6 +999,26 @@ class HourlyReport():
             self.sessionBuffGatherIntervals = []
         self.sessionBuffGatherIntervals.append(1 if isGathering else 0)
 
+    def _sessionUptimeRollup(self, buffName):
+        #rebuild when the rollup is missing or out of step with the saved history
+        values = self.sessionUptimeBuffsValues.get(buffName, [])
+        rollup = self.sessionUptimeRollups.get(buffName)
+        if rollup is None or rollup.count != len(values):
+            rollup = SeriesRollup.fromValues(values, UPTIME_SAMPLE_PERIOD)
+            self.sessionUptimeRollups[buffName] = rollup
+        return rollup
+
+    def sessionUptimeChartValues(self, maxPoints):
+        """Session uptime series reduced to at most maxPoints each, read from the rollups
+        so long sessions don't walk their whole history"""
+        chartValues = {}
+        for buffName, values in self.sessionUptimeBuffsValues.items():
+            if len(values) <= maxPoints:
+                chartValues[buffName] = values
+            else:
+                chartValues[buffName] = self._sessionUptimeRollup(buffName).view(maxPoints) or minMaxDownsample(values, maxPoints)
+        return chartValues
+
     def filterOutliers(self, values, threshold=3):
         nonZeroValues = [x for x in values if x]
         
@@ -1117,6 +1165,47 @@ class HourlyReport():
 
         return fields
 
+    def buildHoneyPerSec(self, honeyValues):
+        """Filter the per-minute honey readings and derive the honey/sec series.
+
+        Returns (filtered readings, honey/sec)."""
+        honeyValues = list(honeyValues)
+        if len(honeyValues) < 3:
+            honeyValues = [0]*3 + honeyValues
+        #filter out the honey/min
+        honeyValues = self.filterOutliers(honeyValues)
+        #calculate honey/min
+        honeyPerSec = [0]
+        prevHoney = honeyValues[0]
+        for x in honeyValues[1:]:
+            if x > prevHoney:
+                honeyPerSec.append((x-prevHoney)/60)
+            prevHoney = x
+        return honeyValues, honeyPerSec
+
+    def applyDrawerTheme(self, setdat):
+        """Recreate the drawer if the report theme/accent in the settings changed."""
+        # the report theme follows the macro's GUI theme
+        gui_theme = setdat.get("gui_theme", "Brown") if isinstance(setdat, dict) else "Brown"
+        theme  = resolveReportTheme(gui_theme)
+        accent = setdat.get("hourly_report_accent", "green") if isinstance(setdat, dict) else "green"
+        if theme != self._theme or accent != self._accent:
+            self.hourlyReportDrawer = HourlyReportDrawer(self.hourlyReportDrawer.time_format, theme=theme, accent=accent)
+            self._theme = theme
+            self._accent = accent
+
+    def prerenderCharts(self, setdat):
+        """Fold the samples collected so far into the drawer's graph tiles, so the
+        report at the hour boundary only composites them."""
+        if not self.hourlyReportStats.get("honey_per_min"):
+            return
+        self.applyDrawerTheme(setdat)
+        raw_uptime = setdat.get("hourly_report_uptime_buffs", "") if isinstance(setdat, dict) else ""
+        uptime_buffs = normalizeUptimeBuffSelection(raw_uptime, self.configuredUptimeBuffs)
+        _, honeyPerSec = self.buildHoneyPerSec(self.hourlyReportStats["honey_per_min"])
+        self.hourlyReportDrawer.prerenderHourlyCharts(honeyPerSec, self.hourlyReportStats.get("backpack_per_min", [0]),
+                                                      getattr(self, "uptimeBuffsValues", {}), uptime_buffs)
+
     def generateHourlyReport(self, setdat, itemMonitorData=None):
         raw_hourly = setdat.get("hourly_report_hourly_buffs", "") if isinstance(setdat, dict) else ""
         hourly_buffs = normalizeHourlyBuffSelection(raw_hourly, self.configuredHourlyBuffs)
@@ -1131,8 +1220,10 @@ class HourlyReport():
             "mondo":        ["top",    True, True],
         }
         self.hourBuffs = {k: v for k, v in self.hourBuffs.items() if k in hourly_buffs}
-        buffQuantity = self.buffDetector.getBuffsWithImage(self.hourBuffs)
-        nectarQuantity = self.buffDetector.getNectars()
+        #one capture for both readers
+        buffArea = self.buffDetector.screenshotBuffArea()
+        buffQuantity = self.buffDetector.getBuffsWithImage(self.hourBuffs, screen=buffArea)
+        nectarQuantity = self.buffDetector.getNectars(screen=buffArea)
         self.latestBuffQuantity = list(buffQuantity)
         self.latestBuffKeys = list(self.hourBuffs.keys())
         self.latestNectarQuantity = list(nectarQuantity)
@@ -1163,20 +1254,9 @@ class HourlyReport():
         if not isinstance(historyData, list):
             historyData = []
 
-        if len(self.hourlyReportStats["honey_per_min"]) < 3:
-            self.hourlyReportStats["honey_per_min"] = [0]*3 + self.hourlyReportStats["honey_per_min"]
-        #filter out the honey/min
         print(self.hourlyReportStats["honey_per_min"])
-        #self.hourlyReportStats["honey_per_min"] = [x for x in self.hourlyReportStats["honey_per_min"] if x]
-        self.hourlyReportStats["honey_per_min"] = self.filterOutliers(self.hourlyReportStats["honey_per_min"])
-        #calculate honey/min
-        honeyPerMin = [0]
-        prevHoney = self.hourlyReportStats["honey_per_min"][0]
-        for x in self.hourlyReportStats["honey_per_min"][1:]:
-            if x > prevHoney:
-                honeyPerMin.append((x-prevHoney)/60)
-            prevHoney = x
-        
+        self.hourlyReportStats["honey_per_min"], honeyPerMin = self.buildHoneyPerSec(self.hourlyReportStats["honey_per_min"])
+
         #calculate some stats
         if len(set(self.hourlyReportStats["honey_per_min"])) <= 1:
             onlyValidHourlyHoney = self.hourlyReportStats["honey_per_min"].copy()
@@ -1211,10 +1291,7 @@ class HourlyReport():
             except Exception:
                 continue
 
-        # read customization from settings — the report theme follows the macro's GUI theme
-        gui_theme = setdat.get("gui_theme", "Brown") if isinstance(setdat, dict) else "Brown"
-        theme  = resolveReportTheme(gui_theme)
-        accent = setdat.get("hourly_report_accent", "green") if isinstance(setdat, dict) else "green"
+        # read customization from settings
         send_embed_text = setdat.get("hourly_report_embed_text", True) if isinstance(setdat, dict) else True
 
         # parse configurable buff lists from settings (comma-separated strings)
@@ -1227,10 +1304,7 @@ class HourlyReport():
         displayBuffQuantity = [detectedBuffByKey.get(key, 0) for key in hourly_buffs]
 
         # re-apply theme/accent if they changed
-        if theme != self._theme or accent != self._accent:
-            self.hourlyReportDrawer = HourlyReportDrawer(self.hourlyReportDrawer.time_format, theme=theme, accent=accent)
-            self._theme = theme
-            self._accent = accent
+        self.applyDrawerTheme(setdat)
 
         canvas = self.hourlyReportDrawer.drawHourlyReport(hourlyReportStats, sessionTime, honeyPerMin,
                                                           sessionHoney, honeyThisHour, onlyValidHourlyHoney,
@@ -1283,6 +1357,7 @@ class HourlyReport():
         self.hourlyReportStats["start_honey"] = 0
         self.sessionReportStats = self._defaultSessionReportStats()
         self.sessionUptimeBuffsValues = self._defaultSessionUptimeBuffs()
+        self.sessionUptimeRollups = {}
         self.sessionBuffGatherIntervals = []
         self.latestBuffQuantity = []
         self.latestBuffKeys = []
@@ -1319,6 +1394,7 @@ class HourlyReport():
                 "uptimeBuffsValues": self.uptimeBuffsValues,
                 "buffGatherIntervals": self.buffGatherIntervals,
                 "sessionUptimeBuffsValues": self.sessionUptimeBuffsValues,
+                "sessionUptimeRollups": self.sessionUptimeRollups,
                 "sessionBuffGatherIntervals": self.sessionBuffGatherIntervals,
                 "latestBuffQuantity": self.latestBuffQuantity,
                 "latestBuffKeys": self.latestBuffKeys,
@@ -1337,6 +1413,7 @@ class HourlyReport():
             self.uptimeBuffsValues = data.get("uptimeBuffsValues", self._defaultHourlyUptimeBuffs())
             self.buffGatherIntervals = data.get("buffGatherIntervals", [0]*600)
             self.sessionUptimeBuffsValues = data.get("sessionUptimeBuffsValues", self._defaultSessionUptimeBuffs())
+            self.sessionUptimeRollups = data.get("sessionUptimeRollups", {})
             self.sessionBuffGatherIntervals = data.get("sessionBuffGatherIntervals", [])
             self.latestBuffQuantity = data.get("latestBuffQuantity", [])
             self.latestBuffKeys = data.get("latestBuffKeys", [])
@@ -1345,6 +1422,17 @@ class HourlyReport():
 
 
 class HourlyReportDrawer:
+    # fixed layout of the stat-monitor report (_drawStatMonitorReport)
+    STAT_MONITOR_REGIONS = {
+        "honey/sec": (120, 120, 4080, 1080),
+        "stats": (4320, 120, 1560, 5560),
+        "backpack": (120, 1320, 4080, 1140),
+        "buffs": (120, 2580, 4080, 3100),
+    }
+    STAT_MONITOR_HONEY_GRAPH = (440, 250, 3600, 800)
+    STAT_MONITOR_BACKPACK_GRAPH = (440, 1450, 3600, 860)
+    STAT_MONITOR_GRAPH_WIDTH = 3600
+
     def __init__(self, time_format=24, theme="dark", accent="green"):
         t = THEMES.get(theme, THEMES["dark"])
         self.backgroundColor = t["bg"]
@@ -1398,6 +1486,10 @@ class HourlyReportDrawer:
         else:
             self.hour -= 1
         self.assetPath = "hourly_report/assets"
+        # pre-rendered graph tiles for the stat-monitor layout, see _updateChartTile
+        self.chartTiles = {}
+        self.chartTileStats = {"full": 0, "partial": 0, "reused": 0}
+        self.lastRenderTime = 0
 
     def normalizeUptimeBuffList(self, buffList):
         seen = set()
@@ -1458,10 +1550,113 @@ class HourlyReportDrawer:
             gy = y + h * i / yTicks
             self.draw.line((x - 60, gy, x + w + 60, gy), fill=self.graphGridColor, width=3)
         if timelineTicks:
-            for i in range(61):
-                gx = x + w * i / 60
-                tick = 45 if i % 10 == 0 else 25
-                self.draw.line((gx, y + h + 20, gx, y + h + 20 + tick), fill=self.graphTickColor, width=3)
+            self._drawTimelineTicks(graph)
+
+    def _drawTimelineTicks(self, graph):
+        x, y, w, h = graph
+        for i in range(61):
+            gx = x + w * i / 60
+            tick = 45 if i % 10 == 0 else 25
+            self.draw.line((gx, y + h + 20, gx, y + h + 20 + tick), fill=self.graphTickColor, width=3)
+
+    @contextmanager
+    def _drawingOn(self, image):
+        """Temporarily point self.canvas/self.draw at another image."""
+        prevCanvas, prevDraw = getattr(self, "canvas", None), getattr(self, "draw", None)
+        self.canvas = image
+        self.draw = ImageDraw.Draw(image)
+        try:
+            yield image
+        finally:
+            self.canvas, self.draw = prevCanvas, prevDraw
+
+    def _normalizeSeries(self, data):
+        values = [float(v or 0) for v in (data or [0])]
+        if len(values) == 1:
+            values = values * 2
+        return values
+
+    def _renderChartStrip(self, tile, sx0, sx1):
+        """Redraw columns [sx0, sx1) of a chart tile from its stored samples."""
+        ox, oy = tile["box"][:2]
+        x, y, w, h = tile["graph"]
+        strip = Image.new("RGBA", (sx1 - sx0, tile["image"].size[1]), (*self.panelColor, 255))
+        local = (x - ox - sx0, y - oy, w, h)
+        with self._drawingOn(strip):
+            self._drawGraphGrid(local, xTicks=tile["xTicks"], yTicks=tile["yTicks"], timelineTicks=False)
+            for values, (color, width, alpha) in zip(tile["values"], tile["style"]):
+                self._drawAreaSeries(local, values, color, maxY=tile["maxY"], width=width, alpha=alpha)
+        tile["image"].paste(strip, (sx0, 0))
+
+    def _updateChartTile(self, name, graph, series, maxY, xTicks=6, yTicks=4):
+        """Bring the pre-rendered tile `name` up to date with `series`.
+
+        `series` is [(data, color, width, alpha)]. While the graph geometry and
+        scale stay the same only the columns around changed samples are redrawn;
+        anything else (new slot count, new max, first use) re-renders the tile.
+        Returns the tile record.
+        """
+        x, y, w, h = graph
+        values = [self._normalizeSeries(data) for data, _, _, _ in series]
+        style = [(color, width, alpha) for _, color, width, alpha in series]
+        pad = max(width for _, width, _ in style) // 2 + 2
+        key = (tuple(graph), maxY, xTicks, yTicks, tuple(style), tuple(len(v) for v in values))
+        tile = self.chartTiles.get(name)
+        if tile is None or tile["key"] != key:
+            box = (int(x) - 60, int(y) - pad, int(x + w) + 61, int(y + h) + pad + 1)
+            tile = {
+                "key": key, "box": box, "graph": graph, "maxY": maxY, "xTicks": xTicks, "yTicks": yTicks,
+                "style": style, "values": values,
+                "image": Image.new("RGBA", (box[2] - box[0], box[3] - box[1])),
+            }
+            self.chartTiles[name] = tile
+            self._renderChartStrip(tile, 0, tile["image"].size[0])
+            self.chartTileStats["full"] += 1
+            return tile
+
+        changed = [i for i in range(len(values[0])) if any(new[i] != old[i] for new, old in zip(values, tile["values"]))]
+        if not changed:
+            self.chartTileStats["reused"] += 1
+            return tile
+        tile["values"] = values
+        # A sample moves the two segments touching it; widen by the line width so
+        # the stroke ends are redrawn too.
+        interval = w / max(len(values[0]) - 1, 1)
+        margin = pad + 2
+        ox = tile["box"][0]
+        sx0 = max(0, int(x + (changed[0] - 1) * interval) - margin - ox)
+        sx1 = min(tile["image"].size[0], int(x + (changed[-1] + 1) * interval) + margin + 1 - ox)
+        self._renderChartStrip(tile, sx0, sx1)
+        self.chartTileStats["partial"] += 1
+        return tile
+
+    def _drawChartTile(self, name, graph, series, maxY, xTicks=6, yTicks=4, timelineTicks=True):
+        """Grid + area series for `graph`, composited from the pre-rendered tile."""
+        tile = self._updateChartTile(name, graph, series, maxY, xTicks, yTicks)
+        self.canvas.paste(tile["image"], tile["box"][:2])
+        if timelineTicks:
+            self._drawTimelineTicks(graph)
+
+    def _statMonitorSeries(self, honeyPerSec, backpackPerMin):
+        honeyData = honeyPerSec or [0]
+        maxHoney = max(max(honeyData), 1)
+        return {
+            "honey": (self.STAT_MONITOR_HONEY_GRAPH, [(honeyData, (254, 202, 64), 6, 125)], maxHoney, 4),
+            "backpack": (self.STAT_MONITOR_BACKPACK_GRAPH, [(backpackPerMin or [0], (65, 255, 128), 6, 130)], 100, 2),
+        }
+
+    def prerenderHourlyCharts(self, honeyPerSec, backpackPerMin, uptimeBuffsValues, configuredUptimeBuffs=None):
+        """Fold newly arrived samples into the hourly report's graph tiles.
+
+        Called while the hour is running so that drawHourlyReport only has to
+        composite finished tiles and labels at the hour boundary.
+        """
+        for name, (graph, series, maxY, yTicks) in self._statMonitorSeries(honeyPerSec, backpackPerMin).items():
+            self._updateChartTile(name, graph, series, maxY, xTicks=6, yTicks=yTicks)
+        uptimeList = self.normalizeUptimeBuffList(configuredUptimeBuffs)
+        for key, _, _, graph in self._uptimeRowLayout(self.STAT_MONITOR_REGIONS["buffs"], uptimeList):
+            maxY, series = self._uptimeRowSeries(key, uptimeBuffsValues)
+            self._updateChartTile(f"uptime:{key}", graph, series, maxY, xTicks=6, yTicks=2)
 
     def _timeLabels(self, count=7):
         labels = []
@@ -1499,6 +1694,8 @@ class HourlyReportDrawer:
         values = [float(v or 0) for v in (data or [0])]
         if len(values) == 1:
             values = values * 2
+        #more points than pixels only costs draw time, keep each bucket's extremes instead
+        values = minMaxDownsample(values, max(4, int(w)))
         if maxY is None:
             maxY = max(max(values), minY + 1)
         maxY = max(maxY, minY + 1)
@@ -1712,38 +1909,45 @@ class HourlyReportDrawer:
             self.draw.text((cx - (bbox[2] - bbox[0]) / 2, yy), text, font=font, fill=color)
             yy += 74
 
-    def _drawUptimeRows(self, region, uptimeBuffList, uptimeBuffsValues, buffGatherIntervals, reportKind, timeLabels=None):
-        self._drawPanel(region, "BUFF UPTIME")
+    def _uptimeRowLayout(self, region, uptimeBuffList):
+        """Graph boxes of the BUFF UPTIME rows: [(key, gy, gh, graph)]."""
         x, y, w, h = region
         graphX = x + 320
-        graphW = 3600
+        graphW = self.STAT_MONITOR_GRAPH_WIDTH
         top = y + 135
         bottomSpace = 130
         rowH = max(95, (h - 235 - bottomSpace) / max(len(uptimeBuffList), 1))
+        rows = []
         for idx, key in enumerate(uptimeBuffList):
-            cfg = BUFF_RENDER_CONFIG[key]
-            chartType, maxY, colorInfo, asset = cfg
             gy = int(top + idx * rowH)
             gh = int(rowH - 8)
-            graph = (graphX, gy, graphW, gh)
-            self._drawGraphGrid(graph, xTicks=6, yTicks=2, timelineTicks=False)
+            rows.append((key, gy, gh, (graphX, gy, graphW, gh)))
+        return rows
+
+    def _uptimeRowSeries(self, key, uptimeBuffsValues):
+        """(maxY, [(data, color, width, alpha)]) for one uptime row."""
+        chartType, maxY, colorInfo, _ = BUFF_RENDER_CONFIG[key]
+        if chartType == "multi":
+            return maxY, [(uptimeBuffsValues.get(dataKey, [0] * 600), rgb, 4, 80) for dataKey, rgb in colorInfo]
+        return maxY, [(uptimeBuffsValues.get(key, [0] * 600), colorInfo, 4, 115)]
+
+    def _drawUptimeRows(self, region, uptimeBuffList, uptimeBuffsValues, buffGatherIntervals, reportKind, timeLabels=None):
+        self._drawPanel(region, "BUFF UPTIME")
+        x, y, w, h = region
+        rows = self._uptimeRowLayout(region, uptimeBuffList)
+        for key, gy, gh, graph in rows:
+            chartType, maxY, colorInfo, asset = BUFF_RENDER_CONFIG[key]
+            _, series = self._uptimeRowSeries(key, uptimeBuffsValues)
+            self._drawChartTile(f"uptime:{key}", graph, series, maxY, xTicks=6, yTicks=2, timelineTicks=False)
             try:
                 img = Image.open(f"{self.assetPath}/{asset}.png").convert("RGBA").resize((110, 110))
                 self.canvas.paste(img, (x + 75, gy + max(0, (gh - 110) // 2)), img)
             except FileNotFoundError:
                 pass
             labelFont = self.getFont("bold", 36 if len(uptimeBuffList) > 12 else 44)
-            if chartType == "multi":
-                colors = colorInfo
-                for dataKey, rgb in colors:
-                    data = uptimeBuffsValues.get(dataKey, [0] * 600)
-                    self._drawAreaSeries(graph, data, rgb, maxY=maxY, width=4, alpha=80)
-            else:
-                rgb = colorInfo
-                data = uptimeBuffsValues.get(key, [0] * 600)
-                self._drawAreaSeries(graph, data, rgb, maxY=maxY, width=4, alpha=115)
             label = f"x0-{maxY}" if chartType != "binary" else "x0-1"
             self.draw.text((x + 74, gy + gh - 38), label, font=labelFont, fill=self.bodyColor)
+        graphX, top, graphW = x + 320, y + 135, 3600
         self._drawTimeLabels((graphX, top, graphW, h - 260), y + h - 85, timeLabels)
 
     def _drawStatMonitorReport(self, reportTitle, hourlyReportStats, sessionTime, honeyPerSec, sessionHoney,
@@ -1756,12 +1960,9 @@ class HourlyReportDrawer:
         self.canvas = Image.new("RGBA", self.canvasSize, (*self.baseBackgroundColor, 255))
         self.draw = ImageDraw.Draw(self.canvas)
 
-        regions = {
-            "honey/sec": (120, 120, 4080, 1080),
-            "stats": (4320, 120, 1560, 5560),
-            "backpack": (120, 1320, 4080, 1140),
-            "buffs": (120, 2580, 4080, 3100),
-        }
+        renderStart = time.perf_counter()
+        self.chartTileStats = {"full": 0, "partial": 0, "reused": 0}
+        regions = self.STAT_MONITOR_REGIONS
         statRegions = {
             "lasthour": (4420, 220, 1360, 1206),
             "session": (4420, 1626, 1360, 1289),
@@ -1776,20 +1977,19 @@ class HourlyReportDrawer:
             self._drawPanel(region, None)
         timeLabels = self._elapsedTimeLabels(sessionTime) if reportTitle == "Session Report" else self._timeLabels()
 
+        charts = self._statMonitorSeries(honeyPerSec, hourlyReportStats.get("backpack_per_min", [0]))
+
         self._drawPanel(regions["honey/sec"], "HONEY/SEC")
-        honeyGraph = (440, 250, 3600, 800)
-        self._drawGraphGrid(honeyGraph, xTicks=6, yTicks=4)
-        honeyData = honeyPerSec or [0]
-        maxHoney = max(max(honeyData), 1)
+        honeyGraph, honeySeries, maxHoney, honeyTicks = charts["honey"]
+        honeyData = honeySeries[0][0]
+        self._drawChartTile("honey", honeyGraph, honeySeries, maxHoney, xTicks=6, yTicks=honeyTicks)
         self._drawYAxisLabels(honeyGraph, [self.millify(maxHoney - maxHoney * i / 4) for i in range(5)], 40)
-        self._drawAreaSeries(honeyGraph, honeyData, (254, 202, 64), maxY=maxHoney, alpha=125)
         self._drawTimeLabels(honeyGraph, regions["honey/sec"][1] + regions["honey/sec"][3] - 85, timeLabels)
 
         self._drawPanel(regions["backpack"], "BACKPACK")
-        backpackGraph = (440, 1450, 3600, 860)
-        self._drawGraphGrid(backpackGraph, xTicks=6, yTicks=2)
+        backpackGraph, backpackSeries, backpackMax, backpackTicks = charts["backpack"]
+        self._drawChartTile("backpack", backpackGraph, backpackSeries, backpackMax, xTicks=6, yTicks=backpackTicks)
         self._drawYAxisLabels(backpackGraph, ["100%", "50%", "0%"], 40)
-        self._drawAreaSeries(backpackGraph, hourlyReportStats.get("backpack_per_min", [0]), (65, 255, 128), maxY=100, alpha=130)
         self._drawTimeLabels(backpackGraph, regions["backpack"][1] + regions["backpack"][3] - 85, timeLabels)
 
         uptimeList = self.normalizeUptimeBuffList(configuredUptimeBuffs)
@@ -1843,6 +2043,7 @@ class HourlyReportDrawer:
         }
         self._drawLegacyStatsCard(statRegions["stats"], statsRows)
         self._drawLegacyInfoCard(statRegions["info"], reportTitle, sessionTime)
+        self.lastRenderTime = time.perf_counter() - renderStart
         return self.canvas
 
     def transformXLabelTime(self, i, val):
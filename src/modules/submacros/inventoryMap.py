@@ -0,0 +1,82 @@
+"""
+Remembered inventory positions.
+
+findItemInInventory scrolls down the inventory from the top, template matching
+and OCRing every step until the item turns up. InventoryMap remembers, for each
+item found that way, how many scroll steps down it was, where it sat in the
+view and a hash of its slot. The next lookup scrolls straight to that step and
+compares one slot hash; only a mismatch (the inventory changed) falls back to
+the full scan, which records the new position. The map is saved to the user
+data folder so it survives restarts.
+"""
+
+import json
+import os
+import time
+import imagehash
+from modules.misc import settingsManager
+
+MAX_HASH_DISTANCE = 6 #bits of the 64 bit average hash allowed to differ (count text, lighting)
+
+
+class InventoryMap:
+    def __init__(self, filename="inventory_map.json"):
+        self.path = settingsManager.getUserDataPath(filename)
+        self.items = {}
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "scans": 0, "batches": 0, "steps": 0, "time": 0.0}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                self.items = json.load(f)
+        except (OSError, ValueError):
+            self.items = {}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(self.items, f, indent=3)
+        except OSError as e:
+            print(f"Failed to save inventory map: {e}")
+
+    def get(self, itemName, windowHeight):
+        """The remembered position of an item, if it was recorded with the same window height"""
+        entry = self.items.get(itemName)
+        if entry is None or entry.get("windowHeight") != windowHeight:
+            return None
+        return entry
+
+    def record(self, itemName, step, loc, slotImage, windowHeight):
+        """Remember an item found `step` scroll steps from the top at `loc` (match location in the view)"""
+        self.items[itemName] = {
+            "step": step,
+            "loc": [int(loc[0]), int(loc[1])],
+            "hash": str(imagehash.average_hash(slotImage)),
+            "windowHeight": windowHeight,
+        }
+        self.save()
+
+    def forget(self, itemName):
+        if self.items.pop(itemName, None) is not None:
+            self.save()
+
+    def slotMatches(self, entry, slotImage):
+        distance = imagehash.average_hash(slotImage) - imagehash.hex_to_hash(entry["hash"])
+        return distance <= MAX_HASH_DISTANCE
+
+    def logLookup(self, itemName, result, steps, start):
+        """
+        result is "hit" (remembered position verified), "miss" (verification failed, then scanned), "scan" (nothing
+        remembered) or "batch" (findItemsInInventory looking up several items in one scan, itemName lists them)
+        """
+        elapsed = time.perf_counter() - start
+        stats = self.stats
+        stats["lookups"] += 1
+        stats[{"hit": "hits", "miss": "misses", "scan": "scans", "batch": "batches"}[result]] += 1
+        stats["steps"] += steps
+        stats["time"] += elapsed
+        print(f"Inventory lookup {itemName}: {result}, {steps} scroll steps, {elapsed:.2f}s "
+              f"(avg {stats['time']/stats['lookups']:.2f}s, {stats['steps']/stats['lookups']:.1f} steps "
+              f"over {stats['lookups']} lookups, {stats['hits']} remembered)")
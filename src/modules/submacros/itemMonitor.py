@@ -8,6 +8,7 @@ accumulates hourly totals, and feeds Fuzzy's hourly/session reports.
 from __future__ import annotations
 
 import time
+import zlib
 from datetime import datetime
 from pathlib import Path
 
@@ -21,6 +22,7 @@ from modules.screen.screenshot import mssScreenshotPillowRGBA
 HAYSTACK_W = 349
 HAYSTACK_H = 49
 QUICK_DETECTION_WINDOW_MS = 6000
+INDEX_ANCHORS = 5  # opaque pixels per item label checked before the full bitmap match
 BANNER_RGB = (34, 87, 168)  # 0xFF2257A8
 
 # Detection key → display name / category / report icon slug
@@ -77,8 +79,11 @@ class ItemMonitor:
         self.total_items_detected = 0
         self._templates_loaded_for = None
         self.item_templates = {}
+        self.item_index = {}
         self.digit_templates = {}
         self.plus_template = None
+        self._last_signature = None
+        self.stats = self._empty_stats()
         self._load_templates()
 
     def _scale(self) -> int:
@@ -96,6 +101,7 @@ class ItemMonitor:
             path = ASSET_DIR / f"item_{_slug(key)}.png"
             if path.exists():
                 self.item_templates[key] = _scale_image(Image.open(path), scale)
+        self.item_index = {key: self._index_anchors(needle) for key, needle in self.item_templates.items()}
 
         self.digit_templates = {}
         for n in range(10):
@@ -107,7 +113,64 @@ class ItemMonitor:
         self.plus_template = _scale_image(Image.open(plus_path), scale) if plus_path.exists() else None
         self._templates_loaded_for = scale
 
+    @staticmethod
+    def _index_anchors(needle: Image.Image):
+        """A few opaque pixels of an item label, spread left to right: [(y, x, (r, g, b))].
+
+        Items are matched with variance 0, so a label can only be at a position
+        where all of these pixels are present in the toast.
+        """
+        arr = np.asarray(needle, dtype=np.uint8)
+        xs, ys = np.nonzero(arr[..., 3].T == 255)  # column-major, leftmost pixels first
+        if not len(xs):
+            return []
+        picks = sorted({round(i * (len(xs) - 1) / max(INDEX_ANCHORS - 1, 1)) for i in range(INDEX_ANCHORS)})
+        return [(int(ys[i]), int(xs[i]), tuple(int(c) for c in arr[ys[i], xs[i], :3])) for i in picks]
+
+    def _candidate_items(self, haystack: Image.Image):
+        """Items whose index anchors all line up somewhere in the haystack, in ITEM_META order."""
+        rgb = np.asarray(haystack, dtype=np.uint8)[..., :3]
+        height, width = rgb.shape[:2]
+        color_masks = {}
+        candidates = []
+        for key, anchors in self.item_index.items():
+            needle_w, needle_h = self.item_templates[key].size
+            if not anchors or needle_w > width or needle_h > height:
+                continue
+            rows, cols = height - needle_h + 1, width - needle_w + 1
+            possible = np.ones((rows, cols), dtype=bool)
+            for y, x, color in anchors:
+                mask = color_masks.get(color)
+                if mask is None:
+                    mask = color_masks[color] = np.all(rgb == color, axis=2)
+                possible &= mask[y:y + rows, x:x + cols]
+                if not possible.any():
+                    break
+            else:
+                candidates.append(key)
+        return candidates
+
+    @staticmethod
+    def _empty_stats():
+        return {"ticks": 0, "unchanged": 0, "matched": 0, "candidates": 0,
+                "tick_ms": 0.0, "max_tick_ms": 0.0, "detect_ms": 0.0}
+
+    def stats_summary(self) -> str:
+        stats = self.stats
+        ticks = max(stats["ticks"], 1)
+        scanned = max(stats["ticks"] - stats["unchanged"], 1)
+        detect = f"{stats['detect_ms'] / stats['matched']:.1f}ms" if stats["matched"] else "n/a"
+        return (
+            f"Item monitor: {stats['ticks']} ticks, {stats['unchanged']} unchanged, "
+            f"{stats['tick_ms'] / ticks:.1f}ms avg / {stats['max_tick_ms']:.1f}ms max per tick, "
+            f"{stats['candidates'] / scanned:.2f} templates matched per scan, "
+            f"{stats['matched']} detections ({detect} capture to result)"
+        )
+
     def reset_hourly(self):
+        if self.stats["ticks"]:
+            print(self.stats_summary())
+        self.stats = self._empty_stats()
         self.collected_items = {}
         self.item_timeline = {}
         self.last_detection_time = {}
@@ -180,11 +243,12 @@ class ItemMonitor:
             return haystack
         return haystack.crop((x1, y1, x2 + 1, y2 + 1))
 
-    def _isolate_digits(self, haystack: Image.Image, item_needle: Image.Image):
+    def _isolate_digits(self, haystack: Image.Image, item_needle: Image.Image, item_hit=None):
         if self.plus_template is None:
             return None
         plus_hit = bitmap_matcher.find_bitmap_cython(haystack, self.plus_template, variance=6)
-        item_hit = bitmap_matcher.find_bitmap_cython(haystack, item_needle, variance=0)
+        if item_hit is None:
+            item_hit = bitmap_matcher.find_bitmap_cython(haystack, item_needle, variance=0)
         if not plus_hit or not item_hit:
             return None
         plus_w = self.plus_template.size[0]
@@ -221,6 +285,16 @@ class ItemMonitor:
 
     def detect_once(self):
         """One detection pass. Safe to call ~every second from the hourly background loop."""
+        start = time.perf_counter()
+        try:
+            return self._detect(start)
+        finally:
+            tick_ms = (time.perf_counter() - start) * 1000
+            self.stats["ticks"] += 1
+            self.stats["tick_ms"] += tick_ms
+            self.stats["max_tick_ms"] = max(self.stats["max_tick_ms"], tick_ms)
+
+    def _detect(self, start):
         self._load_templates()
         haystack = self._create_haystack()
         self.query_total += 1
@@ -229,18 +303,31 @@ class ItemMonitor:
 
         isolated = self._isolate_haystack(haystack)
 
+        # the same toast stays up for a few seconds; it was fully handled the first time
+        signature = (isolated.size, zlib.crc32(isolated.tobytes()))
+        if signature == self._last_signature:
+            self.stats["unchanged"] += 1
+            return None
+        self._last_signature = signature
+
         matched_key = None
         matched_needle = None
-        for key, needle in self.item_templates.items():
-            if bitmap_matcher.find_bitmap_cython(isolated, needle, variance=0):
+        matched_hit = None
+        candidates = self._candidate_items(isolated)
+        self.stats["candidates"] += len(candidates)
+        for key in candidates:
+            needle = self.item_templates[key]
+            hit = bitmap_matcher.find_bitmap_cython(isolated, needle, variance=0)
+            if hit:
                 matched_key = key
                 matched_needle = needle
+                matched_hit = hit
                 break
 
         if not matched_key:
             return None
 
-        digits_img = self._isolate_digits(isolated, matched_needle)
+        digits_img = self._isolate_digits(isolated, matched_needle, matched_hit)
         if digits_img is None:
             return None
 
@@ -266,6 +353,8 @@ class ItemMonitor:
         minute_slot = datetime.now().minute
         self.item_timeline[minute_slot] = self.item_timeline.get(minute_slot, 0) + amount
         self.total_items_detected += 1
+        self.stats["matched"] += 1
+        self.stats["detect_ms"] += (time.perf_counter() - start) * 1000
         return matched_key, amount
 
     @staticmethod
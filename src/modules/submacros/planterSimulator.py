@@ -0,0 +1,208 @@
+"""
+Offline auto planter simulator.
+
+Replays the auto planter decisions (AutoPlanterPlanner, the same code the macro
+runs) against a simulated clock and nectar model instead of the game. The macro
+visits its planters every `checkInterval` minutes; every visit harvests what
+the planner picks, paying `collectTravel` seconds each, then places planters
+until the planner stops, paying `placeTravel` seconds each. A harvested planter
+adds the nectar of the time it actually grew (capped at its natural grow time),
+and nectar drains at `decayPerHour` between visits.
+
+The run reports nectar gained per hour, the average nectar level, planter slot
+utilization and time spent travelling, so harvest settings and optimizer
+changes can be compared without in-game trials.
+
+Run from the src folder, with the current profile's settings by default:
+    python -m modules.submacros.planterSimulator --hours 48 --modes auto,full,every
+"""
+
+import copy
+import os
+from modules.submacros.autoPlanters import AutoPlanterPlanner, estimateNectarGain, nectarNames, fieldToNectar
+
+SIM_START = 1_700_000_000.0 #the planner treats times <= 0 as unset, so start at a real looking epoch
+
+
+class SimClock:
+    def __init__(self, start=SIM_START):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+class PlanterSimulator:
+    def __init__(self, setdat, hours=24, checkInterval=20, collectTravel=60, placeTravel=45, decayPerHour=100/24, startNectar=0.0):
+        self.setdat = setdat
+        self.duration = hours * 3600
+        self.checkInterval = checkInterval * 60
+        self.collectTravel = collectTravel
+        self.placeTravel = placeTravel
+        self.decayPerHour = decayPerHour
+        self.clock = SimClock()
+        self.nectar = {nectar: float(startNectar) for nectar in nectarNames}
+        self.data = {}
+
+        self.gained = {nectar: 0.0 for nectar in nectarNames}
+        self.nectarHours = {nectar: 0.0 for nectar in nectarNames} #integral of the nectar level over time
+        self.occupiedSlotSeconds = 0.0
+        self.travelSeconds = 0.0
+        self.placements = 0
+        self.harvests = 0
+        self.earlyHarvests = 0
+        self.placedByPlanter = {}
+
+    def elapsed(self):
+        return self.clock.now - SIM_START
+
+    def advance(self, seconds):
+        '''Move the clock forward, draining nectar and counting occupied planter slots'''
+        if seconds <= 0:
+            return
+        hours = seconds / 3600
+        for nectar, level in self.nectar.items():
+            drained = min(level, self.decayPerHour * hours)
+            #area under a linear drain that may hit 0 part way through
+            timeAtLevel = level / self.decayPerHour if self.decayPerHour > 0 else hours
+            if timeAtLevel >= hours:
+                self.nectarHours[nectar] += (level - drained / 2) * hours
+            else:
+                self.nectarHours[nectar] += level * timeAtLevel / 2
+            self.nectar[nectar] = level - drained
+        occupied = sum(bool(slot["planter"]) for slot in self.data.get("planters", []))
+        self.occupiedSlotSeconds += occupied * seconds
+        self.clock.now += seconds
+
+    def travel(self, seconds):
+        self.travelSeconds += seconds
+        self.advance(seconds)
+
+    def visit(self):
+        '''One run of the macro's auto planter task'''
+        #the macro builds the planner from auto_planters.json on every visit
+        planner = AutoPlanterPlanner(self.setdat, copy.deepcopy(self.data), lambda nectar: round(self.nectar[nectar], 1),
+                                     clock=self.clock, log=lambda *args: None)
+        self.data = planner.toDict()
+
+        for slot in planner.getPlanterSlotsToHarvest():
+            planter = planner.planterData[slot]
+            if not planter["planter"]:
+                continue
+            self.travel(self.collectTravel)
+            ranking = planner.getPlanterRanking(planter["field"], planter["planter"])
+            grownSeconds = self.clock.now - planter["placed_time"]
+            if planter["natural_grow_duration"] > 0:
+                if grownSeconds < planter["natural_grow_duration"]:
+                    self.earlyHarvests += 1
+                grownSeconds = min(grownSeconds, planter["natural_grow_duration"])
+            gain = estimateNectarGain(ranking, grownSeconds) if ranking else 0.0
+            nectar = planter["nectar"] or fieldToNectar.get(planter["field"], "")
+            if nectar:
+                self.gained[nectar] += min(gain, 100 - self.nectar[nectar])
+                self.nectar[nectar] = min(100.0, self.nectar[nectar] + gain)
+            planner.harvested(slot)
+            self.harvests += 1
+            self.data = planner.toDict()
+
+        maxAllowedPlanters = planner.getMaxAllowedPlanters()
+        while True:
+            placement = planner.getNextPlacement(maxAllowedPlanters)
+            if placement is None:
+                break
+            slot, candidate, placementPlan = placement
+            self.travel(self.placeTravel)
+            planner.savePlacedPlanter(slot, candidate["field"], candidate["planter_obj"], candidate["nectar"], placementPlan)
+            self.placements += 1
+            self.placedByPlanter[candidate["planter"]] = self.placedByPlanter.get(candidate["planter"], 0) + 1
+            self.data = planner.toDict()
+
+    def run(self):
+        while self.elapsed() < self.duration:
+            self.visit()
+            nextVisit = SIM_START + (int(self.elapsed() // self.checkInterval) + 1) * self.checkInterval
+            self.advance(min(nextVisit, SIM_START + self.duration) - self.clock.now)
+        return self.summary()
+
+    def summary(self):
+        hours = self.elapsed() / 3600
+        slots = len(self.data.get("planters", [])) or 3
+        return {
+            "hours": hours,
+            "nectar_per_hour": {nectar: gained / hours for nectar, gained in self.gained.items()},
+            "total_nectar_per_hour": sum(self.gained.values()) / hours,
+            "average_nectar": {nectar: value / hours for nectar, value in self.nectarHours.items()},
+            "utilization": self.occupiedSlotSeconds / (slots * self.elapsed()),
+            "travel_fraction": self.travelSeconds / self.elapsed(),
+            "placements": self.placements,
+            "harvests": self.harvests,
+            "early_harvests": self.earlyHarvests,
+            "placed_by_planter": self.placedByPlanter
+        }
+
+
+def loadProfileSettings():
+    '''The current profile's settings over the defaults. Importing settingsManager creates the profile and user data files if they are missing, as starting the macro does'''
+    from modules.misc import settingsManager
+    setdat = settingsManager.getDefaultProfileSettings()
+    setdat.update(settingsManager.getDefaultGeneralSettings())
+    for filename in ["generalsettings.txt", "settings.txt"]:
+        path = os.path.join(settingsManager.getProfilePath(), filename)
+        if os.path.exists(path):
+            setdat.update(settingsManager.readSettingsFile(path))
+    return setdat
+
+
+COLLECT_MODES = {
+    "auto": {"auto_planters_collect_auto": True, "auto_planters_collect_full": False},
+    "full": {"auto_planters_collect_auto": False, "auto_planters_collect_full": True},
+    "every": {"auto_planters_collect_auto": False, "auto_planters_collect_full": False},
+}
+
+
+def printSummary(label, summary):
+    print(f"== {label} ({summary['hours']:.0f}h) ==")
+    print(f"nectar/hour: {summary['total_nectar_per_hour']:.2f}% total, " +
+          ", ".join(f"{nectar} {value:.2f}" for nectar, value in summary["nectar_per_hour"].items()))
+    print("average nectar: " + ", ".join(f"{nectar} {value:.1f}%" for nectar, value in summary["average_nectar"].items()))
+    print(f"planter utilization: {summary['utilization']*100:.1f}%, travelling {summary['travel_fraction']*100:.1f}% of the time")
+    print(f"{summary['placements']} placements, {summary['harvests']} harvests ({summary['early_harvests']} before fully grown)")
+    if summary["placed_by_planter"]:
+        print("placed: " + ", ".join(f"{name} x{count}" for name, count in sorted(summary["placed_by_planter"].items(), key=lambda x: -x[1])))
+
+
+if __name__ == "__main__":
+    import argparse
+    argParser = argparse.ArgumentParser(description="Simulate the auto planters over many hours.")
+    argParser.add_argument("--hours", type=float, default=24)
+    argParser.add_argument("--modes", default="", help="comma separated collect modes to compare: auto, full, every (default: the profile's)")
+    argParser.add_argument("--every", type=float, help="hours between harvests for the 'every' mode")
+    argParser.add_argument("--check-interval", type=float, default=20, help="minutes between planter visits")
+    argParser.add_argument("--collect-travel", type=float, default=60, help="seconds to collect a planter")
+    argParser.add_argument("--place-travel", type=float, default=45, help="seconds to place a planter")
+    argParser.add_argument("--decay", type=float, default=100/24, help="nectar percent drained per hour")
+    argParser.add_argument("--start-nectar", type=float, default=0)
+    argParser.add_argument("--planters", help="comma separated planters to enable instead of the profile's")
+    argParser.add_argument("--fields", help="comma separated fields to enable instead of the profile's")
+    args = argParser.parse_args()
+
+    setdat = loadProfileSettings()
+    if args.planters:
+        enabled = {x.strip().replace(" ", "_") for x in args.planters.split(",")}
+        for key in [k for k in setdat if k.startswith("auto_planter_") and "_field_" not in k]:
+            setdat[key] = key[len("auto_planter_"):] in enabled
+    if args.fields:
+        enabled = {x.strip().replace(" ", "_") for x in args.fields.split(",")}
+        for fieldName in fieldToNectar:
+            setdat[f"auto_field_{fieldName.replace(' ', '_')}"] = fieldName.replace(" ", "_") in enabled
+    if args.every is not None:
+        setdat["auto_planters_collect_every"] = args.every
+
+    modes = [x.strip() for x in args.modes.split(",") if x.strip()] or [None]
+    for mode in modes:
+        runSettings = dict(setdat)
+        if mode is not None:
+            runSettings.update(COLLECT_MODES[mode])
+        simulator = PlanterSimulator(runSettings, args.hours, args.check_interval, args.collect_travel,
+                                     args.place_travel, args.decay, args.start_nectar)
+        printSummary(mode or "profile settings", simulator.run())
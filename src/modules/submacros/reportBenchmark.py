@@ -0,0 +1,338 @@
+"""
+Report drawer benchmark.
+
+Feeds HourlyReportDrawer, FinalReportDrawer and ItemReportDrawer deterministic
+synthetic session data, times every drawing stage and optionally compares the
+output against golden images. Runs headless, so it also works on Linux.
+
+Run from the src folder:
+    python -m modules.submacros.reportBenchmark --hours 1 8 24
+    python -m modules.submacros.reportBenchmark --golden ../report_golden --update-golden
+    python -m modules.submacros.reportBenchmark --golden ../report_golden
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import random
+import sys
+import time
+import types
+from datetime import datetime
+
+# every clock read by the drawers is pinned to this so the images are reproducible
+FIXED_NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+# macOS frameworks / GUI libraries the drawer modules import at module level but
+# never use while drawing. They are replaced only when they cannot be imported.
+HEADLESS_MODULES = [
+    "pyautogui", "pygetwindow", "Quartz", "Quartz.CoreGraphics", "AppKit",
+    "ApplicationServices", "CoreFoundation", "ocrmac",
+]
+
+STAT_MONITOR_STAGES = [
+    "_drawPanel", "_drawChartTile", "_drawYAxisLabels", "_drawTimeLabels", "_drawUptimeRows",
+    "_drawActivityCard", "_drawLegacyBuffsCard", "_drawLegacyPlantersCard", "_drawLegacyStatsCard",
+    "_drawLegacyInfoCard",
+]
+ITEM_REPORT_STAGES = ["_drawPanel", "_drawItemCards", "_drawTimeline", "_drawTopThree"]
+
+
+class _HeadlessModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: None
+
+
+def _installHeadlessShims():
+    for name in HEADLESS_MODULES:
+        if name in sys.modules:
+            continue
+        try:
+            importlib.import_module(name)
+        except Exception:
+            module = _HeadlessModule(name)
+            if name == "pyautogui":
+                module.size = lambda: (1920, 1080)
+            sys.modules[name] = module
+            parent, _, child = name.rpartition(".")
+            if parent in sys.modules:
+                setattr(sys.modules[parent], child, module)
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return FIXED_NOW
+
+
+@contextlib.contextmanager
+def _frozenClock(*modules):
+    saved = [(module, module.datetime) for module in modules]
+    for module in modules:
+        module.datetime = _FrozenDatetime
+    try:
+        yield
+    finally:
+        for module, value in saved:
+            module.datetime = value
+
+
+def _timeStages(drawer, names, timings):
+    """Wrap drawer methods so their (inclusive) run time is added to `timings`."""
+    for name in names:
+        method = getattr(drawer, name, None)
+        if method is None:
+            continue
+
+        def timed(*args, _method=method, _name=name, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                timings[_name] = timings.get(_name, 0) + time.perf_counter() - start
+
+        setattr(drawer, name, timed)
+
+
+def syntheticSession(hours, seed=0):
+    """Deterministic session data covering `hours` hours of macroing."""
+    from modules.submacros.hourlyReport import (BUFF_RENDER_CONFIG, DEFAULT_HOURLY_BUFFS, DEFAULT_UPTIME_BUFFS,
+                                                MAX_UPTIME_BUFF_OPTIONS, expandUptimeBuffDataKeys)
+    from modules.submacros.itemMonitor import ITEM_META
+
+    rng = random.Random(f"{seed}-{hours}")
+    minutes = max(1, int(hours * 60))
+    startHoney = 1_250_000_000
+
+    # gather ~11 minutes, convert ~4, with the occasional bad OCR reading of 0
+    honey, backpack = [], []
+    currentHoney, fill = startHoney, 0.0
+    for minute in range(minutes + 1):
+        if minute % 15 < 11:
+            fill = min(100.0, fill + rng.uniform(6, 13))
+        else:
+            converted = min(fill, 35.0)
+            fill -= converted
+            currentHoney += int(converted * rng.uniform(2.5e5, 4e5))
+        honey.append(0 if rng.random() < 0.01 else currentHoney)
+        backpack.append(round(fill))
+
+    uptimeBuffs = DEFAULT_UPTIME_BUFFS[:MAX_UPTIME_BUFF_OPTIONS]
+    slots = minutes * 10
+    sessionUptime = {}
+    for dataKey in expandUptimeBuffDataKeys(uptimeBuffs):
+        cfg = BUFF_RENDER_CONFIG.get(dataKey)
+        chartType, maxY = (cfg[0], cfg[1]) if cfg else ("stackable", 10)
+        values, value = [], 0
+        for _ in range(slots):
+            if chartType == "binary":
+                if rng.random() < 0.03:
+                    value = 1 - value
+            elif rng.random() < 0.1:
+                value = max(0, min(maxY, value + rng.choice((-2, -1, 1, 2))))
+            values.append(int(value) if float(value).is_integer() else value)
+        sessionUptime[dataKey] = values
+    sessionIntervals = [1 if (i // 10) % 15 < 11 else 0 for i in range(slots)]
+
+    counters = {
+        "bugs": rng.randint(0, 30) * hours,
+        "quests_completed": rng.randint(0, 4) * hours,
+        "vicious_bees": rng.randint(0, 2) * hours,
+        "gathering_time": minutes * 60 * 0.7,
+        "converting_time": minutes * 60 * 0.2,
+        "bug_run_time": minutes * 60 * 0.04,
+        "misc_time": minutes * 60 * 0.06,
+    }
+    hourCounters = {k: v / max(hours, 1) for k, v in counters.items()}
+
+    items = sorted(ITEM_META)
+    collected = {key: rng.randint(1, 400) * hours for key in rng.sample(items, 12)}
+    timeline = {m: rng.randint(0, 9) for m in range(60) if rng.random() < 0.4}
+
+    return {
+        "hours": hours,
+        "session_time": minutes * 60,
+        "start_honey": startHoney,
+        "start_time": FIXED_NOW.timestamp() - minutes * 60,
+        "hourly_stats": {
+            "honey_per_min": honey[-61:],
+            "backpack_per_min": backpack[-61:],
+            **hourCounters,
+        },
+        "session_stats": {"honey_per_min": honey, "backpack_per_min": backpack, **counters},
+        "uptime_buffs": uptimeBuffs,
+        "hourly_buffs": list(DEFAULT_HOURLY_BUFFS),
+        "hourly_uptime": {k: v[-600:] + [0] * (600 - len(v[-600:])) for k, v in sessionUptime.items()},
+        "hourly_intervals": (sessionIntervals[-600:] + [0] * 600)[:600],
+        "session_uptime": sessionUptime,
+        "session_intervals": sessionIntervals,
+        "buff_quantity": [str(rng.randint(1, 6)) for _ in DEFAULT_HOURLY_BUFFS],
+        "nectar_quantity": [rng.randint(0, 100) for _ in range(5)],
+        # no start_time: the item report would otherwise print a live uptime
+        "item_snapshot": {
+            "collected_items": collected,
+            "session_collected_items": collected,
+            "item_timeline": timeline,
+            "total_items_detected": sum(collected.values()) // 3,
+            "query_total": minutes * 60,
+        },
+    }
+
+
+def _encode(canvas):
+    """What the report generators do before sending: upscale, flatten, PNG encode."""
+    w, h = canvas.size
+    image = canvas.resize((int(w * 1.2), int(h * 1.2))).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return image, len(buffer.getvalue())
+
+
+def _runCase(name, drawFunc, drawer, stages):
+    timings = {}
+    _timeStages(drawer, stages, timings)
+    start = time.perf_counter()
+    canvas = drawFunc()
+    timings["draw"] = time.perf_counter() - start
+    tiles = getattr(drawer, "chartTileStats", None)
+    start = time.perf_counter()
+    image, size = _encode(canvas)
+    timings["encode"] = time.perf_counter() - start
+    return {"name": name, "image": image, "bytes": size, "timings": timings, "tiles": dict(tiles) if tiles else None}
+
+
+def runBenchmarks(hours=(1, 8, 24), theme="brown", accent="green", seed=0):
+    """Render every report for each session length. Returns a list of case results."""
+    _installHeadlessShims()
+    import modules.submacros.hourlyReport as hourlyReportModule
+    import modules.submacros.itemMonitor as itemMonitorModule
+    from modules.submacros.hourlyReport import HourlyReport, HourlyReportDrawer
+    from modules.submacros.finalReport import FinalReport, FinalReportDrawer
+    from modules.submacros.itemMonitor import ItemReportDrawer
+
+    results = []
+    with _frozenClock(hourlyReportModule, itemMonitorModule):
+        hourlyReport = HourlyReport()
+        finalReport = FinalReport(hourlyReport)
+        for h in hours:
+            data = syntheticSession(h, seed)
+            stats = dict(data["hourly_stats"], start_honey=data["start_honey"], start_time=data["start_time"])
+            honeyValues, honeyPerSec = hourlyReport.buildHoneyPerSec(stats["honey_per_min"])
+            validHoney = [x for x in honeyValues if x] or honeyValues
+            sessionHoney = max(0, validHoney[-1] - data["start_honey"])
+            honeyThisHour = max(0, validHoney[-1] - validHoney[0])
+
+            def drawHourly(drawer):
+                return drawer.drawHourlyReport(stats, data["session_time"], honeyPerSec, sessionHoney, honeyThisHour,
+                                               validHoney, data["buff_quantity"], data["nectar_quantity"], "",
+                                               data["hourly_uptime"], data["hourly_intervals"],
+                                               configuredUptimeBuffs=data["uptime_buffs"],
+                                               configuredHourlyBuffs=data["hourly_buffs"])
+
+            # cold: nothing pre-rendered, every chart tile is drawn at report time
+            drawer = HourlyReportDrawer(theme=theme, accent=accent)
+            results.append(_runCase(f"hourly-{h}h", lambda: drawHourly(drawer), drawer, STAT_MONITOR_STAGES))
+
+            # warm: tiles were kept up to date until the sample before the hour boundary
+            drawer = HourlyReportDrawer(theme=theme, accent=accent)
+            previousUptime = {k: v[:-1] + [0] for k, v in data["hourly_uptime"].items()}
+            drawer.prerenderHourlyCharts(honeyPerSec[:-1], stats["backpack_per_min"][:-1], previousUptime, data["uptime_buffs"])
+            drawer.prerenderHourlyCharts(honeyPerSec, stats["backpack_per_min"], previousUptime, data["uptime_buffs"])
+            results.append(_runCase(f"hourly-{h}h-prerendered", lambda: drawHourly(drawer), drawer, STAT_MONITOR_STAGES))
+
+            session = dict(data["session_stats"])
+            normalizedHoney = finalReport._normalizeCumulativeHoneySeries(session["honey_per_min"], baseline=data["start_honey"])
+            session["honey_per_min"] = normalizedHoney
+            sessionHoneyPerSec = finalReport._buildHoneyPerSec(normalizedHoney)
+            validSessionHoney = [x for x in normalizedHoney if x > 0] or normalizedHoney
+            totalHoney = max(0, validSessionHoney[-1] - data["start_honey"])
+            sessionStats = {
+                "total_session_time": data["session_time"],
+                "total_honey": totalHoney,
+                "avg_honey_per_hour": totalHoney / max(data["session_time"] / 3600, 1e-9),
+                "peak_honey_rate": max(sessionHoneyPerSec),
+                "total_bugs": session["bugs"],
+                "total_quests": session["quests_completed"],
+                "total_vicious_bees": session["vicious_bees"],
+                **finalReport._buildSessionTimeBreakdown(session, data["session_time"]),
+            }
+            finalDrawer = FinalReportDrawer(theme=theme, accent=accent)
+            results.append(_runCase(
+                f"final-{h}h",
+                lambda: finalDrawer.drawFinalReport(session, sessionStats, sessionHoneyPerSec, totalHoney, validSessionHoney,
+                                                    data["buff_quantity"], data["nectar_quantity"], "",
+                                                    data["session_uptime"], data["session_intervals"],
+                                                    configuredUptimeBuffs=data["uptime_buffs"],
+                                                    configuredHourlyBuffs=data["hourly_buffs"]),
+                finalDrawer, STAT_MONITOR_STAGES))
+
+            itemDrawer = ItemReportDrawer(theme=theme, accent=accent)
+            results.append(_runCase(
+                f"item-{h}h",
+                lambda: itemDrawer.draw(data["item_snapshot"], report_type="hourly" if h <= 1 else "session"),
+                itemDrawer, ITEM_REPORT_STAGES))
+    return results
+
+
+def compareImages(image, goldenPath, pixelThreshold=16, tolerance=0.001):
+    """Compare against a golden PNG. A pixel differs when any channel is off by more
+    than `pixelThreshold`; the image matches while at most `tolerance` of the pixels differ.
+    Returns (matches, fraction of differing pixels)."""
+    import numpy as np
+    from PIL import Image
+
+    golden = Image.open(goldenPath).convert("RGB")
+    if golden.size != image.size:
+        return False, 1.0
+    diff = np.abs(np.asarray(image, dtype=np.int16) - np.asarray(golden, dtype=np.int16)).max(axis=2)
+    fraction = float((diff > pixelThreshold).mean())
+    return fraction <= tolerance, fraction
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hourly/final/item report drawers.")
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 8, 24], help="synthetic session lengths")
+    parser.add_argument("--theme", default="brown")
+    parser.add_argument("--accent", default="green")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--golden", help="folder with golden images to compare against")
+    parser.add_argument("--update-golden", action="store_true", help="write the rendered images as the new golden images")
+    parser.add_argument("--tolerance", type=float, default=0.001, help="fraction of pixels allowed to differ")
+    args = parser.parse_args(argv)
+
+    hours = [int(h) if float(h).is_integer() else h for h in args.hours]
+    results = runBenchmarks(hours, theme=args.theme, accent=args.accent, seed=args.seed)
+
+    failed = False
+    for result in results:
+        timings = result["timings"]
+        stages = ", ".join(f"{k} {v*1000:.0f}ms" for k, v in sorted(timings.items(), key=lambda kv: -kv[1])
+                           if k not in ("draw", "encode"))
+        line = (f"{result['name']:<24} draw {timings['draw']*1000:7.0f}ms  encode {timings['encode']*1000:6.0f}ms"
+                f"  {result['bytes']/1024:7.0f}KB  [{stages}]")
+        if result["tiles"]:
+            tiles = result["tiles"]
+            line += f"  chart tiles: {tiles['reused']} reused, {tiles['partial']} patched, {tiles['full']} redrawn"
+        if args.golden:
+            goldenPath = os.path.join(args.golden, f"{result['name']}.png")
+            if args.update_golden:
+                os.makedirs(args.golden, exist_ok=True)
+                result["image"].save(goldenPath)
+                line += "  golden updated"
+            elif not os.path.exists(goldenPath):
+                failed = True
+                line += "  golden missing"
+            else:
+                matches, fraction = compareImages(result["image"], goldenPath, tolerance=args.tolerance)
+                failed = failed or not matches
+                line += f"  {'ok' if matches else 'MISMATCH'} ({fraction*100:.3f}% pixels differ)"
+        print(line)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
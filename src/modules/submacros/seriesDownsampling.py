@@ -0,0 +1,91 @@
+"""
+Downsampling for long report series.
+
+The session report plots the whole run, so a multi-day session has tens of
+thousands of samples per series while a graph is only a few thousand pixels
+wide. minMaxDownsample reduces a series to a point budget by keeping the min
+and max of every bucket, so peaks and dips survive. SeriesRollup keeps minute,
+10-minute and hour min/max buckets up to date as samples arrive, so the final
+report can pick a resolution without walking the full history.
+"""
+
+ROLLUP_RESOLUTIONS = (("minute", 60), ("10-minute", 600), ("hour", 3600))
+
+
+def minMaxDownsample(values, maxPoints):
+    """Reduce `values` to at most `maxPoints` evenly spaced points.
+
+    Every bucket contributes its min and max in the order they occur, so the
+    points stay evenly spaced along x. The first and last samples are kept.
+    Series that already fit are returned unchanged (as a list).
+    """
+    count = len(values)
+    if count <= maxPoints or maxPoints < 4:
+        return list(values)
+    buckets = (maxPoints - 2) // 2
+    size = (count - 2) / buckets
+    out = [values[0]]
+    for b in range(buckets):
+        chunk = values[1 + int(b * size):1 + int((b + 1) * size)]
+        if not chunk:
+            continue
+        lo, hi = min(chunk), max(chunk)
+        if chunk.index(lo) <= chunk.index(hi):
+            out += (lo, hi)
+        else:
+            out += (hi, lo)
+    out.append(values[-1])
+    return out
+
+
+class SeriesRollup:
+    """Min/max buckets of one series at minute, 10-minute and hour resolution, kept online."""
+
+    def __init__(self, samplePeriod):
+        self.samplePeriod = samplePeriod
+        self.count = 0
+        # resolution name -> (samples per bucket, [[lo, hi, loFirst], ...]); resolutions
+        # no coarser than the sample period are skipped, the raw series covers them
+        self.levels = {}
+        for name, seconds in ROLLUP_RESOLUTIONS:
+            factor = int(seconds // samplePeriod)
+            if factor > 1:
+                self.levels[name] = (factor, [])
+
+    @classmethod
+    def fromValues(cls, values, samplePeriod):
+        rollup = cls(samplePeriod)
+        for value in values:
+            rollup.append(value)
+        return rollup
+
+    def append(self, value):
+        for factor, buckets in self.levels.values():
+            if self.count % factor == 0:
+                buckets.append([value, value, True])
+                continue
+            bucket = buckets[-1]
+            if value < bucket[0]:
+                bucket[0] = value
+                bucket[2] = False
+            elif value > bucket[1]:
+                bucket[1] = value
+                bucket[2] = True
+        self.count += 1
+
+    def points(self, name):
+        """Flattened min/max points of one resolution (the last bucket may be partial)."""
+        out = []
+        for lo, hi, loFirst in self.levels[name][1]:
+            out += (lo, hi) if loFirst else (hi, lo)
+        return out
+
+    def view(self, maxPoints):
+        """Finest resolution that fits in `maxPoints`, reduced further if even hours don't fit.
+        Returns None when there are no rollup levels."""
+        if not self.levels:
+            return None
+        for name in self.levels:
+            if len(self.levels[name][1]) * 2 <= maxPoints:
+                return self.points(name)
+        return minMaxDownsample(self.points(name), maxPoints)
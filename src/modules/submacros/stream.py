@@ -11,10 +11,124 @@ import os
 import gc
 import sys
 from collections import deque
+from modules.submacros.tileStream import TileEncoder
 import logging
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
 
+CAPTURE_IDLE_TIMEOUT = 2 #seconds without viewers before capture and encoding stop
+WINDOW_CHECK_INTERVAL = 2 #seconds between roblox window bound checks
+MAX_STATIC_CAPTURE_INTERVAL = 0.25 #slowest capture rate while frames are identical
+STATIC_REFRESH_INTERVAL = 1 #identical frames are still sent this often
+
+
+#(scale, jpeg quality) presets, each encoded once per frame while someone is watching it
+RENDITIONS = [
+    {"name": "high", "scale": 1.0, "quality": 80},
+    {"name": "medium", "scale": 0.75, "quality": 65},
+    {"name": "low", "scale": 0.5, "quality": 50},
+]
+START_RENDITION = 1
+SWITCH_COOLDOWN = 3 #seconds a client stays on a rendition before moving again
+BUSY_STEP_DOWN = 0.8 #share of the frame interval spent writing that means the link can't keep up
+BUSY_STEP_UP = 0.25 #share that leaves room for the next rendition up
+
+
+class FrameBroadcaster:
+    '''
+    The latest encoded frame and its sequence number. Frames are encoded once and
+    every subscriber writes the same bytes; a subscriber that is still writing when
+    the next frames are published skips straight to the newest one.
+    '''
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.data = None
+        self.published_at = 0
+        self.subscribers = {}
+        self.publish_times = deque(maxlen=120)
+
+    def publish(self, data):
+        with self.cond:
+            self.seq += 1
+            self.data = data
+            self.published_at = time.time()
+            self.publish_times.append(self.published_at)
+            self.cond.notify_all()
+
+    def subscribe(self, client_id):
+        with self.cond:
+            #start from the current frame if it is fresh, a static scene may not publish another for a while
+            fresh = self.data is not None and time.time() - self.published_at < 2
+            self.subscribers[client_id] = max(0, self.seq - 1) if fresh else self.seq
+
+    def unsubscribe(self, client_id):
+        with self.cond:
+            self.subscribers.pop(client_id, None)
+
+    def subscriber_count(self):
+        return len(self.subscribers)
+
+    def wait_next(self, client_id, timeout=0.5):
+        '''(data, published at, frames skipped) of the newest frame after this client's last, or None on timeout'''
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > self.subscribers.get(client_id, self.seq), timeout=timeout):
+                return None
+            last_seq = self.subscribers[client_id]
+            skipped = self.seq - last_seq - 1 if last_seq else 0
+            self.subscribers[client_id] = self.seq
+            return self.data, self.published_at, skipped
+
+    def encodes_per_second(self):
+        times = list(self.publish_times)
+        if len(times) < 2 or time.time() - times[-1] > 1:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+
+class StreamClient:
+    '''One viewer: its rendition and what its link manages'''
+    def __init__(self, client_id, rendition):
+        self.id = client_id
+        self.rendition = rendition
+        self.connected = time.time()
+        self.last_switch = self.connected
+        self.frames = 0
+        self.dropped = 0
+        self.bytes = 0
+        self.busy = 0.5 #smoothed share of the frame interval spent writing
+        self.throughput = 0 #smoothed bytes/s while writing
+        self.latency = 0 #smoothed seconds from encode to written
+        self.sent = deque(maxlen=60) #(time, bytes)
+
+    def record(self, size, write_seconds, latency, skipped, frame_interval):
+        self.frames += 1
+        self.dropped += skipped
+        self.bytes += size
+        self.sent.append((time.time(), size))
+        self.busy = 0.8 * self.busy + 0.2 * min(2.0, write_seconds / frame_interval)
+        if write_seconds > 0:
+            self.throughput = 0.8 * self.throughput + 0.2 * (size / write_seconds) if self.throughput else size / write_seconds
+        self.latency = 0.8 * self.latency + 0.2 * latency if self.latency else latency
+
+    def bytes_per_second(self):
+        sent = list(self.sent)
+        if len(sent) < 2 or sent[-1][0] == sent[0][0]:
+            return 0.0
+        return sum(size for _, size in sent[1:]) / (sent[-1][0] - sent[0][0])
+
+    def stats(self):
+        return {
+            "id": self.id,
+            "rendition": RENDITIONS[self.rendition]["name"] if self.rendition is not None else "tiles",
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "bytes_per_second": round(self.bytes_per_second()),
+            "throughput_estimate": round(self.throughput),
+            "latency_ms": round(self.latency * 1000),
+            "seconds": round(time.time() - self.connected, 1),
+        }
+
 
 class cloudflaredStream:
     def __init__(self):
@@ -32,14 +146,21 @@ class cloudflaredStream:
         self.frame_lock = threading.Lock()
         self.frame_ready = threading.Event()
         self.capture_thread = None
+        self.encode_thread = None
+        self.window_bounds = None
+        self.thread_lock = threading.Lock()
+        self.reniced = False
+        self.renditions = [FrameBroadcaster() for _ in RENDITIONS]
+        self.tile_encoder = TileEncoder()
+        self.clients = {}
+        self.clients_lock = threading.Lock()
+        self.next_client_id = 0
         
         self.fps_history = deque(maxlen=60)
         self.last_fps_check = time.time()
         self.current_fps = 0
         
-        self.resolution = 1.0
-        self.jpeg_quality = 60 
-        self.adaptive_quality = True
+        self.resolution = 1.0 #capture scale, the renditions scale from there
 
  
         self.HTML_PAGE = """
@@ -145,6 +266,75 @@ class cloudflaredStream:
                             img.src = "/video_feed?t=" + new Date().getTime();
                         }
                     });
+
+                    // Tile mode: only the changed parts of the picture are sent and drawn onto a canvas
+                    const canvas = document.getElementById('tile-canvas');
+                    const tileButton = document.getElementById('tile-mode');
+                    let tileReader = null;
+
+                    async function drawTiles(msg, ctx) {
+                        const view = new DataView(msg.buffer, msg.byteOffset, msg.byteLength);
+                        const width = view.getUint16(1), height = view.getUint16(3);
+                        const tile = view.getUint16(5), count = view.getUint16(7);
+                        if (canvas.width !== width || canvas.height !== height) {
+                            canvas.width = width;
+                            canvas.height = height;
+                        }
+                        let offset = 9;
+                        const pending = [];
+                        for (let i = 0; i < count; i++) {
+                            const col = view.getUint16(offset), row = view.getUint16(offset + 2);
+                            const length = view.getUint32(offset + 4);
+                            offset += 8;
+                            const blob = new Blob([msg.subarray(offset, offset + length)], {type: 'image/jpeg'});
+                            offset += length;
+                            pending.push(createImageBitmap(blob).then(bitmap => [col, row, bitmap]));
+                        }
+                        for (const [col, row, bitmap] of await Promise.all(pending)) {
+                            ctx.drawImage(bitmap, col * tile, row * tile);
+                            bitmap.close();
+                        }
+                    }
+
+                    async function startTiles() {
+                        const ctx = canvas.getContext('2d');
+                        const response = await fetch('/tile_feed?t=' + new Date().getTime());
+                        tileReader = response.body.getReader();
+                        let buffer = new Uint8Array(0);
+                        while (tileReader) {
+                            const {value, done} = await tileReader.read();
+                            if (done) break;
+                            const joined = new Uint8Array(buffer.length + value.length);
+                            joined.set(buffer);
+                            joined.set(value, buffer.length);
+                            buffer = joined;
+                            while (buffer.length >= 4) {
+                                const length = new DataView(buffer.buffer, buffer.byteOffset).getUint32(0);
+                                if (buffer.length < 4 + length) break;
+                                await drawTiles(buffer.subarray(4, 4 + length), ctx);
+                                buffer = buffer.slice(4 + length);
+                            }
+                        }
+                    }
+
+                    if (tileButton) {
+                        tileButton.addEventListener('click', function() {
+                            if (tileReader) {
+                                tileReader.cancel();
+                                tileReader = null;
+                                canvas.style.display = 'none';
+                                img.style.display = 'block';
+                                img.src = "/video_feed?t=" + new Date().getTime();
+                                tileButton.textContent = 'Tile Mode';
+                            } else {
+                                img.src = '';
+                                img.style.display = 'none';
+                                canvas.style.display = 'block';
+                                tileButton.textContent = 'Image Mode';
+                                startTiles().catch(err => console.log('Tile stream error', err));
+                            }
+                        });
+                    }
                 });
             </script>
         </head>
@@ -153,6 +343,7 @@ class cloudflaredStream:
             <div class="video-container">
                 {% if streaming %}
                     <img src="/video_feed" alt="Live Stream">
+                    <canvas id="tile-canvas" style="width: 100%; display: none; border-radius: 10px;"></canvas>
                     <div class="stats">FPS: <span id="fps-counter">0.0</span></div>
                 {% else %}
                     <p style="text-align:center; font-size:1.2rem;">🔘 Macro Stopped</p>
@@ -160,6 +351,7 @@ class cloudflaredStream:
             </div>
             {% if streaming %}
             <button id="refresh-stream" class="refresh-btn">Refresh Stream</button>
+            <button id="tile-mode" class="refresh-btn">Tile Mode</button>
             {% endif %}
         </body>
         </html>
@@ -167,7 +359,9 @@ class cloudflaredStream:
 
         self.app.add_url_rule('/', 'index', self.index)
         self.app.add_url_rule('/video_feed', 'video_feed', self.videoFeed)
+        self.app.add_url_rule('/tile_feed', 'tile_feed', self.tileFeed)
         self.app.add_url_rule('/fps', 'fps', self.get_fps, methods=['GET'])
+        self.app.add_url_rule('/stats', 'stats', self.statsEndpoint, methods=['GET'])
         
         #enable garbage collection
         gc.enable()
@@ -195,12 +389,41 @@ class cloudflaredStream:
         from flask import jsonify
         return jsonify({'fps': self.current_fps})
 
+    def statsEndpoint(self):
+        from flask import jsonify
+        return jsonify(self.get_stats())
+
     def videoFeed(self):
         if not self.streaming:
             return "", 204
         return Response(self._generate_frames_with_restart(), 
                         mimetype='multipart/x-mixed-replace; boundary=frame')
     
+    def tileFeed(self):
+        if not self.streaming:
+            return "", 204
+        return Response(self._generate_tiles(), mimetype='application/octet-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    def _generate_tiles(self):
+        #changed tiles only, see tileStream
+        client = self._add_client(None)
+        try:
+            self.start_capture_thread()
+            self.start_encode_thread()
+            while self.streaming:
+                message = self.tile_encoder.wait_message(client.id)
+                if message is None:
+                    self.start_capture_thread()
+                    self.start_encode_thread()
+                    continue
+                queued_at = time.time()
+                yield message
+                written = time.time()
+                client.record(len(message), written - queued_at, written - queued_at, 0, 1 / self.target_fps)
+        finally:
+            self._remove_client(client)
+
     def update_fps(self):
 
         now = time.time()
@@ -211,34 +434,59 @@ class cloudflaredStream:
             time_diff = self.fps_history[-1] - self.fps_history[0]
             if time_diff > 0:  # Avoid division by zero
                 self.current_fps = (len(self.fps_history) - 1) / time_diff
-        
-        # Adjust quality if enabled and we have enough data
-        if self.adaptive_quality and len(self.fps_history) >= 30:
-            self._adjust_quality()
-    
-    def _adjust_quality(self):
 
-        if self.current_fps < 30:
-            if self.jpeg_quality > 40:
-                self.jpeg_quality -= 5
-                
-            elif self.resolution > 0.5:
-                self.resolution -= 0.1
-
-        elif self.current_fps > 55:
-            if self.resolution < 1.0:
-                self.resolution += 0.1
-                self.resolution = min(1.0, self.resolution)
-            elif self.jpeg_quality < 80:
-                self.jpeg_quality += 5
-    
+    def client_count(self):
+        return len(self.clients)
+
+    def _add_client(self, rendition=START_RENDITION):
+        #rendition None is a tile-delta viewer
+        with self.clients_lock:
+            self.next_client_id += 1
+            client = StreamClient(self.next_client_id, rendition)
+            self.clients[client.id] = client
+        if rendition is None:
+            self.tile_encoder.subscribe(client.id)
+        else:
+            self.renditions[client.rendition].subscribe(client.id)
+        return client
+
+    def _remove_client(self, client):
+        if client.rendition is None:
+            self.tile_encoder.unsubscribe(client.id)
+        else:
+            self.renditions[client.rendition].unsubscribe(client.id)
+        with self.clients_lock:
+            self.clients.pop(client.id, None)
+
+    def _adapt_rendition(self, client):
+        #per client: step down when writing a frame takes most of the frame interval, up when it barely registers
+        if time.time() - client.last_switch < SWITCH_COOLDOWN:
+            return
+        if client.busy > BUSY_STEP_DOWN and client.rendition < len(RENDITIONS) - 1:
+            new_rendition = client.rendition + 1
+        elif client.busy < BUSY_STEP_UP and client.rendition > 0:
+            new_rendition = client.rendition - 1
+        else:
+            return
+        self.renditions[new_rendition].subscribe(client.id)
+        self.renditions[client.rendition].unsubscribe(client.id)
+        client.rendition = new_rendition
+        client.last_switch = time.time()
+        client.busy = 0.5
+
     def _generate_frames_with_restart(self):
         max_restarts = 5
+        client = self._add_client()
+        try:
+            yield from self._generate_frames_for_client(client, max_restarts)
+        finally:
+            self._remove_client(client)
+
+    def _generate_frames_for_client(self, client, max_restarts):
         restart_count = 0
-        
         while self.streaming and restart_count < max_restarts:
             try:
-                yield from self.generateFrames()
+                yield from self.generateFrames(client)
                 #generator exited normally
                 time.sleep(0.5)
                 restart_count += 1
@@ -252,25 +500,140 @@ class cloudflaredStream:
         print("Max restarts reached or streaming stopped.")
 
     def start_capture_thread(self):
-        if self.capture_thread is None or not self.capture_thread.is_alive():
-            self.capture_thread = threading.Thread(target=self._capture_screen, daemon=True)
-            self.capture_thread.start()
-            print("Capture thread started")
+        #called from every client's thread
+        with self.thread_lock:
+            if self.capture_thread is None or not self.capture_thread.is_alive():
+                self.capture_thread = threading.Thread(target=self._capture_screen, daemon=True)
+                self.capture_thread.start()
+                print("Capture thread started")
+
+    def start_encode_thread(self):
+        with self.thread_lock:
+            if self.encode_thread is None or not self.encode_thread.is_alive():
+                self.encode_thread = threading.Thread(target=self._encode_frames, daemon=True)
+                self.encode_thread.start()
+
+    def _encode_frames(self):
+        #one encode per captured frame, shared by every client
+        last_gc_time = time.time()
+        self.frame_count = 0
+        self.fps_history.clear()
+        idle_since = None
+        while self.streaming:
+            if not self.client_count():
+                idle_since = idle_since or time.time()
+                if time.time() - idle_since > CAPTURE_IDLE_TIMEOUT:
+                    break
+                time.sleep(0.1)
+                continue
+            idle_since = None
+
+            elapsed = time.time() - self.last_frame_time
+            frame_interval = 1.0 / self.target_fps
+            if elapsed < frame_interval:
+                time.sleep(frame_interval - elapsed)
+                continue
+
+            #wait for a new frame
+            if not self.frame_ready.wait(timeout=0.5):
+                continue
+            with self.frame_lock:
+                frame = self.frame_buffer
+                self.frame_ready.clear()
+            if frame is None:
+                continue
+
+            try:
+                self.last_frame_time = time.time()
+                self.frame_count += 1
+                self.update_fps()
+                #only the renditions someone is watching
+                for rendition, broadcaster in zip(RENDITIONS, self.renditions):
+                    if not broadcaster.subscriber_count():
+                        continue
+                    scaled = frame
+                    if rendition["scale"] < 1.0:
+                        h, w = frame.shape[:2]
+                        scaled = cv2.resize(frame, (int(w * rendition["scale"]), int(h * rendition["scale"])), interpolation=cv2.INTER_AREA)
+                    encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), rendition["quality"],
+                                   int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]
+                    ret, buffer = cv2.imencode('.jpg', scaled, encode_param)
+                    if ret:
+                        broadcaster.publish(b'--frame\r\n'
+                                            b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+                if self.tile_encoder.subscriber_count():
+                    self.tile_encoder.update(frame)
+                frame = None
+                scaled = None
+                buffer = None
+            except Exception as e:
+                print(f"Frame encoding error: {e}")
+                time.sleep(0.1)
+
+            if time.time() - last_gc_time > 3:
+                gc.collect()
+                last_gc_time = time.time()
     
+    def _capture_region(self, sct):
+        #the roblox window, or the whole monitor if it can't be found
+        try:
+            if self.window_bounds is None:
+                from modules.screen.robloxWindow import RobloxWindowBounds
+                self.window_bounds = RobloxWindowBounds()
+            self.window_bounds.setRobloxWindowBounds(setYOffset=False)
+            bounds = self.window_bounds
+            if bounds.mw > 0 and bounds.mh > 0:
+                return {"left": bounds.mx, "top": bounds.my, "width": bounds.mw, "height": bounds.mh}
+        except Exception as e:
+            print(f"Stream could not find the roblox window: {e}")
+        return sct.monitors[1]
+
     def _capture_screen(self):
         # Optimize process priority on macOS
-        if sys.platform == 'darwin':
+        if sys.platform == 'darwin' and not self.reniced:
             try:
                 os.system('renice -n -20 -p ' + str(os.getpid()))
+                self.reniced = True
             except:
                 pass
         
         with mss.mss(with_cursor=True) as sct:
-            monitor = sct.monitors[1]
+            region = None
+            region_checked = 0
+            last_hash = None
+            last_handoff = 0
+            interval = 1 / self.target_fps
+            idle_since = None
             
             while self.streaming:
+                #only capture while someone is watching
+                if not self.client_count():
+                    idle_since = idle_since or time.time()
+                    if time.time() - idle_since > CAPTURE_IDLE_TIMEOUT:
+                        break
+                    time.sleep(0.1)
+                    continue
+                idle_since = None
+
+                if region is None or time.time() - region_checked > WINDOW_CHECK_INTERVAL:
+                    region = self._capture_region(sct)
+                    region_checked = time.time()
+
                 try:
-                    screen = np.array(sct.grab(monitor), dtype=np.uint8)
+                    screen = np.array(sct.grab(region), dtype=np.uint8)
+
+                    #a sparse sample is enough to tell a static scene
+                    frame_hash = hash(screen[::16, ::16, :3].tobytes())
+                    unchanged = frame_hash == last_hash
+                    last_hash = frame_hash
+                    if unchanged:
+                        #back off while nothing moves, but still refresh viewers now and then
+                        interval = min(interval * 1.5, MAX_STATIC_CAPTURE_INTERVAL)
+                        if time.time() - last_handoff < STATIC_REFRESH_INTERVAL:
+                            time.sleep(interval)
+                            continue
+                    else:
+                        interval = 1 / self.target_fps
                     
                     #resolution scaling if needed
                     if self.resolution < 1.0:
@@ -284,97 +647,36 @@ class cloudflaredStream:
                     with self.frame_lock:
                         self.frame_buffer = screen
                         self.frame_ready.set()
+                    last_handoff = time.time()
                         
                 except Exception as e:
                     print(f"Capture error: {e}")
+                    region = None
                 
-                #120 captures per second
-                time.sleep(1/120)
+                time.sleep(interval)
+        print("Capture thread stopped")
 
-    def generateFrames(self):
+    def generateFrames(self, client):
         self.start_capture_thread()
-        
-        #timing variables
-        frame_interval = 1.0 / self.target_fps
-        last_gc_time = time.time()
-        start_time = time.time()
-        frames_since_gc = 0
-        
-        #JPEG encoding parameters
-        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality,
-                       int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]
-        
-        #restart after 30 seconds to prevent degradation
-        max_run_time = 30  # seconds
-        
-        # Frame tracking
-        self.frame_count = 0
-        self.fps_history.clear()
-        
+        self.start_encode_thread()
+
+        #nothing per client to degrade any more (encoding is shared), so no periodic restart
         while self.streaming:
-            if time.time() - start_time > max_run_time:
-                print("Periodic capture restart for performance")
-                break
-            
-            current_time = time.time()
-            elapsed = current_time - self.last_frame_time
-            
-            if elapsed < frame_interval:
-                sleep_time = frame_interval - elapsed
-                if sleep_time > 0.001:
-                    time.sleep(sleep_time - 0.001)  #slightly less to account for processing
+            broadcaster = self.renditions[client.rendition]
+            #the shared bytes of the newest frame, frames published while we were writing are skipped
+            frame = broadcaster.wait_next(client.id)
+            if frame is None:
+                #capture may have stopped for being idle just as we connected
+                self.start_capture_thread()
+                self.start_encode_thread()
                 continue
-            
-            #wait for a frame to be ready
-            if not self.frame_ready.is_set():
-                self.frame_ready.wait(timeout=0.5)
-                if not self.frame_ready.is_set():
-                    continue
-            
-            #get the latest frame
-            with self.frame_lock:
-                if self.frame_buffer is None:
-                    continue
-                
-                frame = self.frame_buffer.copy()
-                self.frame_ready.clear()
-            
-            try:
-                #update timing and counters
-                self.last_frame_time = time.time()
-                self.frame_count += 1
-                frames_since_gc += 1
-                
-                #update FPS calculation
-                self.update_fps()
-                
-                #encode frame
-                ret, buffer = cv2.imencode('.jpg', frame, encode_param)
-                
-                if not ret:
-                    continue
-                
-                #yield frame
-                frame_data = buffer.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_data + b'\r\n')
-                
-                frame = None
-                buffer = None
-                frame_data = None
-                
-                #garbage collection
-                if frames_since_gc >= 180:
-                    gc.collect()
-                    frames_since_gc = 0
-                
-            except Exception as e:
-                print(f"Frame processing error: {e}")
-                # Force cleanup
-                gc.collect()
-                time.sleep(0.1)
-            
-            time.sleep(0.0001)
+            frame_data, published_at, skipped = frame
+            write_start = time.time()
+            yield frame_data
+            written = time.time()
+            frame_interval = 1 / max(1.0, min(self.target_fps, broadcaster.encodes_per_second() or self.target_fps))
+            client.record(len(frame_data), written - write_start, written - published_at, skipped, frame_interval)
+            self._adapt_rendition(client)
 
     def _run_server(self):
         #use the production WSGI server if available
@@ -461,9 +763,11 @@ class cloudflaredStream:
         except Exception as e:
             print(f"Failed to remove stream URL file: {e}")
         
-        #stop the capture thread
+        #stop the capture and encode threads
         if self.capture_thread and self.capture_thread.is_alive():
             self.capture_thread.join(timeout=1.0)
+        if self.encode_thread and self.encode_thread.is_alive():
+            self.encode_thread.join(timeout=1.0)
         
         #stop Cloudflare tunnel
         if self.cfProc:
@@ -481,8 +785,15 @@ class cloudflaredStream:
         return {
             "fps": self.current_fps,
             "resolution": self.resolution,
-            "quality": self.jpeg_quality,
             "frames_captured": self.frame_count,
             "restarts": self.restart_count,
+            "renditions": [{"name": rendition["name"], "scale": rendition["scale"], "quality": rendition["quality"],
+                            "clients": broadcaster.subscriber_count(),
+                            "encodes_per_second": round(broadcaster.encodes_per_second(), 1)}
+                           for rendition, broadcaster in zip(RENDITIONS, self.renditions)],
+            "encodes_per_second": round(sum(broadcaster.encodes_per_second() for broadcaster in self.renditions), 1),
+            "tiles": {"clients": self.tile_encoder.subscriber_count(), "tiles_encoded": self.tile_encoder.tiles_encoded,
+                      "encode_seconds": round(self.tile_encoder.encode_seconds, 2)},
+            "clients": [client.stats() for client in list(self.clients.values())],
             "url": self.publicURL
         }
@@ -0,0 +1,196 @@
+"""
+Tile-delta encoding for the live stream.
+
+Frames are cut into fixed tiles. A tile is JPEG-encoded only when its pixels
+changed since the previous frame, and the newest encoding of every tile is kept
+with the sequence number it changed at. A viewer is sent the tiles that changed
+since the last message it got, so a viewer that fell behind skips straight to
+the current picture without anything being encoded again for it. Every
+KEYFRAME_INTERVAL seconds, and when it connects or the frame size changes, a
+viewer gets every tile.
+
+Message layout (big endian), each prefixed with its length as a u32:
+    u8 kind (0 delta, 1 keyframe), u16 width, u16 height, u16 tile size, u16 tile count
+    then per tile: u16 column, u16 row, u32 jpeg length, jpeg bytes
+
+Run from the src folder to compare MJPEG and tile-delta bytes and encode time on
+recorded frames (a folder of images or a video file), or on a synthetic scene:
+    python -m modules.submacros.tileStream [--frames recording.mp4] [--tile 64]
+"""
+
+import struct
+import threading
+import time
+import cv2
+import numpy as np
+
+TILE_SIZE = 64
+TILE_QUALITY = 70
+KEYFRAME_INTERVAL = 10 #seconds between full refreshes per viewer
+
+KIND_DELTA = 0
+KIND_KEYFRAME = 1
+
+
+class TileEncoder:
+    def __init__(self, tile=TILE_SIZE, quality=TILE_QUALITY):
+        self.tile = tile
+        self.quality = quality
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.generation = 0 #bumped when the frame size changes
+        self.width = 0
+        self.height = 0
+        self.tiles = {} #(column, row): (seq it changed at, jpeg)
+        self.previous = None
+        self.subscribers = {}
+        self.tiles_encoded = 0
+        self.encode_seconds = 0.0
+
+    def _changed_tiles(self, frame):
+        '''(column, row) of every tile that differs from the previous frame'''
+        h, w = frame.shape[:2]
+        rows, cols = -(-h // self.tile), -(-w // self.tile)
+        if self.previous is None or self.previous.shape != frame.shape:
+            return [(c, r) for r in range(rows) for c in range(cols)], True
+        diff = cv2.absdiff(frame, self.previous)
+        #pad to whole tiles, then reduce each tile to its largest difference
+        if rows * self.tile != h or cols * self.tile != w:
+            diff = cv2.copyMakeBorder(diff, 0, rows * self.tile - h, 0, cols * self.tile - w, cv2.BORDER_CONSTANT, value=0)
+        rowMax = diff.reshape(rows, self.tile, -1).max(axis=1)
+        changed = rowMax.reshape(rows, cols, -1).max(axis=2)
+        return [(int(c), int(r)) for r, c in zip(*np.nonzero(changed))], False
+
+    def update(self, frame):
+        '''Encode the tiles of frame that changed, returns how many'''
+        frame = np.ascontiguousarray(frame) #absdiff is much slower on strided views
+        changed, resized = self._changed_tiles(frame)
+        if not changed:
+            return 0
+        start = time.perf_counter()
+        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), self.quality]
+        encoded = []
+        for c, r in changed:
+            ret, buffer = cv2.imencode('.jpg', frame[r*self.tile:(r+1)*self.tile, c*self.tile:(c+1)*self.tile], encode_param)
+            if ret:
+                encoded.append(((c, r), buffer.tobytes()))
+        self.encode_seconds += time.perf_counter() - start
+        self.tiles_encoded += len(encoded)
+        self.previous = frame
+
+        with self.cond:
+            self.seq += 1
+            if resized:
+                self.generation += 1
+                self.height, self.width = frame.shape[:2]
+                self.tiles = {}
+            for position, data in encoded:
+                self.tiles[position] = (self.seq, data)
+            self.cond.notify_all()
+        return len(encoded)
+
+    def subscribe(self, client_id):
+        with self.cond:
+            self.subscribers[client_id] = {"seq": 0, "generation": -1, "keyframe_at": 0}
+
+    def unsubscribe(self, client_id):
+        with self.cond:
+            self.subscribers.pop(client_id, None)
+
+    def subscriber_count(self):
+        return len(self.subscribers)
+
+    def wait_message(self, client_id, timeout=0.5):
+        '''The next message for this viewer, or None on timeout'''
+        with self.cond:
+            client = self.subscribers[client_id]
+            if not self.cond.wait_for(lambda: self.seq > client["seq"] and self.tiles, timeout=timeout):
+                return None
+            keyframe = client["generation"] != self.generation or time.time() - client["keyframe_at"] > KEYFRAME_INTERVAL
+            if keyframe:
+                tiles = [(position, data) for position, (_, data) in self.tiles.items()]
+                client["keyframe_at"] = time.time()
+            else:
+                tiles = [(position, data) for position, (seq, data) in self.tiles.items() if seq > client["seq"]]
+            client["seq"] = self.seq
+            client["generation"] = self.generation
+            width, height = self.width, self.height
+        return pack_message(KIND_KEYFRAME if keyframe else KIND_DELTA, width, height, self.tile, tiles)
+
+
+def pack_message(kind, width, height, tile, tiles):
+    parts = [struct.pack(">BHHHH", kind, width, height, tile, len(tiles))]
+    for (c, r), data in tiles:
+        parts.append(struct.pack(">HHI", c, r, len(data)))
+        parts.append(data)
+    body = b"".join(parts)
+    return struct.pack(">I", len(body)) + body
+
+
+def load_frames(path, limit):
+    import os
+    frames = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path))[:limit]:
+            frame = cv2.imread(os.path.join(path, name))
+            if frame is not None:
+                frames.append(frame)
+        return frames
+    capture = cv2.VideoCapture(path)
+    while len(frames) < limit:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def synthetic_frames(count, width=1280, height=720):
+    '''A static scene with a small sprite moving across it, like gathering in a field'''
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    background = cv2.GaussianBlur(background, (31, 31), 0)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        x = int((i * 7) % (width - 80))
+        y = int(height / 2 + 100 * np.sin(i / 10))
+        cv2.rectangle(frame, (x, y), (x + 60, y + 60), (40, 200, 250), -1)
+        frames.append(frame)
+    return frames
+
+
+if __name__ == "__main__":
+    import argparse
+    argParser = argparse.ArgumentParser(description="Compare MJPEG and tile-delta stream bytes on a frame sequence.")
+    argParser.add_argument("--frames", help="folder of images or a video file, a synthetic scene if not given")
+    argParser.add_argument("--count", type=int, default=300)
+    argParser.add_argument("--tile", type=int, default=TILE_SIZE)
+    argParser.add_argument("--quality", type=int, default=TILE_QUALITY)
+    args = argParser.parse_args()
+
+    frames = load_frames(args.frames, args.count) if args.frames else synthetic_frames(args.count)
+    if not frames:
+        raise SystemExit("No frames found")
+
+    start = time.perf_counter()
+    mjpegBytes = 0
+    for frame in frames:
+        mjpegBytes += len(cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), args.quality])[1])
+    mjpegSeconds = time.perf_counter() - start
+
+    encoder = TileEncoder(args.tile, args.quality)
+    encoder.subscribe(1)
+    tileBytes = 0
+    start = time.perf_counter()
+    for frame in frames:
+        encoder.update(frame)
+        message = encoder.wait_message(1, timeout=0)
+        tileBytes += len(message) if message else 0
+    tileSeconds = time.perf_counter() - start
+
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"mjpeg:      {mjpegBytes/len(frames)/1024:.1f} KB/frame, {mjpegSeconds/len(frames)*1000:.2f} ms/frame")
+    print(f"tile delta: {tileBytes/len(frames)/1024:.1f} KB/frame, {tileSeconds/len(frames)*1000:.2f} ms/frame "
+          f"({encoder.tiles_encoded/len(frames):.1f} tiles encoded per frame)")
@@ -148,6 +148,25 @@ function log(time = "", msg = "", color = "") {
   if (!logEntry.hidden) logs.scrollTop = logs.scrollHeight;
 }
 
+//several log messages at once, filtered and scrolled once
+eel.expose(logBatch);
+function logBatch(entries) {
+  const logs = document.getElementById("logs");
+  if (!logs || !entries || !entries.length) return;
+
+  const fragment = document.createDocumentFragment();
+  for (const [time, msg, color] of entries) {
+    const logEntry = document.createElement("div");
+    logEntry.className = "log-msg";
+    logEntry.innerHTML = `<span style="background-color: #${color}; align-self: start"></span>${time ? `[${time}]` : ""} ${msg}`;
+    fragment.appendChild(logEntry);
+  }
+  logs.appendChild(fragment);
+
+  filterLogs();
+  if (logs.lastElementChild && !logs.lastElementChild.hidden) logs.scrollTop = logs.scrollHeight;
+}
+
 function getLogSearchTerms() {
   const input = document.getElementById("log-search-input");
   return (input?.value || "")